@@ -3,16 +3,14 @@ from logging.config import fileConfig
 from pathlib import Path
 import sys
 
-from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy import pool
-
 from alembic import context
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from app.core.config import settings
-from app.core.database import Base
+from app.core.database import Base, criar_engine
 from app.models import *
+from app.repositories.log_repository import eh_particao
 
 config = context.config
 
@@ -21,6 +19,13 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
+def include_name(name, type_, parent_names):
+    # as partições de logs_sistema são criadas e descartadas em runtime (app.logs_manutencao):
+    # sem este filtro o autogenerate as veria como tabelas a remover
+    if type_ == "table":
+        return not eh_particao(name)
+    return True
+
 def run_migrations_offline() -> None:
     """Executa migrações no modo 'offline'.
     Não vamos usar isto, mas está aqui por completude.
@@ -29,6 +34,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -37,7 +43,7 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -46,10 +52,8 @@ async def run_migrations_online() -> None:
     """Executa migrações no modo 'online' (conectado à base de dados).
     Este é o modo que vamos usar.
     """
-    connectable = create_async_engine(
-        settings.ASYNC_DATABASE_URL,
-        poolclass=pool.NullPool,
-    )
+    # mesmas opções da aplicação (PgBouncer, retentativas), com NullPool e sem statement_timeout
+    connectable = criar_engine(para_migracoes=True)
 
     async with connectable.connect() as connection:
         await connection.run_sync(do_run_migrations)
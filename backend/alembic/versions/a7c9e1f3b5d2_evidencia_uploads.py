@@ -0,0 +1,42 @@
+"""Tabela evidencia_uploads
+
+Revision ID: a7c9e1f3b5d2
+Revises: f2c4a6e8b0d1
+Create Date: 2026-10-18 19:00:00.000000
+
+Sessões de upload retomável de evidências: tamanho esperado e quantos bytes
+já foram confirmados no arquivo .part correspondente.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1f3b5d2'
+down_revision: Union[str, None] = 'f2c4a6e8b0d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('evidencia_uploads',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('passo_id', sa.Integer(), nullable=False),
+    sa.Column('nome_arquivo', sa.String(length=255), nullable=True),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('tamanho', sa.BigInteger(), nullable=False),
+    sa.Column('recebido', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['passo_id'], ['execucoes_passos.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_evidencia_uploads_updated_at', 'evidencia_uploads', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_evidencia_uploads_updated_at', table_name='evidencia_uploads')
+    op.drop_table('evidencia_uploads')
@@ -0,0 +1,31 @@
+"""Partes do upload retomável no armazenamento
+
+Revision ID: b4e6a8c0d2f5
+Revises: c9e1a3b5d7f4
+Create Date: 2026-10-18 23:30:00.000000
+
+Os trechos confirmados passam a ficar no backend de armazenamento, não no
+disco do nó que os recebeu. `referencia` e `partes` guardam o que o backend
+precisa para juntá-los (no S3, o UploadId e o ETag de cada parte).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e6a8c0d2f5'
+down_revision: Union[str, None] = 'c9e1a3b5d7f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('evidencia_uploads', sa.Column('referencia', sa.String(length=1024), nullable=True))
+    op.add_column('evidencia_uploads', sa.Column('partes', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('evidencia_uploads', 'partes')
+    op.drop_column('evidencia_uploads', 'referencia')
@@ -0,0 +1,27 @@
+"""Coluna usuarios.token_versao
+
+Revision ID: b8d0f2a4c6e3
+Revises: a7c9e1f3b5d2
+Create Date: 2026-10-18 21:00:00.000000
+
+Versão dos tokens do usuário: vai no JWT e é incrementada ao trocar senha,
+nível ou status, invalidando os tokens emitidos antes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d0f2a4c6e3'
+down_revision: Union[str, None] = 'a7c9e1f3b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('usuarios', sa.Column('token_versao', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('usuarios', 'token_versao')
@@ -0,0 +1,81 @@
+"""Índices de chaves estrangeiras e filtros quentes
+
+Revision ID: c7d2e4f1a9b3
+Revises: b531c51bafbe
+Create Date: 2026-10-18 09:00:00.000000
+
+Os índices foram escolhidos a partir das queries dos repositórios:
+
+- execucoes_teste (responsavel_id, status_geral, updated_at): KPIs do runner
+  e "minhas tarefas" filtradas por status, ordenadas por updated_at DESC
+  (o btree é percorrido de trás para frente, não precisa de DESC explícito);
+- execucoes_teste (responsavel_id, updated_at, id): keyset de "minhas tarefas";
+- execucoes_teste (ciclo_teste_id, status_geral): pendências/progresso do ciclo;
+- execucoes_teste (caso_teste_id) e (updated_at): joins do dashboard,
+  exclusão em cascata, timeline e velocidade;
+- execucoes_passos (execucao_teste_id, status) e (passo_caso_teste_id):
+  consolidação do status da execução e exclusões em cascata;
+- defeitos (execucao_teste_id, status) e o parcial de defeitos não fechados;
+- casos_teste (projeto_id, id), (responsavel_id), (ciclo_id): listagens;
+- projetos (sistema_id), password_resets (id_usuario), logs_sistema (created_at).
+
+password_resets.token já é coberto pelo índice da UNIQUE constraint.
+
+Tudo é criado com CREATE INDEX CONCURRENTLY, fora da transação da migração,
+para não bloquear escritas nas tabelas grandes durante o deploy.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e4f1a9b3'
+down_revision: Union[str, None] = 'b531c51bafbe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDICES = [
+    ('ix_execucoes_teste_responsavel_status_updated', 'execucoes_teste', ['responsavel_id', 'status_geral', 'updated_at'], None),
+    ('ix_execucoes_teste_responsavel_updated', 'execucoes_teste', ['responsavel_id', 'updated_at', 'id'], None),
+    ('ix_execucoes_teste_ciclo_status', 'execucoes_teste', ['ciclo_teste_id', 'status_geral'], None),
+    ('ix_execucoes_teste_caso_teste_id', 'execucoes_teste', ['caso_teste_id'], None),
+    ('ix_execucoes_teste_updated_at', 'execucoes_teste', ['updated_at'], None),
+    ('ix_execucoes_passos_execucao_status', 'execucoes_passos', ['execucao_teste_id', 'status'], None),
+    ('ix_execucoes_passos_passo_caso_teste_id', 'execucoes_passos', ['passo_caso_teste_id'], None),
+    ('ix_defeitos_execucao_status', 'defeitos', ['execucao_teste_id', 'status'], None),
+    ('ix_defeitos_abertos', 'defeitos', ['severidade', 'execucao_teste_id'], "status <> 'fechado'"),
+    ('ix_casos_teste_projeto_id', 'casos_teste', ['projeto_id', 'id'], None),
+    ('ix_casos_teste_responsavel_id', 'casos_teste', ['responsavel_id'], None),
+    ('ix_casos_teste_ciclo_id', 'casos_teste', ['ciclo_id'], None),
+    ('ix_projetos_sistema_id', 'projetos', ['sistema_id'], None),
+    ('ix_password_resets_id_usuario', 'password_resets', ['id_usuario'], None),
+    ('ix_logs_sistema_created_at', 'logs_sistema', ['created_at'], None),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas, where in INDICES:
+            # logs_sistema é criada pelo create_all da aplicação, pode ainda não existir
+            if not inspector.has_table(tabela):
+                continue
+            op.create_index(
+                nome,
+                tabela,
+                colunas,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nome, tabela, _, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""Tabela sessoes_usuario
+
+Revision ID: c9e1a3b5d7f4
+Revises: b8d0f2a4c6e3
+Create Date: 2026-10-18 22:00:00.000000
+
+Sessões de login renováveis: hash do refresh token atual, versão dos tokens
+do usuário na abertura e expiração.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1a3b5d7f4'
+down_revision: Union[str, None] = 'b8d0f2a4c6e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sessoes_usuario',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('token_versao', sa.Integer(), nullable=False),
+    sa.Column('expira_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sessoes_usuario_usuario_id'), 'sessoes_usuario', ['usuario_id'], unique=False)
+    op.create_index('ix_sessoes_usuario_expira_em', 'sessoes_usuario', ['expira_em'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessoes_usuario_expira_em', table_name='sessoes_usuario')
+    op.drop_index(op.f('ix_sessoes_usuario_usuario_id'), table_name='sessoes_usuario')
+    op.drop_table('sessoes_usuario')
@@ -0,0 +1,65 @@
+"""Tabela dashboard_rollup
+
+Revision ID: d3a8f5b2c6e1
+Revises: c7d2e4f1a9b3
+Create Date: 2026-10-18 11:00:00.000000
+
+Contadores por projeto usados pelo dashboard. A carga inicial repete a
+mesma agregação de `python -m app.dashboard_rollup rebuild`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f5b2c6e1'
+down_revision: Union[str, None] = 'c7d2e4f1a9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CARGA_INICIAL = """
+INSERT INTO dashboard_rollup (projeto_id, sistema_id, modulo_id, dimensao, chave, total)
+SELECT p.id, p.sistema_id, p.modulo_id, 'execucao_status', CAST(e.status_geral AS VARCHAR(50)), count(*)
+FROM execucoes_teste e
+JOIN casos_teste c ON c.id = e.caso_teste_id
+JOIN projetos p ON p.id = c.projeto_id
+GROUP BY p.id, p.sistema_id, p.modulo_id, CAST(e.status_geral AS VARCHAR(50))
+UNION ALL
+SELECT p.id, p.sistema_id, p.modulo_id, 'defeito_status', CAST(d.status AS VARCHAR(50)), count(*)
+FROM defeitos d
+JOIN execucoes_teste e ON e.id = d.execucao_teste_id
+JOIN casos_teste c ON c.id = e.caso_teste_id
+JOIN projetos p ON p.id = c.projeto_id
+GROUP BY p.id, p.sistema_id, p.modulo_id, CAST(d.status AS VARCHAR(50))
+UNION ALL
+SELECT p.id, p.sistema_id, p.modulo_id, 'defeito_severidade_aberto', CAST(d.severidade AS VARCHAR(50)), count(*)
+FROM defeitos d
+JOIN execucoes_teste e ON e.id = d.execucao_teste_id
+JOIN casos_teste c ON c.id = e.caso_teste_id
+JOIN projetos p ON p.id = c.projeto_id
+WHERE d.status <> 'fechado'
+GROUP BY p.id, p.sistema_id, p.modulo_id, CAST(d.severidade AS VARCHAR(50))
+"""
+
+
+def upgrade() -> None:
+    op.create_table('dashboard_rollup',
+    sa.Column('projeto_id', sa.Integer(), nullable=False),
+    sa.Column('dimensao', sa.String(length=50), nullable=False),
+    sa.Column('chave', sa.String(length=50), nullable=False),
+    sa.Column('sistema_id', sa.Integer(), nullable=False),
+    sa.Column('modulo_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['projeto_id'], ['projetos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('projeto_id', 'dimensao', 'chave')
+    )
+    op.create_index('ix_dashboard_rollup_sistema_dimensao', 'dashboard_rollup', ['sistema_id', 'dimensao'], unique=False)
+    op.execute(CARGA_INICIAL)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dashboard_rollup_sistema_dimensao', table_name='dashboard_rollup')
+    op.drop_table('dashboard_rollup')
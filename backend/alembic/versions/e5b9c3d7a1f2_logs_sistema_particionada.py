@@ -0,0 +1,140 @@
+"""logs_sistema particionada por mês
+
+Revision ID: e5b9c3d7a1f2
+Revises: d3a8f5b2c6e1
+Create Date: 2026-10-18 15:00:00.000000
+
+Recria logs_sistema como tabela particionada por RANGE (created_at), com uma
+partição por mês (logs_sistema_AAAA_MM) e uma partição padrão de segurança.
+As linhas existentes são copiadas. A PK física passa a ser (id, created_at),
+exigência do particionamento. A retenção passa a ser feita descartando
+partições inteiras (python -m app.logs_manutencao retencao).
+
+Só se aplica ao Postgres. Nos demais bancos a tabela continua sendo criada
+pelo create_all da aplicação.
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9c3d7a1f2'
+down_revision: Union[str, None] = 'd3a8f5b2c6e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PARTICOES_FUTURAS = 3
+
+COLUNAS = "id, usuario_id, sistema_id, acao, entidade, entidade_id, detalhes, created_at"
+
+INDICES = [
+    ('ix_logs_sistema_created_at_id', ['created_at', 'id']),
+    ('ix_logs_sistema_sistema_created', ['sistema_id', 'created_at', 'id']),
+    ('ix_logs_sistema_usuario_created', ['usuario_id', 'created_at', 'id']),
+    ('ix_logs_sistema_entidade_created', ['entidade', 'created_at', 'id']),
+    ('ix_logs_sistema_acao_created', ['acao', 'created_at', 'id']),
+]
+
+
+def _inicio_do_mes(data: datetime, deslocamento: int = 0) -> datetime:
+    indice = data.year * 12 + (data.month - 1) + deslocamento
+    return datetime(indice // 12, indice % 12 + 1, 1)
+
+
+def _particionada(bind) -> bool:
+    return bool(bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'logs_sistema')"
+    )).scalar())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or _particionada(bind):
+        return
+
+    existia = sa.inspect(bind).has_table('logs_sistema')
+    inicio = datetime.now()
+    if existia:
+        # libera os nomes (tabela, PK, sequência e índices) para a tabela nova
+        op.execute("ALTER TABLE logs_sistema RENAME TO logs_sistema_antiga")
+        op.execute("ALTER INDEX IF EXISTS logs_sistema_pkey RENAME TO logs_sistema_antiga_pkey")
+        op.execute("ALTER SEQUENCE IF EXISTS logs_sistema_id_seq RENAME TO logs_sistema_antiga_id_seq")
+        for nome in ('ix_logs_sistema_id', 'ix_logs_sistema_created_at'):
+            op.execute(f"DROP INDEX IF EXISTS {nome}")
+        mais_antigo = bind.execute(sa.text("SELECT min(created_at) FROM logs_sistema_antiga")).scalar()
+        if mais_antigo:
+            inicio = min(inicio, mais_antigo)
+
+    op.execute("""
+        CREATE TABLE logs_sistema (
+            id SERIAL NOT NULL,
+            usuario_id INTEGER REFERENCES usuarios (id),
+            sistema_id INTEGER REFERENCES sistemas (id),
+            acao VARCHAR,
+            entidade VARCHAR,
+            entidade_id INTEGER,
+            detalhes TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    mes, ultimo = _inicio_do_mes(inicio), _inicio_do_mes(datetime.now(), PARTICOES_FUTURAS)
+    while mes <= ultimo:
+        proximo = _inicio_do_mes(mes, 1)
+        op.execute(
+            f"CREATE TABLE logs_sistema_{mes:%Y_%m} PARTITION OF logs_sistema "
+            f"FOR VALUES FROM ('{mes:%Y-%m-%d}') TO ('{proximo:%Y-%m-%d}')"
+        )
+        mes = proximo
+    op.execute("CREATE TABLE logs_sistema_padrao PARTITION OF logs_sistema DEFAULT")
+
+    if existia:
+        op.execute(
+            f"INSERT INTO logs_sistema ({COLUNAS}) "
+            f"SELECT id, usuario_id, sistema_id, acao, entidade, entidade_id, detalhes, "
+            f"COALESCE(created_at, now()) FROM logs_sistema_antiga"
+        )
+        op.execute(
+            "SELECT setval(pg_get_serial_sequence('logs_sistema', 'id'), "
+            "COALESCE((SELECT max(id) FROM logs_sistema), 0) + 1, false)"
+        )
+        op.execute("DROP TABLE logs_sistema_antiga")
+
+    for nome, colunas in INDICES:
+        op.create_index(nome, 'logs_sistema', colunas, unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not _particionada(bind):
+        return
+
+    op.execute("ALTER TABLE logs_sistema RENAME TO logs_sistema_particionada")
+    op.execute("ALTER SEQUENCE IF EXISTS logs_sistema_id_seq RENAME TO logs_sistema_particionada_id_seq")
+    for nome, _ in INDICES:
+        op.execute(f"DROP INDEX IF EXISTS {nome}")
+    op.execute("""
+        CREATE TABLE logs_sistema (
+            id SERIAL PRIMARY KEY,
+            usuario_id INTEGER REFERENCES usuarios (id),
+            sistema_id INTEGER REFERENCES sistemas (id),
+            acao VARCHAR,
+            entidade VARCHAR,
+            entidade_id INTEGER,
+            detalhes TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute(f"INSERT INTO logs_sistema ({COLUNAS}) SELECT {COLUNAS} FROM logs_sistema_particionada")
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('logs_sistema', 'id'), "
+        "COALESCE((SELECT max(id) FROM logs_sistema), 0) + 1, false)"
+    )
+    op.execute("DROP TABLE logs_sistema_particionada CASCADE")
+    op.create_index('ix_logs_sistema_id', 'logs_sistema', ['id'], unique=False)
+    op.create_index('ix_logs_sistema_created_at', 'logs_sistema', ['created_at'], unique=False)
@@ -0,0 +1,39 @@
+"""Tabela evidencias
+
+Revision ID: f2c4a6e8b0d1
+Revises: e5b9c3d7a1f2
+Create Date: 2026-10-18 17:00:00.000000
+
+Metadados dos blobs de evidência endereçados por SHA-256, com a contagem de
+referências usada pelo GC. Arquivos enviados antes desta versão ({passo}_{uuid})
+continuam onde estão e não entram na contagem.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c4a6e8b0d1'
+down_revision: Union[str, None] = 'e5b9c3d7a1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('evidencias',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('tamanho', sa.BigInteger(), nullable=False),
+    sa.Column('mime', sa.String(length=100), nullable=False),
+    sa.Column('extensao', sa.String(length=10), nullable=False),
+    sa.Column('referencias', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_evidencias_referencias_updated', 'evidencias', ['referencias', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_evidencias_referencias_updated', table_name='evidencias')
+    op.drop_table('evidencias')
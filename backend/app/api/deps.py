@@ -1,14 +1,16 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, status, Query, Response
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security
+from app.core.cache import principal_cache
 from app.core.config import settings
-from app.core.database import get_db
-from app.models.usuario import Usuario
+from app.core.database import get_db, usuario_da_requisicao
+from app.core.pagination import PageParams, Page, DEFAULT_LIMIT, MAX_LIMIT
 from app.schemas.token import TokenPayload
+from app.schemas.usuario import UsuarioAutenticado
 from app.repositories.usuario_repository import UsuarioRepository
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -17,7 +19,7 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> Usuario:
+) -> UsuarioAutenticado:
     try:
         # CORREÇÃO AQUI: settings.ALGORITHM
         payload = jwt.decode(
@@ -30,19 +32,46 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
     
-    # GARANTE que o repo está sendo criado corretamente
-    repo = UsuarioRepository(db)
-    
     # GARANTE que o tipo de dado é int
-    user = await repo.get_by_id(user_id=int(token_data.sub))
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = int(token_data.sub)
+
+    async def carregar() -> UsuarioAutenticado:
+        user = await UsuarioRepository(db).get_by_id(user_id=user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        return UsuarioAutenticado.model_validate(user)
+
+    # no acerto a sessão nem chega a abrir conexão
+    user = await principal_cache.obter(f"principal:{user_id}", f"v{token_data.ver}", carregar, UsuarioAutenticado)
+
+    if user.token_versao != token_data.ver:
+        # senha, nível ou status mudaram depois da emissão do token: 401 leva o front de volta ao login
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revogado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # quem acabou de gravar lê do primário (ver get_read_db)
+    usuario_da_requisicao.set(user.id)
     return user
 
 def get_current_active_user(
-    current_user: Usuario = Depends(get_current_user),
-) -> Usuario:
+    current_user: UsuarioAutenticado = Depends(get_current_user),
+) -> UsuarioAutenticado:
     if not current_user.ativo:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+def get_page_params(
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado no header X-Next-Cursor"),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Quantidade máxima de itens por página"),
+    incluir_total: bool = Query(False, description="Retorna a estimativa do total no header X-Total-Estimado"),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit, incluir_total=incluir_total)
+
+def set_pagination_headers(response: Response, page: Page) -> list:
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.total is not None:
+        response.headers["X-Total-Estimado"] = str(page.total)
+    return page.items
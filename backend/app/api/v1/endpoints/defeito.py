@@ -1,18 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, AsyncSessionLeitura
 from app.services.defeito_service import DefeitoService
+from app.services.pacote_evidencias_service import PacoteEvidenciasService
 from app.schemas.defeito import DefeitoCreate, DefeitoResponse, DefeitoUpdate
-from app.models.usuario import Usuario 
-from app.api.deps import get_current_user
+from app.schemas.usuario import UsuarioAutenticado
+from app.models.testing import StatusDefeitoEnum, SeveridadeDefeitoEnum
+from app.core.pagination import PageParams
+from app.api.deps import get_current_user, get_current_active_user, get_page_params, set_pagination_headers
 
 router = APIRouter()
 
 def get_service(db: AsyncSession = Depends(get_db)) -> DefeitoService:
     return DefeitoService(db)
 
+def get_service_leitura(db: AsyncSession = Depends(get_read_db)) -> DefeitoService:
+    return DefeitoService(db)
+
 @router.post("/", response_model=DefeitoResponse, status_code=status.HTTP_201_CREATED)
 async def criar_defeito(
     dados: DefeitoCreate, 
@@ -23,17 +30,40 @@ async def criar_defeito(
 @router.get("/execucao/{execucao_id}", response_model=List[DefeitoResponse])
 async def listar_defeitos_execucao(
     execucao_id: int, 
-    service: DefeitoService = Depends(get_service)
+    response: Response,
+    params: PageParams = Depends(get_page_params),
+    service: DefeitoService = Depends(get_service_leitura)
 ):
-    return await service.listar_por_execucao(execucao_id)
+    page = await service.listar_por_execucao(execucao_id, params)
+    return set_pagination_headers(response, page)
 
 @router.get("/", response_model=List[DefeitoResponse])
 async def listar_todos_defeitos(
+    response: Response,
     responsavel_id: Optional[int] = Query(None, description="Filtrar por ID do responsável"),
-    current_user: Usuario = Depends(get_current_user),
-    service: DefeitoService = Depends(get_service)
+    status: Optional[StatusDefeitoEnum] = None,
+    severidade: Optional[SeveridadeDefeitoEnum] = None,
+    projeto_id: Optional[int] = None,
+    ciclo_id: Optional[int] = None,
+    params: PageParams = Depends(get_page_params),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
+    service: DefeitoService = Depends(get_service_leitura)
 ):
-    return await service.listar_todos(current_user, filtro_responsavel_id=responsavel_id)
+    page = await service.listar_todos(
+        current_user, params, filtro_responsavel_id=responsavel_id,
+        status=status, severidade=severidade, projeto_id=projeto_id, ciclo_id=ciclo_id
+    )
+    return set_pagination_headers(response, page)
+
+@router.get("/{id}/evidencias.zip")
+async def baixar_evidencias_defeito(id: int, current_user: UsuarioAutenticado = Depends(get_current_active_user)):
+    service = PacoteEvidenciasService(AsyncSessionLeitura)
+    await service.verificar("defeito", id)
+    return StreamingResponse(
+        service.gerar("defeito", id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{service.nome_arquivo("defeito", id)}"'},
+    )
 
 @router.put("/{id}", response_model=DefeitoResponse)
 async def atualizar_defeito(
@@ -0,0 +1,39 @@
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.armazenamento import armazenamento, responder_evidencia
+from app.core.arquivos import caminho_seguro, servir_arquivo
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.derivados import derivados
+from app.services.evidencia_service import EvidenciaService
+
+router = APIRouter()
+
+@router.put("/direto", summary="Recebe um envio direto autorizado por token assinado")
+async def receber_envio_direto(token: str, request: Request, db: AsyncSession = Depends(get_db)):
+    # sem login: o token assinado (nome, tamanho e hash esperados) é a autorização
+    return await EvidenciaService(db).receber_direto(token, request.stream())
+
+@router.api_route("/{caminho:path}", methods=["GET", "HEAD"], summary="Serve um arquivo de evidência")
+async def servir_evidencia(caminho: str, request: Request, variante: Optional[str] = None):
+    # blobs são endereçados pelo conteúdo: cache imutável, ETag, Range (vídeos)
+    if not variante or not armazenamento.local:
+        return await responder_evidencia(request, caminho)
+
+    arquivo = caminho_seguro(settings.EVIDENCIAS_DIR, caminho)
+    if variante not in derivados.variantes:
+        raise HTTPException(status_code=400, detail=f"Variante inválida. Use: {', '.join(derivados.variantes)}")
+    if not await asyncio.to_thread(os.path.isfile, arquivo):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    # vídeo, PDF ou sem Pillow: a variante é o próprio original
+    chave = os.path.splitext(os.path.basename(arquivo))[0]
+    derivado = await derivados.obter(arquivo, chave, variante)
+    if derivado is None:
+        return await servir_arquivo(request, arquivo)
+    return await servir_arquivo(request, derivado, etag=f'"{chave}-{variante}"')
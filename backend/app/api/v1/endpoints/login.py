@@ -1,18 +1,37 @@
 from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from app.core.database import get_db 
 from app.models.usuario import Usuario
-from app.core.security import verify_password, create_access_token
+from app.core.security import verificar_senha, create_access_token
 from app.core.config import settings
-from app.schemas.token import Token
+from app.schemas.token import Token, RefreshTokenRequest
+from app.repositories.usuario_repository import UsuarioRepository
+from app.services.sessao_service import SessaoService
 
 router = APIRouter()
 
+def _tokens(user: Usuario, refresh_token: str) -> dict:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    
+    access_token = create_access_token(
+        data={"sub": str(user.id), "ver": user.token_versao, "role": user.nivel_acesso.nome, "email": user.email},
+        expires_delta=access_token_expires
+    )
+
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "username": user.email,
+        "nome": user.nome,          
+        "role": user.nivel_acesso.nome
+    }
+
 @router.post("/", response_model=Token, summary="Login e Geração de Token")
 async def login_access_token(
     db: AsyncSession = Depends(get_db),
@@ -23,23 +42,26 @@ async def login_access_token(
     result = await db.execute(query)
     user = result.scalars().first()
 
-    if not user or not verify_password(form_data.password, user.senha_hash):
+    senha_ok, novo_hash = await verificar_senha(form_data.password, user.senha_hash) if user else (False, None)
+    if not senha_ok:
          raise HTTPException(status_code=401, detail="Email ou senha incorretos")
 
+    if novo_hash:
+        # custo do bcrypt mudou: aproveita a senha em mãos para refazer o hash (não revoga tokens)
+        user = await UsuarioRepository(db).update(user.id, {"senha_hash": novo_hash})
+
     if not user.ativo:
          raise HTTPException(status_code=403, detail="Usuário inativo")
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.nivel_acesso.nome, "email": user.email},
-        expires_delta=access_token_expires
-    )
+    return _tokens(user, await SessaoService(db).abrir(user))
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "username": user.email,
-        "nome": user.nome,          
-        "role": user.nivel_acesso.nome
-    }
\ No newline at end of file
+@router.post("/refresh", response_model=Token, summary="Novo access token a partir do refresh token")
+async def refresh_access_token(dados: RefreshTokenRequest, db: AsyncSession = Depends(get_db)) -> Any:
+    # sem bcrypt: o refresh token é aleatório e só o hash dele fica no banco
+    user, refresh_token = await SessaoService(db).renovar(dados.refresh_token)
+    return _tokens(user, refresh_token)
+
+@router.post("/logout", status_code=204, summary="Encerra a sessão do refresh token")
+async def logout(dados: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    await SessaoService(db).encerrar(dados.refresh_token)
+    return Response(status_code=204)
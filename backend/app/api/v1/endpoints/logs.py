@@ -1,27 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.pagination import PageParams
 from app.services.log_service import LogService
 from app.schemas.log import LogResponse
-from app.api.deps import get_current_active_user
-from app.models.usuario import Usuario
+from app.api.deps import get_current_active_user, get_page_params, set_pagination_headers
+from app.schemas.usuario import UsuarioAutenticado
 
 router = APIRouter()
 
 @router.get("/", response_model=List[LogResponse])
 async def listar_logs(
-    db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    response: Response,
+    sistema_id: Optional[int] = None,
+    usuario_id: Optional[int] = None,
+    entidade: Optional[str] = None,
+    entidade_id: Optional[int] = None,
+    acao: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    busca: Optional[str] = None,
+    params: PageParams = Depends(get_page_params),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     service = LogService(db)
-    return await service.listar_todos()
+    page = await service.listar(
+        params, sistema_id=sistema_id, usuario_id=usuario_id, entidade=entidade,
+        entidade_id=entidade_id, acao=acao, desde=desde, ate=ate, busca=busca
+    )
+    return set_pagination_headers(response, page)
 
 @router.delete("/{id}", status_code=204)
 async def deletar_log(
     id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     if current_user.nivel_acesso.nome != 'admin':
         raise HTTPException(status_code=403, detail="Apenas admins podem excluir logs.")
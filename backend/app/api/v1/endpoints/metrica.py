@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.services.metrica_service import MetricaService
 
 router = APIRouter()
@@ -17,7 +17,7 @@ async def gerar_metricas(
 @router.get("/projeto/{projeto_id}", summary="Listar métricas do projeto")
 async def listar_metricas(
     projeto_id: int, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     service = MetricaService(db)
     return await service.listar_metricas_projeto(projeto_id)
\ No newline at end of file
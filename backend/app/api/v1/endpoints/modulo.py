@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Sequence, List
+from typing import Sequence, List, Optional
 
-from app.core.database import get_db
-from app.api.deps import get_current_active_user
-from app.models.usuario import Usuario
+from app.core.database import get_db, get_read_db
+from app.api.deps import get_current_active_user, get_page_params, set_pagination_headers
+from app.core.pagination import PageParams
+from app.schemas.usuario import UsuarioAutenticado
 from app.schemas.modulo import ModuloCreate, ModuloResponse, ModuloUpdate
 from app.services.modulo_service import ModuloService
 from app.services.log_service import LogService
@@ -14,12 +15,15 @@ router = APIRouter()
 def get_modulo_service(db: AsyncSession = Depends(get_db)) -> ModuloService:
     return ModuloService(db)
 
+def get_modulo_service_leitura(db: AsyncSession = Depends(get_read_db)) -> ModuloService:
+    return ModuloService(db)
+
 @router.post("/", response_model=ModuloResponse, status_code=status.HTTP_201_CREATED, summary="Criar um novo módulo")
 async def create_modulo(
     modulo: ModuloCreate,
     service: ModuloService = Depends(get_modulo_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     novo_modulo = await service.create_modulo(modulo)
     
@@ -37,16 +41,21 @@ async def create_modulo(
 
 @router.get("/", response_model=Sequence[ModuloResponse], summary="Listar todos os módulos")
 async def get_modulos(
-    service: ModuloService = Depends(get_modulo_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    response: Response,
+    sistema_id: Optional[int] = None,
+    ativo: Optional[bool] = None,
+    params: PageParams = Depends(get_page_params),
+    service: ModuloService = Depends(get_modulo_service_leitura),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    return await service.get_all_modulos()
+    page = await service.get_all_modulos(params, sistema_id=sistema_id, ativo=ativo)
+    return set_pagination_headers(response, page)
 
 @router.get("/{modulo_id}", response_model=ModuloResponse, summary="Obter um módulo por ID")
 async def get_modulo(
     modulo_id: int,
     service: ModuloService = Depends(get_modulo_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     db_modulo = await service.get_modulo_by_id(modulo_id)
     if db_modulo is None:
@@ -59,7 +68,7 @@ async def update_modulo(
     modulo: ModuloUpdate,
     service: ModuloService = Depends(get_modulo_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     updated_modulo = await service.update_modulo(modulo_id, modulo)
     if not updated_modulo:
@@ -81,7 +90,7 @@ async def delete_modulo(
     modulo_id: int,
     service: ModuloService = Depends(get_modulo_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     modulo_antigo = await service.get_modulo_by_id(modulo_id)
     nome_modulo = modulo_antigo.nome if modulo_antigo else str(modulo_id)
@@ -1,24 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.services.projeto_service import ProjetoService
 from app.services.log_service import LogService
 from app.schemas.projeto import ProjetoCreate, ProjetoResponse, ProjetoUpdate
-from app.api.deps import get_current_active_user
-from app.models.usuario import Usuario
+from app.api.deps import get_current_active_user, get_page_params, set_pagination_headers
+from app.core.pagination import PageParams
+from app.models.projeto import StatusProjetoEnum
+from app.schemas.usuario import UsuarioAutenticado
 
 router = APIRouter()
 
 def get_service(db: AsyncSession = Depends(get_db)) -> ProjetoService:
     return ProjetoService(db)
 
+def get_service_leitura(db: AsyncSession = Depends(get_read_db)) -> ProjetoService:
+    return ProjetoService(db)
+
 @router.post("/", response_model=ProjetoResponse, status_code=status.HTTP_201_CREATED)
 async def create_projeto(
     projeto_in: ProjetoCreate,
     service: ProjetoService = Depends(get_service),
     db: AsyncSession = Depends(get_db), # <--- Injeta DB
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     novo_projeto = await service.create_projeto(projeto_in)
     
@@ -36,23 +41,36 @@ async def create_projeto(
 
 @router.get("/", response_model=List[ProjetoResponse])
 async def get_projetos(
-    service: ProjetoService = Depends(get_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    response: Response,
+    sistema_id: Optional[int] = None,
+    modulo_id: Optional[int] = None,
+    status: Optional[StatusProjetoEnum] = None,
+    responsavel_id: Optional[int] = None,
+    params: PageParams = Depends(get_page_params),
+    service: ProjetoService = Depends(get_service_leitura),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    return await service.get_all_projetos()
+    page = await service.get_all_projetos(
+        params, sistema_id=sistema_id, modulo_id=modulo_id, status=status, responsavel_id=responsavel_id
+    )
+    return set_pagination_headers(response, page)
 
 @router.get("/selection", response_model=List[ProjetoResponse])
 async def get_projetos_selection(
-    service: ProjetoService = Depends(get_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    response: Response,
+    sistema_id: Optional[int] = None,
+    params: PageParams = Depends(get_page_params),
+    service: ProjetoService = Depends(get_service_leitura),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    return await service.get_all_projetos()
+    page = await service.get_all_projetos(params, sistema_id=sistema_id)
+    return set_pagination_headers(response, page)
 
 @router.get("/{projeto_id}", response_model=ProjetoResponse)
 async def get_projeto(
     projeto_id: int,
     service: ProjetoService = Depends(get_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     projeto = await service.get_projeto_by_id(projeto_id)
     if not projeto:
@@ -65,7 +83,7 @@ async def update_projeto(
     projeto_in: ProjetoUpdate,
     service: ProjetoService = Depends(get_service),
     db: AsyncSession = Depends(get_db), # <--- Injeta DB
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     projeto = await service.update_projeto(projeto_id, projeto_in)
     if not projeto:
@@ -88,7 +106,7 @@ async def delete_projeto(
     projeto_id: int,
     service: ProjetoService = Depends(get_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     projeto_antigo = await service.get_projeto_by_id(projeto_id)
     if not projeto_antigo:
@@ -1,18 +1,18 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.services.dashboard_service import DashboardService
 from app.schemas.dashboard import RunnerDashboardResponse, PerformanceResponse
-from app.models.usuario import Usuario
+from app.schemas.usuario import UsuarioAutenticado
 from app.api.deps import get_current_active_user
 
 router = APIRouter()
 
 @router.get("/", response_model=RunnerDashboardResponse)
 async def get_runner_dashboard(
-    current_user: Usuario = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     # servico para buscar dados do dashboard pessoal do runner logado
     service = DashboardService(db)
@@ -21,8 +21,8 @@ async def get_runner_dashboard(
 @router.get("/performance", response_model=PerformanceResponse)
 async def get_performance_dashboard(
     user_id: Optional[int] = Query(None, description="ID do usuário para visão individual"),
-    current_user: Usuario = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     # endpoint de analise de performance 
     # se user_id for passado, filtra pelo testador, senao mostra geral
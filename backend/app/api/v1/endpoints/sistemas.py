@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Sequence, Optional
-from app.core.database import AsyncSessionLocal
+from app.core.database import AsyncSessionLocal, get_read_db
 from app.schemas import SistemaCreate, SistemaResponse, SistemaUpdate
 from app.services.sistema_service import SistemaService
 from app.services.log_service import LogService
-from app.api.deps import get_current_active_user
-from app.models.usuario import Usuario
+from app.api.deps import get_current_active_user, get_page_params, set_pagination_headers
+from app.core.pagination import PageParams
+from app.schemas.usuario import UsuarioAutenticado
 
 router = APIRouter()
 
@@ -17,12 +18,15 @@ async def get_db_session() -> AsyncSession:
 def get_sistema_service(db: AsyncSession = Depends(get_db_session)) -> SistemaService:
     return SistemaService(db)
 
+def get_sistema_service_leitura(db: AsyncSession = Depends(get_read_db)) -> SistemaService:
+    return SistemaService(db)
+
 @router.post("/", response_model=SistemaResponse, status_code=status.HTTP_201_CREATED, summary="Criar um novo sistema")
 async def create_sistema(
     sistema: SistemaCreate,
     service: SistemaService = Depends(get_sistema_service),
     db: AsyncSession = Depends(get_db_session),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     novo_sistema = await service.create_sistema(sistema)
     
@@ -40,16 +44,20 @@ async def create_sistema(
 
 @router.get("/", response_model=Sequence[SistemaResponse], summary="Listar todos os sistemas")
 async def get_sistemas(
-    service: SistemaService = Depends(get_sistema_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    response: Response,
+    ativo: Optional[bool] = None,
+    params: PageParams = Depends(get_page_params),
+    service: SistemaService = Depends(get_sistema_service_leitura),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    return await service.get_all_sistemas()
+    page = await service.get_all_sistemas(params, ativo)
+    return set_pagination_headers(response, page)
 
 @router.get("/{sistema_id}", response_model=SistemaResponse, summary="Obter um sistema por ID")
 async def get_sistema(
     sistema_id: int,
     service: SistemaService = Depends(get_sistema_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     db_sistema = await service.get_sistema_by_id(sistema_id)
     if db_sistema is None:
@@ -62,7 +70,7 @@ async def update_sistema(
     sistema: SistemaUpdate,
     service: SistemaService = Depends(get_sistema_service),
     db: AsyncSession = Depends(get_db_session),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     updated_sistema = await service.update_sistema(sistema_id, sistema)
     if not updated_sistema:
@@ -85,7 +93,7 @@ async def delete_sistema(
     sistema_id: int,
     service: SistemaService = Depends(get_sistema_service),
     db: AsyncSession = Depends(get_db_session),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     sistema_antigo = await service.get_sistema_by_id(sistema_id)
     nome_sistema = sistema_antigo.nome if sistema_antigo else str(sistema_id)
@@ -1,31 +1,37 @@
 import shutil
 import uuid
-import os
 import json
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from typing import List, Optional
 
-from app.core.database import get_db
-from app.api.deps import get_current_user, get_current_active_user
-from app.models.usuario import Usuario
-from app.models.projeto import Projeto
-from app.models.testing import StatusExecucaoEnum
+from app.core.armazenamento import responder_evidencia
+from app.core.database import get_db, get_read_db, AsyncSessionLeitura
+from app.api.deps import get_current_user, get_current_active_user, get_page_params, set_pagination_headers
+from app.core.pagination import PageParams
+from app.schemas.usuario import UsuarioAutenticado
+from app.models.testing import StatusExecucaoEnum, PrioridadeEnum, StatusCasoTesteEnum, StatusCicloEnum
 
 from app.services.caso_teste_service import CasoTesteService
 from app.services.ciclo_teste_service import CicloTesteService
 from app.services.execucao_teste_service import ExecucaoTesteService
 from app.services.log_service import LogService
+from app.services.evidencia_service import EvidenciaService
+from app.services.pacote_evidencias_service import PacoteEvidenciasService
 
-from app.schemas.caso_teste import CasoTesteCreate, CasoTesteResponse, CasoTesteUpdate
+from app.schemas.caso_teste import CasoTesteCreate, CasoTesteResponse, CasoTesteUpdate, CasoTesteResumo
 from app.schemas.ciclo_teste import CicloTesteCreate, CicloTesteResponse, CicloTesteUpdate
+from app.schemas.evidencia import UploadEvidenciaCreate, UploadEvidenciaResponse, UploadDiretoCreate, UploadDiretoConcluir
 from app.schemas.execucao_teste import (
     ExecucaoTesteCreate, 
     ExecucaoTesteResponse, 
     ExecucaoPassoResponse, 
-    ExecucaoPassoUpdate
+    ExecucaoPassoUpdate,
+    AlocacaoLoteCreate,
+    AlocacaoLoteResponse,
+    ExecucaoPassoLoteUpdate,
+    ExecucaoPassoLoteResponse
 )
 
 router = APIRouter()
@@ -40,26 +46,55 @@ def get_ciclo_service(db: AsyncSession = Depends(get_db)) -> CicloTesteService:
 def get_execucao_service(db: AsyncSession = Depends(get_db)) -> ExecucaoTesteService:
     return ExecucaoTesteService(db)
 
-# --- HELPER PARA OBTER SISTEMA_ID ---
-async def get_sistema_id_from_projeto(db: AsyncSession, projeto_id: int) -> Optional[int]:
-    result = await db.execute(select(Projeto.sistema_id).where(Projeto.id == projeto_id))
-    return result.scalar()
+def get_evidencia_service(db: AsyncSession = Depends(get_db)) -> EvidenciaService:
+    return EvidenciaService(db)
+
+# listas: réplica de leitura quando houver
+def get_caso_service_leitura(db: AsyncSession = Depends(get_read_db)) -> CasoTesteService:
+    return CasoTesteService(db)
+
+def get_ciclo_service_leitura(db: AsyncSession = Depends(get_read_db)) -> CicloTesteService:
+    return CicloTesteService(db)
+
+def get_execucao_service_leitura(db: AsyncSession = Depends(get_read_db)) -> ExecucaoTesteService:
+    return ExecucaoTesteService(db)
 
 # --- GESTÃO DE CASOS DE TESTE ---
-@router.get("/casos", response_model=List[CasoTesteResponse])
+@router.get("/casos", response_model=List[CasoTesteResumo])
 async def listar_todos_casos(
-    service: CasoTesteService = Depends(get_caso_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    response: Response,
+    projeto_id: Optional[int] = None,
+    prioridade: Optional[PrioridadeEnum] = None,
+    status: Optional[StatusCasoTesteEnum] = None,
+    responsavel_id: Optional[int] = None,
+    ciclo_id: Optional[int] = None,
+    params: PageParams = Depends(get_page_params),
+    service: CasoTesteService = Depends(get_caso_service_leitura),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    return await service.listar_todos()
+    page = await service.listar_todos(
+        params, projeto_id=projeto_id, prioridade=prioridade, status=status,
+        responsavel_id=responsavel_id, ciclo_id=ciclo_id
+    )
+    return set_pagination_headers(response, page)
 
-@router.get("/projetos/{projeto_id}/casos", response_model=List[CasoTesteResponse])
+@router.get("/projetos/{projeto_id}/casos", response_model=List[CasoTesteResumo])
 async def listar_casos_projeto(
     projeto_id: int,
-    service: CasoTesteService = Depends(get_caso_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    response: Response,
+    prioridade: Optional[PrioridadeEnum] = None,
+    status: Optional[StatusCasoTesteEnum] = None,
+    responsavel_id: Optional[int] = None,
+    ciclo_id: Optional[int] = None,
+    params: PageParams = Depends(get_page_params),
+    service: CasoTesteService = Depends(get_caso_service_leitura),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    return await service.listar_casos_teste(projeto_id)
+    page = await service.listar_casos_teste(
+        projeto_id, params, prioridade=prioridade, status=status,
+        responsavel_id=responsavel_id, ciclo_id=ciclo_id
+    )
+    return set_pagination_headers(response, page)
 
 @router.post("/projetos/{projeto_id}/casos", response_model=CasoTesteResponse, status_code=status.HTTP_201_CREATED)
 async def criar_caso_teste(
@@ -67,14 +102,12 @@ async def criar_caso_teste(
     dados: CasoTesteCreate,
     service: CasoTesteService = Depends(get_caso_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     if not dados.responsavel_id:
         dados.responsavel_id = current_user.id
         
     novo_caso = await service.criar_caso_teste(projeto_id, dados)
-    
-    sistema_id = await get_sistema_id_from_projeto(db, projeto_id)
 
     log_service = LogService(db)
     await log_service.registrar_acao(
@@ -82,7 +115,7 @@ async def criar_caso_teste(
         acao="CRIAR",
         entidade="CasoTeste",
         entidade_id=novo_caso.id,
-        sistema_id=sistema_id,
+        projeto_id=projeto_id,
         detalhes=f"Criou o caso de teste '{novo_caso.nome}'"
     )
 
@@ -92,7 +125,7 @@ async def criar_caso_teste(
 async def obter_caso_teste(
     caso_id: int,
     service: CasoTesteService = Depends(get_caso_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     return await service.obter_caso_teste(caso_id)
 
@@ -102,20 +135,18 @@ async def atualizar_caso_teste(
     dados: CasoTesteUpdate,
     service: CasoTesteService = Depends(get_caso_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     caso = await service.atualizar_caso_teste(caso_id, dados)
     
     if caso:
-        sistema_id = await get_sistema_id_from_projeto(db, caso.projeto_id)
-        
         log_service = LogService(db)
         await log_service.registrar_acao(
             usuario_id=current_user.id,
             acao="ATUALIZAR",
             entidade="CasoTeste",
             entidade_id=caso.id,
-            sistema_id=sistema_id,
+            projeto_id=caso.projeto_id,
             detalhes=f"Atualizou o caso de teste '{caso.nome}'"
         )
 
@@ -126,17 +157,9 @@ async def remover_caso_teste(
     caso_id: int,
     service: CasoTesteService = Depends(get_caso_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    caso_antigo = await service.obter_caso_teste(caso_id)
-    if not caso_antigo:
-         raise HTTPException(status_code=404, detail="Caso de teste não encontrado")
-
-    nome_caso = caso_antigo.nome
-    projeto_id = caso_antigo.projeto_id
-    sistema_id = await get_sistema_id_from_projeto(db, projeto_id)
-
-    await service.deletar_caso_teste(caso_id)
+    removido = await service.deletar_caso_teste(caso_id)
 
     log_service = LogService(db)
     await log_service.registrar_acao(
@@ -144,26 +167,35 @@ async def remover_caso_teste(
         acao="DELETAR",
         entidade="CasoTeste",
         entidade_id=caso_id,
-        sistema_id=sistema_id,
-        detalhes=f"Removeu o caso de teste '{nome_caso}'"
+        projeto_id=removido.projeto_id,
+        detalhes=f"Removeu o caso de teste '{removido.nome}'"
     )
 
 # --- GESTÃO DE CICLOS DE TESTE ---
 @router.get("/projetos/{projeto_id}/ciclos", response_model=List[CicloTesteResponse])
 async def listar_ciclos_projeto(
     projeto_id: int,
-    service: CicloTesteService = Depends(get_ciclo_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    response: Response,
+    status: Optional[StatusCicloEnum] = None,
+    params: PageParams = Depends(get_page_params),
+    service: CicloTesteService = Depends(get_ciclo_service_leitura),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    return await service.listar_por_projeto(projeto_id)
+    page = await service.listar_por_projeto(projeto_id, params, status=status)
+    return set_pagination_headers(response, page)
 
 @router.get("/ciclos", response_model=List[CicloTesteResponse])
 async def listar_todos_ciclos(
-    db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user) 
+    response: Response,
+    projeto_id: Optional[int] = None,
+    status: Optional[StatusCicloEnum] = None,
+    params: PageParams = Depends(get_page_params),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user) 
 ):
     service = CicloTesteService(db)
-    return await service.get_all_ciclos()
+    page = await service.get_all_ciclos(params, projeto_id=projeto_id, status=status)
+    return set_pagination_headers(response, page)
 
 @router.post("/projetos/{projeto_id}/ciclos", response_model=CicloTesteResponse, status_code=status.HTTP_201_CREATED)
 async def criar_ciclo(
@@ -171,11 +203,9 @@ async def criar_ciclo(
     dados: CicloTesteCreate,
     service: CicloTesteService = Depends(get_ciclo_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     novo_ciclo = await service.criar_ciclo(projeto_id, dados)
-    
-    sistema_id = await get_sistema_id_from_projeto(db, projeto_id)
 
     log_service = LogService(db)
     await log_service.registrar_acao(
@@ -183,7 +213,7 @@ async def criar_ciclo(
         acao="CRIAR",
         entidade="CicloTeste",
         entidade_id=novo_ciclo.id,
-        sistema_id=sistema_id,
+        projeto_id=projeto_id,
         detalhes=f"Criou o ciclo '{novo_ciclo.nome}'"
     )
 
@@ -195,13 +225,11 @@ async def atualizar_ciclo(
     dados: CicloTesteUpdate,
     service: CicloTesteService = Depends(get_ciclo_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     ciclo = await service.atualizar_ciclo(ciclo_id, dados)
     if not ciclo:
         raise HTTPException(status_code=404, detail="Ciclo não encontrado")
-    
-    sistema_id = await get_sistema_id_from_projeto(db, ciclo.projeto_id)
 
     log_service = LogService(db)
     await log_service.registrar_acao(
@@ -209,7 +237,7 @@ async def atualizar_ciclo(
         acao="ATUALIZAR",
         entidade="CicloTeste",
         entidade_id=ciclo.id,
-        sistema_id=sistema_id,
+        projeto_id=ciclo.projeto_id,
         detalhes=f"Atualizou o ciclo '{ciclo.nome}'"
     )
 
@@ -220,18 +248,11 @@ async def remover_ciclo(
     ciclo_id: int,
     service: CicloTesteService = Depends(get_ciclo_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    ciclo = await service.obter_ciclo(ciclo_id)
-    if not ciclo:
-         raise HTTPException(status_code=404, detail="Ciclo não encontrado")
-         
-    sistema_id = await get_sistema_id_from_projeto(db, ciclo.projeto_id)
-    nome_ciclo = ciclo.nome
-
-    sucesso = await service.remover_ciclo(ciclo_id)
-    if not sucesso:
-        raise HTTPException(status_code=404, detail="Erro ao remover ciclo")
+    removido = await service.remover_ciclo(ciclo_id)
+    if not removido:
+        raise HTTPException(status_code=404, detail="Ciclo não encontrado")
 
     log_service = LogService(db)
     await log_service.registrar_acao(
@@ -239,8 +260,8 @@ async def remover_ciclo(
         acao="DELETAR",
         entidade="CicloTeste",
         entidade_id=ciclo_id,
-        sistema_id=sistema_id,
-        detalhes=f"Removeu o ciclo '{nome_ciclo}'"
+        projeto_id=removido.projeto_id,
+        detalhes=f"Removeu o ciclo '{removido.nome}'"
     )
 
 # --- EXECUÇÃO E PLANEJAMENTO ---
@@ -249,7 +270,7 @@ async def criar_execucao(
     dados: ExecucaoTesteCreate,
     service: ExecucaoTesteService = Depends(get_execucao_service),
     db: AsyncSession = Depends(get_db),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     nova_exec = await service.alocar_teste(dados.ciclo_teste_id, dados.caso_teste_id, dados.responsavel_id)
     log_service = LogService(db)
@@ -263,34 +284,73 @@ async def criar_execucao(
     
     return nova_exec
 
+@router.post("/execucoes/lote", response_model=AlocacaoLoteResponse, status_code=status.HTTP_201_CREATED)
+async def alocar_execucoes_em_lote(
+    dados: AlocacaoLoteCreate,
+    service: ExecucaoTesteService = Depends(get_execucao_service),
+    db: AsyncSession = Depends(get_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    resumo = await service.alocar_em_lote(dados)
+    log_service = LogService(db)
+    await log_service.registrar_acao(
+        usuario_id=current_user.id,
+        acao="CRIAR",
+        entidade="ExecucaoTeste",
+        detalhes=f"Alocou {resumo.execucoes_criadas} testes em lote no ciclo {dados.ciclo_teste_id} (regra: {dados.regra.value})"
+    )
+
+    return resumo
+
 @router.get("/minhas-tarefas", response_model=List[ExecucaoTesteResponse]) 
 async def listar_meus_testes(
+    response: Response,
     status: Optional[StatusExecucaoEnum] = None,
-    skip: int = 0,
-    limit: int = 20,
-    current_user: Usuario = Depends(get_current_user),
-    service: ExecucaoTesteService = Depends(get_execucao_service)
+    ciclo_id: Optional[int] = None,
+    params: PageParams = Depends(get_page_params),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
+    service: ExecucaoTesteService = Depends(get_execucao_service_leitura)
 ):
-    return await service.listar_tarefas_usuario(current_user.id, status, skip, limit)
+    page = await service.listar_tarefas_usuario(current_user.id, params, status, ciclo_id)
+    return set_pagination_headers(response, page)
 
 @router.get("/execucoes/{execucao_id}", response_model=ExecucaoTesteResponse)
 async def obter_execucao(
     execucao_id: int,
     service: ExecucaoTesteService = Depends(get_execucao_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     execucao = await service.obter_execucao(execucao_id)
     if not execucao:
         raise HTTPException(status_code=404, detail="Execução de teste não encontrada")
     return execucao
     
+# Precisa vir antes de /execucoes/passos/{passo_id}
+@router.put("/execucoes/passos/lote", response_model=ExecucaoPassoLoteResponse)
+async def registrar_passos_em_lote(
+    dados: ExecucaoPassoLoteUpdate,
+    service: ExecucaoTesteService = Depends(get_execucao_service),
+    db: AsyncSession = Depends(get_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    resultado = await service.registrar_resultados_em_lote(dados)
+    log_service = LogService(db)
+    await log_service.registrar_acao(
+        usuario_id=current_user.id,
+        acao="ATUALIZAR",
+        entidade="PassoExecucao",
+        detalhes=f"Registrou {len(resultado.passos)} passos em lote ({len(resultado.execucoes_alteradas)} execuções mudaram de status)"
+    )
+
+    return resultado
+
 @router.put("/execucoes/passos/{passo_id}", response_model=ExecucaoPassoResponse)
 async def registrar_passo(
     passo_id: int,
     dados: ExecucaoPassoUpdate,
     service: ExecucaoTesteService = Depends(get_execucao_service),
     db: AsyncSession = Depends(get_db), 
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     return await service.registrar_resultado_passo(passo_id, dados)
 
@@ -300,7 +360,7 @@ async def finalizar_execucao_manual(
     status: StatusExecucaoEnum,
     service: ExecucaoTesteService = Depends(get_execucao_service),
     db: AsyncSession = Depends(get_db), 
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     execucao = await service.finalizar_execucao(execucao_id, status_final=status)
     
@@ -324,7 +384,7 @@ async def upload_evidencia_passo(
     file: UploadFile = File(...),
     service: ExecucaoTesteService = Depends(get_execucao_service),
     db: AsyncSession = Depends(get_db), 
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     resultado = await service.upload_evidencia(passo_id, file)
 
@@ -339,15 +399,129 @@ async def upload_evidencia_passo(
 
     return resultado
 
-@router.get("/evidencias/download/{filename}")
-async def download_evidencia(filename: str):
-    file_path = f"evidencias/{filename}"
+# --- UPLOAD RETOMÁVEL (vídeos e arquivos grandes) ---
+# 1. POST   /passos/{passo_id}/evidencia/uploads   -> cria a sessão (tamanho total)
+# 2. PUT    /evidencias/uploads/{id}?offset=N      -> corpo cru com os bytes a partir de N
+# 3. GET    /evidencias/uploads/{id}               -> quantos bytes o servidor já tem (após queda)
+# 4. POST   /evidencias/uploads/{id}/concluir      -> move para o armazenamento e devolve a URL
 
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
-    
-    return FileResponse(
-        path=file_path, 
-        filename=filename, 
-        media_type='application/octet-stream' 
-    )
\ No newline at end of file
+@router.post("/passos/{passo_id}/evidencia/uploads", response_model=UploadEvidenciaResponse, status_code=status.HTTP_201_CREATED)
+async def iniciar_upload_evidencia(
+    passo_id: int,
+    dados: UploadEvidenciaCreate,
+    response: Response,
+    service: ExecucaoTesteService = Depends(get_execucao_service),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    sessao = await service.iniciar_upload_evidencia(passo_id, current_user.id, dados)
+    response.headers["Upload-Offset"] = str(sessao.recebido)
+    return sessao
+
+@router.get("/evidencias/uploads/{upload_id}", response_model=UploadEvidenciaResponse)
+async def progresso_upload_evidencia(
+    upload_id: str,
+    response: Response,
+    service: EvidenciaService = Depends(get_evidencia_service),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    sessao = await service.progresso(upload_id, current_user.id)
+    response.headers["Upload-Offset"] = str(sessao.recebido)
+    return sessao
+
+@router.put("/evidencias/uploads/{upload_id}", response_model=UploadEvidenciaResponse)
+async def enviar_trecho_evidencia(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    offset: int = Query(..., ge=0),
+    service: EvidenciaService = Depends(get_evidencia_service),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    sessao = await service.receber_bloco(upload_id, current_user.id, offset, request.stream())
+    response.headers["Upload-Offset"] = str(sessao.recebido)
+    return sessao
+
+@router.post("/evidencias/uploads/{upload_id}/concluir")
+async def concluir_upload_evidencia(
+    upload_id: str,
+    service: EvidenciaService = Depends(get_evidencia_service),
+    db: AsyncSession = Depends(get_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    resultado = await service.concluir_upload(upload_id, current_user.id)
+
+    log_service = LogService(db)
+    await log_service.registrar_acao(
+        usuario_id=current_user.id,
+        acao="ATUALIZAR",
+        entidade="PassoExecucao",
+        entidade_id=resultado["passo_id"],
+        detalhes=f"Upload de evidência para o passo #{resultado['passo_id']}"
+    )
+
+    return resultado
+
+@router.delete("/evidencias/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancelar_upload_evidencia(
+    upload_id: str,
+    service: EvidenciaService = Depends(get_evidencia_service),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    await service.cancelar_upload(upload_id, current_user.id)
+
+# --- ENVIO DIRETO AO ARMAZENAMENTO (bytes não passam pela API) ---
+# 1. POST /passos/{passo_id}/evidencia/direto   -> hash e tamanho; devolve URL assinada e token
+# 2. PUT  <upload_url> com os headers indicados  -> bucket S3 ou /evidencias/direto (disco local)
+# 3. POST /evidencias/direto/concluir {token}    -> confere o blob e devolve a URL
+
+@router.post("/passos/{passo_id}/evidencia/direto")
+async def preparar_upload_direto(
+    passo_id: int,
+    dados: UploadDiretoCreate,
+    service: ExecucaoTesteService = Depends(get_execucao_service),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    return await service.preparar_upload_direto(passo_id, current_user.id, dados)
+
+@router.post("/evidencias/direto/concluir")
+async def concluir_upload_direto(
+    dados: UploadDiretoConcluir,
+    service: EvidenciaService = Depends(get_evidencia_service),
+    db: AsyncSession = Depends(get_db),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
+):
+    resultado = await service.concluir_upload_direto(dados.token, current_user.id)
+
+    log_service = LogService(db)
+    await log_service.registrar_acao(
+        usuario_id=current_user.id,
+        acao="ATUALIZAR",
+        entidade="PassoExecucao",
+        entidade_id=resultado["passo_id"],
+        detalhes=f"Upload de evidência para o passo #{resultado['passo_id']}"
+    )
+
+    return resultado
+
+# --- PACOTE ZIP COM TODAS AS EVIDÊNCIAS (auditoria) ---
+
+async def _pacote_evidencias(escopo: str, id: int) -> StreamingResponse:
+    service = PacoteEvidenciasService(AsyncSessionLeitura)
+    await service.verificar(escopo, id)
+    return StreamingResponse(
+        service.gerar(escopo, id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{service.nome_arquivo(escopo, id)}"'},
+    )
+
+@router.get("/ciclos/{ciclo_id}/evidencias.zip")
+async def baixar_evidencias_ciclo(ciclo_id: int, current_user: UsuarioAutenticado = Depends(get_current_active_user)):
+    return await _pacote_evidencias("ciclo", ciclo_id)
+
+@router.get("/execucoes/{execucao_id}/evidencias.zip")
+async def baixar_evidencias_execucao(execucao_id: int, current_user: UsuarioAutenticado = Depends(get_current_active_user)):
+    return await _pacote_evidencias("execucao", execucao_id)
+
+@router.api_route("/evidencias/download/{filename:path}", methods=["GET", "HEAD"])
+async def download_evidencia(filename: str, request: Request):
+    return await responder_evidencia(request, filename, nome_download=True)
@@ -1,13 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Sequence, Optional
 
-from app.core.database import AsyncSessionLocal
-from app.schemas.usuario import UsuarioCreate, UsuarioResponse, UsuarioUpdate
+from app.core.database import AsyncSessionLocal, get_read_db
+from app.schemas.usuario import UsuarioAutenticado, UsuarioCreate, UsuarioResponse, UsuarioUpdate
 from app.services.usuario_service import UsuarioService
 from app.services.log_service import LogService # <--- Importar LogService
-from app.api.deps import get_current_active_user # <--- Importar dependência de utilizador
-from app.models.usuario import Usuario
+from app.api.deps import get_current_active_user, get_page_params, set_pagination_headers # <--- Importar dependência de utilizador
+from app.core.pagination import PageParams
 
 router = APIRouter()
 
@@ -18,12 +18,15 @@ async def get_db_session() -> AsyncSession:
 def get_usuario_service(db: AsyncSession = Depends(get_db_session)) -> UsuarioService:
     return UsuarioService(db)
 
+def get_usuario_service_leitura(db: AsyncSession = Depends(get_read_db)) -> UsuarioService:
+    return UsuarioService(db)
+
 @router.post("/", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED, summary="Criar novo usuário")
 async def create_usuario(
     usuario: UsuarioCreate,
     service: UsuarioService = Depends(get_usuario_service),
     db: AsyncSession = Depends(get_db_session), # <--- Injeção DB
-    current_user: Usuario = Depends(get_current_active_user) # <--- Injeção Usuário
+    current_user: UsuarioAutenticado = Depends(get_current_active_user) # <--- Injeção Usuário
 ):
     novo_usuario = await service.create_usuario(usuario)
     
@@ -43,17 +46,21 @@ async def create_usuario(
 
 @router.get("/", response_model=Sequence[UsuarioResponse], summary="Listar todos usuários")
 async def get_usuarios(
+    response: Response,
     ativo: Optional[bool] = None,
-    service: UsuarioService = Depends(get_usuario_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    nivel_acesso_id: Optional[int] = None,
+    params: PageParams = Depends(get_page_params),
+    service: UsuarioService = Depends(get_usuario_service_leitura),
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
-    return await service.get_all_usuarios(ativo)
+    page = await service.get_all_usuarios(params, ativo, nivel_acesso_id)
+    return set_pagination_headers(response, page)
 
 @router.get("/{usuario_id}", response_model=UsuarioResponse, summary="Obter usuário por ID")
 async def get_usuario(
     usuario_id: int,
     service: UsuarioService = Depends(get_usuario_service),
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     db_usuario = await service.get_usuario_by_id(usuario_id)
     if db_usuario is None:
@@ -66,7 +73,7 @@ async def update_usuario(
     usuario: UsuarioUpdate,
     service: UsuarioService = Depends(get_usuario_service),
     db: AsyncSession = Depends(get_db_session), # <--- Injeção DB
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     updated_usuario = await service.update_usuario(usuario_id, usuario)
     if not updated_usuario:
@@ -90,7 +97,7 @@ async def delete_usuario(
     usuario_id: int,
     service: UsuarioService = Depends(get_usuario_service),
     db: AsyncSession = Depends(get_db_session), # <--- Injeção DB
-    current_user: Usuario = Depends(get_current_active_user)
+    current_user: UsuarioAutenticado = Depends(get_current_active_user)
 ):
     # Buscar dados antes de apagar para o log
     usuario_alvo = await service.get_usuario_by_id(usuario_id)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import re
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+class ClasseCarga:
+    """
+    Limite de requisições simultâneas de um tipo de trabalho. Quem não
+    consegue vaga em `espera_maxima` segundos recebe 503 na hora, em vez de
+    ficar na fila até o cliente desistir. `statement_timeout_ms` (0 = o da
+    conexão) vale para as transações abertas durante a requisição.
+    """
+
+    def __init__(self, nome: str, limite: int, espera_maxima: float, statement_timeout_ms: int, retry_after: int):
+        self.nome = nome
+        self.limite = limite
+        self.espera_maxima = espera_maxima
+        self.statement_timeout_ms = statement_timeout_ms
+        self.retry_after = retry_after
+        self._vagas = asyncio.Semaphore(limite)
+        self.em_uso = 0
+        self.recusadas = 0
+
+    async def entrar(self) -> bool:
+        try:
+            await asyncio.wait_for(self._vagas.acquire(), timeout=self.espera_maxima)
+        except asyncio.TimeoutError:
+            self.recusadas += 1
+            return False
+        self.em_uso += 1
+        return True
+
+    def sair(self) -> None:
+        self.em_uso -= 1
+        self._vagas.release()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {"limite": self.limite, "em_uso": self.em_uso, "recusadas": self.recusadas}
+
+
+CARGAS: Dict[str, ClasseCarga] = {
+    # gravações dos runners (passos, defeitos, cadastros): a maior fatia, nunca disputada com relatórios
+    "escrita": ClasseCarga(
+        "escrita", settings.CARGA_ESCRITA_LIMITE, settings.CARGA_ESCRITA_ESPERA_SEGUNDOS,
+        settings.CARGA_ESCRITA_TIMEOUT_MS, retry_after=1,
+    ),
+    "leitura": ClasseCarga(
+        "leitura", settings.CARGA_LEITURA_LIMITE, settings.CARGA_LEITURA_ESPERA_SEGUNDOS,
+        settings.CARGA_LEITURA_TIMEOUT_MS, retry_after=1,
+    ),
+    # dashboards e performance: poucas ao mesmo tempo, com timeout maior
+    "analitica": ClasseCarga(
+        "analitica", settings.CARGA_ANALITICA_LIMITE, settings.CARGA_ANALITICA_ESPERA_SEGUNDOS,
+        settings.CARGA_ANALITICA_TIMEOUT_MS, retry_after=5,
+    ),
+    # pacotes ZIP de evidências: seguram a vaga durante todo o download, então não disputam com os dashboards
+    "exportacao": ClasseCarga(
+        "exportacao", settings.CARGA_EXPORTACAO_LIMITE, settings.CARGA_EXPORTACAO_ESPERA_SEGUNDOS,
+        settings.CARGA_EXPORTACAO_TIMEOUT_MS, retry_after=30,
+    ),
+}
+
+_API = re.escape(settings.API_V1_STR)
+
+# (padrão do caminho, classe); a primeira que casar vale. None = fora do controle de admissão
+ROTAS: List[Tuple[re.Pattern, Optional[str]]] = [
+    # transferência de arquivos: dura o tempo da rede e quase não usa o banco
+    (re.compile(r"^/evidencias/"), None),
+    (re.compile(rf"^{_API}/testes/evidencias/(download|uploads)/"), None),
+    (re.compile(rf"^{_API}/testes/passos/\d+/evidencia$"), None),
+    (re.compile(r"^/health"), None),
+    (re.compile(rf"^{_API}/(dashboard|dashboard-runners|metricas/gerar)(/|$)"), "analitica"),
+    (re.compile(r"/evidencias\.zip$"), "exportacao"),
+]
+
+carga_da_requisicao: ContextVar[Optional[ClasseCarga]] = ContextVar("carga_da_requisicao", default=None)
+
+
+def classificar(metodo: str, caminho: str) -> Optional[ClasseCarga]:
+    for padrao, nome in ROTAS:
+        if padrao.search(caminho):
+            return CARGAS[nome] if nome else None
+    return CARGAS["leitura" if metodo in ("GET", "HEAD") else "escrita"]
+
+
+def estatisticas() -> Dict[str, Any]:
+    return {nome: carga.estatisticas() for nome, carga in CARGAS.items()}
+
+
+class AdmissaoMiddleware:
+    """
+    Middleware ASGI: reserva a vaga da classe da requisição antes de qualquer
+    trabalho (autenticação incluída) e só devolve quando a resposta termina
+    de ser enviada, o que cobre exportações em streaming.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        carga = classificar(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if carga is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await carga.entrar():
+            corpo = json.dumps({"detail": "Servidor ocupado, tente novamente em instantes."}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(corpo)).encode()),
+                    (b"retry-after", str(carga.retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": corpo})
+            return
+
+        token = carga_da_requisicao.set(carga)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            carga_da_requisicao.reset(token)
+            carga.sair()
+
+
+@event.listens_for(Session, "after_begin")
+def _statement_timeout_da_carga(session, transaction, connection):
+    # SET LOCAL vale só para esta transação: funciona também atrás do PgBouncer
+    carga = carga_da_requisicao.get()
+    if carga is not None and carga.statement_timeout_ms and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(carga.statement_timeout_ms)}")
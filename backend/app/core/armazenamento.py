@@ -0,0 +1,464 @@
+import asyncio
+import base64
+import hashlib
+import os
+import shutil
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import RedirectResponse
+
+from app.core.arquivos import CACHE_IMUTAVEL, caminho_seguro, servir_arquivo
+from app.core.assinatura import assinar
+from app.core.config import settings
+
+
+class ArmazenamentoEvidencias(ABC):
+    """
+    Onde ficam os blobs de evidência. `nome` é sempre o caminho relativo do
+    blob (ab/<sha256>.ext). Os uploads chegam primeiro a um arquivo
+    temporário local e `gravar` leva esse arquivo para o lugar definitivo.
+    """
+
+    # backends locais servem o arquivo pela própria API; os outros redirecionam
+    local = False
+
+    def caminho_local(self, nome: str) -> Optional[str]:
+        return None
+
+    @abstractmethod
+    async def existe(self, nome: str) -> bool:
+        ...
+
+    async def conferir(self, nome: str, sha256: str, tamanho: int) -> Optional[bool]:
+        """Depois de um envio direto: None se o blob não chegou, False se não confere."""
+        return True if await self.existe(nome) else None
+
+    @abstractmethod
+    async def gravar(self, origem: str, nome: str, mime: str) -> None:
+        """Move `origem` (arquivo temporário, consumido) para `nome`."""
+
+    @abstractmethod
+    async def remover(self, nome: str) -> None:
+        ...
+
+    @abstractmethod
+    def ler(self, nome: str, tamanho_bloco: int) -> AsyncIterator[bytes]:
+        """Conteúdo do blob em blocos; FileNotFoundError se não existir."""
+
+    @abstractmethod
+    def url_download(self, nome: str, validade: int, nome_download: Optional[str] = None) -> str:
+        ...
+
+    @abstractmethod
+    def url_upload(self, nome: str, mime: str, tamanho: int, sha256: str, validade: int) -> Tuple[str, Dict[str, str]]:
+        """URL e headers para o cliente enviar o blob direto, sem passar pelo processo da API."""
+
+    # --- uploads retomáveis ---
+    #
+    # Os trechos já confirmados ficam no próprio backend, não no disco do nó
+    # que os recebeu: qualquer worker atrás do balanceador retoma ou conclui a
+    # sessão. `referencia` e `etiquetas` são o que o backend pede para guardar
+    # na sessão (no S3, o id do multipart e o ETag de cada parte).
+
+    # trechos que não são o último precisam ter ao menos este tamanho
+    tamanho_minimo_trecho = 1
+
+    @abstractmethod
+    async def iniciar_parcial(self, sessao_id: str, mime: Optional[str]) -> Optional[str]:
+        """Prepara o arquivo parcial da sessão; devolve a `referencia`, se o backend usar uma."""
+
+    @abstractmethod
+    async def gravar_trecho(
+        self, sessao_id: str, referencia: Optional[str], numero: int, offset: int, origem: str
+    ) -> Optional[str]:
+        """
+        Grava `origem` (arquivo temporário, consumido) como o trecho `numero`
+        (1, 2, ...) a partir de `offset`; devolve a etiqueta do trecho, se houver.
+        FileNotFoundError se o parcial não existir mais.
+        """
+
+    @abstractmethod
+    async def fechar_parcial(
+        self, sessao_id: str, referencia: Optional[str], etiquetas: List[str], tamanho: int
+    ) -> Tuple[str, bytes]:
+        """
+        Junta os trechos e devolve (sha256, primeiros bytes). Pode ser chamado
+        de novo se a conclusão falhar depois. FileNotFoundError se expirou.
+        """
+
+    @abstractmethod
+    async def promover_parcial(self, sessao_id: str, nome: str, mime: str) -> None:
+        """Move o parcial fechado para o blob `nome`."""
+
+    @abstractmethod
+    async def descartar_parcial(self, sessao_id: str, referencia: Optional[str]) -> None:
+        ...
+
+    @abstractmethod
+    async def limpar_parciais(self, ativos: Set[str], corte: datetime) -> None:
+        """Remove parciais de sessões fora de `ativos` parados desde antes de `corte`."""
+
+
+class ArmazenamentoLocal(ArmazenamentoEvidencias):
+    """
+    Disco local (ou volume compartilhado entre os nós). O envio direto vai
+    para PUT /evidencias/direto com um token HMAC que carrega nome, tamanho e
+    hash esperados: o receptor valida sem consultar o banco.
+    """
+
+    local = True
+
+    def __init__(self, diretorio: str, url_base: str):
+        self.diretorio = diretorio
+        self.url_base = url_base.rstrip("/")
+
+    def caminho_local(self, nome: str) -> str:
+        return os.path.join(self.diretorio, nome)
+
+    async def existe(self, nome: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self.caminho_local(nome))
+
+    async def gravar(self, origem: str, nome: str, mime: str) -> None:
+        destino = self.caminho_local(nome)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(destino), exist_ok=True)
+        # só aparece com o nome final depois de completo
+        await asyncio.to_thread(os.replace, origem, destino)
+
+    async def remover(self, nome: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self.caminho_local(nome))
+        except FileNotFoundError:
+            pass
+
+    async def ler(self, nome: str, tamanho_bloco: int) -> AsyncIterator[bytes]:
+        arquivo = await asyncio.to_thread(open, self.caminho_local(nome), "rb")
+        try:
+            while bloco := await asyncio.to_thread(arquivo.read, tamanho_bloco):
+                yield bloco
+        finally:
+            await asyncio.to_thread(arquivo.close)
+
+    def url_download(self, nome: str, validade: int, nome_download: Optional[str] = None) -> str:
+        return f"{self.url_base}/evidencias/{nome}"
+
+    def url_upload(self, nome: str, mime: str, tamanho: int, sha256: str, validade: int) -> Tuple[str, Dict[str, str]]:
+        token = assinar({"n": nome, "t": tamanho, "s": sha256, "m": mime}, validade)
+        return f"{self.url_base}/evidencias/direto?token={token}", {"Content-Type": mime}
+
+    # Com vários nós, o diretório precisa ser um volume compartilhado: os
+    # trechos de um upload podem chegar a workers diferentes.
+
+    def _caminho_parcial(self, sessao_id: str) -> str:
+        return os.path.join(self.diretorio, ".uploads", f"{sessao_id}.part")
+
+    async def iniciar_parcial(self, sessao_id: str, mime: Optional[str]) -> Optional[str]:
+        caminho = self._caminho_parcial(sessao_id)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(caminho), exist_ok=True)
+        await asyncio.to_thread(lambda: open(caminho, "wb").close())
+        return None
+
+    async def gravar_trecho(
+        self, sessao_id: str, referencia: Optional[str], numero: int, offset: int, origem: str
+    ) -> Optional[str]:
+        await asyncio.to_thread(_copiar_trecho, origem, self._caminho_parcial(sessao_id), offset)
+        return None
+
+    async def fechar_parcial(
+        self, sessao_id: str, referencia: Optional[str], etiquetas: List[str], tamanho: int
+    ) -> Tuple[str, bytes]:
+        return await asyncio.to_thread(_resumir_parcial, self._caminho_parcial(sessao_id), tamanho)
+
+    async def promover_parcial(self, sessao_id: str, nome: str, mime: str) -> None:
+        await self.gravar(self._caminho_parcial(sessao_id), nome, mime)
+
+    async def descartar_parcial(self, sessao_id: str, referencia: Optional[str]) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self._caminho_parcial(sessao_id))
+        except FileNotFoundError:
+            pass
+
+    async def limpar_parciais(self, ativos: Set[str], corte: datetime) -> None:
+        pasta = os.path.join(self.diretorio, ".uploads")
+        if not await asyncio.to_thread(os.path.isdir, pasta):
+            return
+        for nome in await asyncio.to_thread(os.listdir, pasta):
+            if nome.removesuffix(".part") in ativos:
+                continue
+            caminho = os.path.join(pasta, nome)
+            try:
+                # sem sessão e parado: expirou ou sobrou de uma conclusão que falhou
+                if await asyncio.to_thread(os.path.getmtime, caminho) < corte.timestamp():
+                    await asyncio.to_thread(os.remove, caminho)
+            except FileNotFoundError:
+                pass
+
+
+def _copiar_trecho(origem: str, destino: str, offset: int) -> None:
+    with open(origem, "rb") as entrada, open(destino, "r+b") as saida:
+        saida.seek(offset)
+        shutil.copyfileobj(entrada, saida, 1024 * 1024)
+        # o offset confirmado no banco precisa sobreviver a uma queda do servidor
+        saida.flush()
+        os.fsync(saida.fileno())
+    os.remove(origem)
+
+
+def _resumir_parcial(caminho: str, tamanho: int) -> Tuple[str, bytes]:
+    """Descarta bytes além do tamanho declarado e devolve (sha256, primeiros bytes)."""
+    resumo = hashlib.sha256()
+    with open(caminho, "r+b") as arquivo:
+        arquivo.truncate(tamanho)
+        cabecalho = arquivo.read(16)
+        resumo.update(cabecalho)
+        while bloco := arquivo.read(1024 * 1024):
+            resumo.update(bloco)
+    return resumo.hexdigest(), cabecalho
+
+
+class ArmazenamentoS3(ArmazenamentoEvidencias):
+    """
+    Bucket S3 ou compatível (MinIO, Ceph, R2). Downloads e envios diretos usam
+    URLs pré-assinadas pelo próprio S3; no envio o checksum SHA-256 vai
+    assinado, então o bucket recusa conteúdo diferente do hash declarado.
+    Requer o pacote `boto3` (opcional).
+    """
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, regiao: Optional[str] = None,
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None, prefixo: str = ""):
+        try:
+            import boto3
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError as e:
+            raise RuntimeError("EVIDENCIA_ARMAZENAMENTO=s3 requer o pacote 'boto3' instalado.") from e
+        self._erro_cliente = ClientError
+        self.bucket = bucket
+        self.prefixo = prefixo.strip("/")
+        # path-style: MinIO e afins não têm DNS por bucket
+        self.s3 = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=regiao,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+
+    def _chave(self, nome: str) -> str:
+        return f"{self.prefixo}/{nome}" if self.prefixo else nome
+
+    async def existe(self, nome: str) -> bool:
+        try:
+            await asyncio.to_thread(self.s3.head_object, Bucket=self.bucket, Key=self._chave(nome))
+            return True
+        except self._erro_cliente as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    async def conferir(self, nome: str, sha256: str, tamanho: int) -> Optional[bool]:
+        try:
+            info = await asyncio.to_thread(
+                self.s3.head_object, Bucket=self.bucket, Key=self._chave(nome), ChecksumMode="ENABLED"
+            )
+        except self._erro_cliente as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        # o checksum assinado já é validado pelo S3 no PUT; aqui é a segunda barreira
+        checksum = info.get("ChecksumSHA256")
+        if checksum and checksum != base64.b64encode(bytes.fromhex(sha256)).decode():
+            return False
+        return info.get("ContentLength") == tamanho
+
+    async def gravar(self, origem: str, nome: str, mime: str) -> None:
+        # upload_file divide arquivos grandes em multipart sozinho
+        await asyncio.to_thread(
+            self.s3.upload_file, origem, self.bucket, self._chave(nome),
+            ExtraArgs={"ContentType": mime, "CacheControl": CACHE_IMUTAVEL},
+        )
+        await asyncio.to_thread(os.remove, origem)
+
+    async def remover(self, nome: str) -> None:
+        await asyncio.to_thread(self.s3.delete_object, Bucket=self.bucket, Key=self._chave(nome))
+
+    async def ler(self, nome: str, tamanho_bloco: int) -> AsyncIterator[bytes]:
+        try:
+            objeto = await asyncio.to_thread(self.s3.get_object, Bucket=self.bucket, Key=self._chave(nome))
+        except self._erro_cliente as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(nome) from e
+            raise
+        corpo = objeto["Body"]
+        try:
+            while bloco := await asyncio.to_thread(corpo.read, tamanho_bloco):
+                yield bloco
+        finally:
+            corpo.close()
+
+    def url_download(self, nome: str, validade: int, nome_download: Optional[str] = None) -> str:
+        # assinatura calculada localmente, sem chamada de rede
+        params = {"Bucket": self.bucket, "Key": self._chave(nome)}
+        if nome_download:
+            params["ResponseContentDisposition"] = f"attachment; filename=\"{quote(nome_download)}\""
+        return self.s3.generate_presigned_url("get_object", Params=params, ExpiresIn=validade)
+
+    def url_upload(self, nome: str, mime: str, tamanho: int, sha256: str, validade: int) -> Tuple[str, Dict[str, str]]:
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.s3.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._chave(nome),
+                "ContentType": mime,
+                "ContentLength": tamanho,
+                "CacheControl": CACHE_IMUTAVEL,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=validade,
+        )
+        headers = {"Content-Type": mime, "Cache-Control": CACHE_IMUTAVEL, "x-amz-checksum-sha256": checksum}
+        return url, headers
+
+    # Uploads retomáveis viram multipart uploads no bucket: cada trecho é uma
+    # parte e o ETag dela fica na sessão. Ao fechar, as partes são juntadas em
+    # .uploads/<id> e, depois de conferido o hash, copiadas para o blob.
+
+    # mínimo do S3 para as partes que não são a última
+    tamanho_minimo_trecho = 5 * 1024 * 1024
+
+    def _chave_parcial(self, sessao_id: str) -> str:
+        return self._chave(f".uploads/{sessao_id}")
+
+    def _codigo_erro(self, erro) -> Optional[str]:
+        return erro.response.get("Error", {}).get("Code")
+
+    async def iniciar_parcial(self, sessao_id: str, mime: Optional[str]) -> Optional[str]:
+        resposta = await asyncio.to_thread(
+            self.s3.create_multipart_upload, Bucket=self.bucket, Key=self._chave_parcial(sessao_id),
+            ContentType=mime or "application/octet-stream",
+        )
+        return resposta["UploadId"]
+
+    async def gravar_trecho(
+        self, sessao_id: str, referencia: Optional[str], numero: int, offset: int, origem: str
+    ) -> Optional[str]:
+        def enviar():
+            with open(origem, "rb") as arquivo:
+                return self.s3.upload_part(
+                    Bucket=self.bucket, Key=self._chave_parcial(sessao_id),
+                    UploadId=referencia, PartNumber=numero, Body=arquivo,
+                )
+        try:
+            resposta = await asyncio.to_thread(enviar)
+        except self._erro_cliente as e:
+            if self._codigo_erro(e) == "NoSuchUpload":
+                raise FileNotFoundError(sessao_id) from e
+            raise
+        finally:
+            await asyncio.to_thread(os.remove, origem)
+        return resposta["ETag"]
+
+    async def fechar_parcial(
+        self, sessao_id: str, referencia: Optional[str], etiquetas: List[str], tamanho: int
+    ) -> Tuple[str, bytes]:
+        chave = self._chave_parcial(sessao_id)
+        try:
+            await asyncio.to_thread(
+                self.s3.complete_multipart_upload, Bucket=self.bucket, Key=chave, UploadId=referencia,
+                MultipartUpload={"Parts": [{"PartNumber": i, "ETag": etag} for i, etag in enumerate(etiquetas, 1)]},
+            )
+        except self._erro_cliente as e:
+            # já fechado numa conclusão anterior que falhou depois deste ponto
+            if self._codigo_erro(e) != "NoSuchUpload":
+                raise
+        # o hash do conteúdo só sai lendo o objeto de volta
+        resumo = hashlib.sha256()
+        cabecalho = b""
+        async for bloco in self.ler(f".uploads/{sessao_id}", 1024 * 1024):
+            if len(cabecalho) < 16:
+                cabecalho += bloco[:16 - len(cabecalho)]
+            resumo.update(bloco)
+        return resumo.hexdigest(), cabecalho
+
+    async def promover_parcial(self, sessao_id: str, nome: str, mime: str) -> None:
+        await asyncio.to_thread(
+            self.s3.copy_object, Bucket=self.bucket, Key=self._chave(nome),
+            CopySource={"Bucket": self.bucket, "Key": self._chave_parcial(sessao_id)},
+            ContentType=mime, CacheControl=CACHE_IMUTAVEL, MetadataDirective="REPLACE",
+        )
+        await self.remover(f".uploads/{sessao_id}")
+
+    async def descartar_parcial(self, sessao_id: str, referencia: Optional[str]) -> None:
+        if referencia:
+            try:
+                await asyncio.to_thread(
+                    self.s3.abort_multipart_upload, Bucket=self.bucket,
+                    Key=self._chave_parcial(sessao_id), UploadId=referencia,
+                )
+            except self._erro_cliente as e:
+                if self._codigo_erro(e) != "NoSuchUpload":
+                    raise
+        await self.remover(f".uploads/{sessao_id}")
+
+    async def limpar_parciais(self, ativos: Set[str], corte: datetime) -> None:
+        prefixo = self._chave(".uploads/")
+
+        def sessao(chave: str) -> str:
+            return chave[len(prefixo):]
+
+        paginas = self.s3.get_paginator("list_multipart_uploads").paginate(Bucket=self.bucket, Prefix=prefixo)
+        for pagina in await asyncio.to_thread(list, paginas):
+            for upload in pagina.get("Uploads", []):
+                if sessao(upload["Key"]) not in ativos and upload["Initiated"] < corte:
+                    await self.descartar_parcial(sessao(upload["Key"]), upload["UploadId"])
+
+        # fechados mas não promovidos: a conclusão falhou no meio
+        paginas = self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefixo)
+        for pagina in await asyncio.to_thread(list, paginas):
+            for objeto in pagina.get("Contents", []):
+                if sessao(objeto["Key"]) not in ativos and objeto["LastModified"] < corte:
+                    await self.remover(f".uploads/{sessao(objeto['Key'])}")
+
+
+def criar_armazenamento() -> ArmazenamentoEvidencias:
+    if settings.EVIDENCIA_ARMAZENAMENTO == "s3":
+        if not settings.EVIDENCIA_S3_BUCKET:
+            raise RuntimeError("EVIDENCIA_ARMAZENAMENTO=s3 requer EVIDENCIA_S3_BUCKET.")
+        return ArmazenamentoS3(
+            settings.EVIDENCIA_S3_BUCKET,
+            endpoint_url=settings.EVIDENCIA_S3_ENDPOINT_URL,
+            regiao=settings.EVIDENCIA_S3_REGIAO,
+            access_key=settings.EVIDENCIA_S3_ACCESS_KEY,
+            secret_key=settings.EVIDENCIA_S3_SECRET_KEY,
+            prefixo=settings.EVIDENCIA_S3_PREFIXO,
+        )
+    return ArmazenamentoLocal(settings.EVIDENCIAS_DIR, settings.EVIDENCIA_URL_BASE)
+
+
+armazenamento = criar_armazenamento()
+
+
+async def responder_evidencia(request: Request, caminho: str, nome_download: bool = False) -> Response:
+    """
+    Download de um blob. No disco local a API serve o arquivo (Range, ETag);
+    nos outros backends redireciona para uma URL assinada de curta duração.
+    Arquivos antigos que ainda estão no disco continuam servidos daqui.
+    """
+    arquivo = caminho_seguro(settings.EVIDENCIAS_DIR, caminho)
+    baixar_como = os.path.basename(arquivo) if nome_download else None
+    if armazenamento.local or await asyncio.to_thread(os.path.isfile, arquivo):
+        return await servir_arquivo(request, arquivo, nome_download=baixar_como)
+
+    nome = os.path.relpath(arquivo, os.path.realpath(settings.EVIDENCIAS_DIR)).replace(os.sep, "/")
+    validade = settings.EVIDENCIA_URL_VALIDADE_SEGUNDOS
+    return RedirectResponse(
+        armazenamento.url_download(nome, validade, baixar_como),
+        status_code=307,
+        # o link expira: o redirecionamento não pode ficar em cache mais que isso
+        headers={"Cache-Control": f"private, max-age={validade // 2}"},
+    )
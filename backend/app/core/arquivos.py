@@ -0,0 +1,154 @@
+import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request, Response
+from starlette.types import Receive, Scope, Send
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+TAMANHO_BLOCO = 256 * 1024
+
+_HASH = re.compile(r"([0-9a-f]{64})")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# tipos que o navegador executaria na origem da API; arquivos antigos com essas extensões só saem como download
+_TIPOS_ATIVOS = {"text/html", "image/svg+xml", "application/xhtml+xml", "text/xml", "application/xml", "text/javascript"}
+
+
+class ArquivoResponse(Response):
+    """
+    Envia um arquivo inteiro ou um trecho (Range). Se o servidor ASGI oferecer
+    as extensões de envio direto (zerocopysend/pathsend), o kernel copia o
+    arquivo para o socket; senão, lê em blocos numa thread.
+    """
+
+    def __init__(self, caminho: str, status_code: int, headers: dict, inicio: int = 0, tamanho: int = 0,
+                 media_type: Optional[str] = None, parcial: bool = False):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.caminho = caminho
+        self.inicio = inicio
+        self.tamanho = tamanho
+        self.parcial = parcial
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        extensoes = scope.get("extensions") or {}
+
+        if scope["method"].upper() == "HEAD" or self.tamanho == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in extensoes:
+            arquivo = await anyio.to_thread.run_sync(open, self.caminho, "rb")
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": arquivo.fileno(),
+                    "offset": self.inicio,
+                    "count": self.tamanho,
+                    "more_body": False,
+                })
+            finally:
+                await anyio.to_thread.run_sync(arquivo.close)
+        elif "http.response.pathsend" in extensoes and not self.parcial:
+            await send({"type": "http.response.pathsend", "path": self.caminho})
+        else:
+            async with await anyio.open_file(self.caminho, mode="rb") as arquivo:
+                await arquivo.seek(self.inicio)
+                restante = self.tamanho
+                while restante > 0:
+                    bloco = await arquivo.read(min(TAMANHO_BLOCO, restante))
+                    if not bloco:
+                        break
+                    restante -= len(bloco)
+                    await send({"type": "http.response.body", "body": bloco, "more_body": restante > 0})
+                if restante > 0:
+                    # arquivo encolheu durante o envio: encerra o corpo
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def caminho_seguro(base: str, relativo: str) -> str:
+    """Resolve `relativo` dentro de `base`, recusando '..' e arquivos/pastas ocultos (ex.: .tmp)."""
+    partes = [p for p in relativo.split("/") if p]
+    if not partes or any(p.startswith(".") for p in partes):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    raiz = os.path.realpath(base)
+    caminho = os.path.realpath(os.path.join(raiz, *partes))
+    if os.path.commonpath([raiz, caminho]) != raiz:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    return caminho
+
+
+def _etag(caminho: str, st: os.stat_result) -> str:
+    # nomes de evidência nunca são reaproveitados: com hash no nome ele é o próprio ETag
+    m = _HASH.search(os.path.basename(caminho))
+    if m:
+        return f'"{m.group(1)}"'
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def _intervalo(cabecalho: str, tamanho: int) -> Optional[Tuple[int, int]]:
+    """Intervalo [inicio, fim] de um Range de faixa única; None para ignorar o header."""
+    m = _RANGE.match(cabecalho.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        inicio = int(m.group(1))
+        fim = min(int(m.group(2)), tamanho - 1) if m.group(2) else tamanho - 1
+    else:
+        # sufixo: os últimos N bytes
+        inicio, fim = max(tamanho - int(m.group(2)), 0), tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        raise HTTPException(
+            status_code=416, detail="Intervalo inválido", headers={"Content-Range": f"bytes */{tamanho}"}
+        )
+    return inicio, fim
+
+
+async def servir_arquivo(
+    request: Request, caminho: str, nome_download: Optional[str] = None, etag: Optional[str] = None
+) -> Response:
+    """
+    Resposta para arquivos imutáveis: ETag forte, Cache-Control immutable,
+    304 para If-None-Match e 206 para Range (com If-Range). O tipo vem da
+    extensão e o navegador não pode adivinhar outro (nosniff).
+    """
+    try:
+        st = await anyio.to_thread.run_sync(os.stat, caminho)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    if not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    etag = etag or _etag(caminho, st)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_IMUTAVEL,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+    media_type = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+    if nome_download or media_type in _TIPOS_ATIVOS:
+        headers["Content-Disposition"] = f'attachment; filename="{nome_download or os.path.basename(caminho)}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    tamanho = st.st_size
+
+    faixa = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if faixa and (not if_range or if_range.strip() == etag):
+        intervalo = _intervalo(faixa, tamanho)
+        if intervalo:
+            inicio, fim = intervalo
+            headers["Content-Range"] = f"bytes {inicio}-{fim}/{tamanho}"
+            headers["Content-Length"] = str(fim - inicio + 1)
+            return ArquivoResponse(caminho, 206, headers, inicio, fim - inicio + 1, media_type, parcial=True)
+
+    headers["Content-Length"] = str(tamanho)
+    return ArquivoResponse(caminho, 200, headers, 0, tamanho, media_type)
@@ -0,0 +1,42 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+def _chave() -> bytes:
+    # chave própria, derivada da SECRET_KEY: um token de upload nunca vale como JWT e vice-versa
+    return hmac.new(settings.SECRET_KEY.encode(), b"evidencias", hashlib.sha256).digest()
+
+def _b64(dados: bytes) -> str:
+    return base64.urlsafe_b64encode(dados).rstrip(b"=").decode()
+
+def _b64_decode(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+def assinar(dados: Dict[str, Any], validade_segundos: int) -> str:
+    """
+    Token curto `<dados>.<hmac>` com expiração. Tudo que o servidor precisa
+    saber vai dentro dele, então a verificação não consulta o banco.
+    """
+    corpo = _b64(json.dumps({**dados, "exp": int(time.time()) + validade_segundos}, separators=(",", ":")).encode())
+    return f"{corpo}.{_b64(hmac.new(_chave(), corpo.encode(), hashlib.sha256).digest())}"
+
+def verificar(token: str, tolerancia_segundos: int = 0) -> Dict[str, Any]:
+    """Devolve os dados do token; 403 se a assinatura não confere ou se expirou."""
+    try:
+        corpo, assinatura = token.split(".", 1)
+        esperada = hmac.new(_chave(), corpo.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(esperada, _b64_decode(assinatura)):
+            raise ValueError
+        dados = json.loads(_b64_decode(corpo))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=403, detail="Assinatura inválida")
+    if dados.get("exp", 0) + tolerancia_segundos < time.time():
+        raise HTTPException(status_code=403, detail="Link expirado")
+    return dados
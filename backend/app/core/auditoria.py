@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.log import LogSistema
+from app.models.projeto import Projeto
+
+logger = logging.getLogger(__name__)
+
+_FIM = object()
+
+
+class AuditLogWriter:
+    """
+    Gravação dos logs de auditoria fora do caminho da requisição.
+
+    As entradas vão para uma fila em memória e uma tarefa de fundo grava em
+    INSERTs de várias linhas, quando o lote enche ou quando passa o intervalo.
+    Entradas com `projeto_id` e sem `sistema_id` têm o sistema resolvido numa
+    única consulta por lote. No shutdown a fila é esvaziada antes de sair.
+    """
+
+    def __init__(self, session_factory, tamanho_lote: int = 200, intervalo: float = 1.0, fila_maxima: int = 10000):
+        self.session_factory = session_factory
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.fila_maxima = fila_maxima
+        self._fila: Optional[asyncio.Queue] = None
+        self._tarefa: Optional[asyncio.Task] = None
+
+    @property
+    def ativo(self) -> bool:
+        return self._tarefa is not None and not self._tarefa.done()
+
+    def iniciar(self) -> None:
+        self._fila = asyncio.Queue(maxsize=self.fila_maxima)
+        self._tarefa = asyncio.create_task(self._consumir())
+
+    async def encerrar(self) -> None:
+        if not self.ativo:
+            return
+        await self._fila.put(_FIM)
+        await self._tarefa
+        self._tarefa = None
+
+    async def registrar(self, entrada: Dict[str, Any]) -> None:
+        if self.ativo:
+            # fila cheia segura a requisição em vez de perder auditoria
+            await self._fila.put(entrada)
+        else:
+            # fora da aplicação (scripts, seeds) grava na hora
+            await self.gravar([entrada])
+
+    async def _consumir(self) -> None:
+        loop = asyncio.get_running_loop()
+        encerrando = False
+        while not encerrando:
+            primeira = await self._fila.get()
+            if primeira is _FIM:
+                break
+            lote = [primeira]
+            limite = loop.time() + self.intervalo
+            while len(lote) < self.tamanho_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    entrada = await asyncio.wait_for(self._fila.get(), timeout=restante)
+                except asyncio.TimeoutError:
+                    break
+                if entrada is _FIM:
+                    encerrando = True
+                    break
+                lote.append(entrada)
+            try:
+                await self.gravar(lote)
+            except Exception as e:
+                logger.error(f"Falha ao gravar {len(lote)} logs de auditoria: {e}")
+
+    async def gravar(self, lote: List[Dict[str, Any]]) -> None:
+        async with self.session_factory() as session:
+            projeto_ids = {e["projeto_id"] for e in lote if e.get("projeto_id") and not e.get("sistema_id")}
+            sistemas = {}
+            if projeto_ids:
+                result = await session.execute(
+                    select(Projeto.id, Projeto.sistema_id).where(Projeto.id.in_(projeto_ids))
+                )
+                sistemas = dict(result.all())
+
+            linhas = [
+                {
+                    "usuario_id": e.get("usuario_id"),
+                    "sistema_id": e.get("sistema_id") or sistemas.get(e.get("projeto_id")),
+                    "acao": e["acao"],
+                    "entidade": e["entidade"],
+                    "entidade_id": e.get("entidade_id"),
+                    "detalhes": e.get("detalhes"),
+                    "created_at": e["created_at"],
+                }
+                for e in lote
+            ]
+            await session.execute(insert(LogSistema).values(linhas))
+            await session.commit()
+
+
+auditoria = AuditLogWriter(
+    AsyncSessionLocal,
+    tamanho_lote=settings.AUDITORIA_LOTE_TAMANHO,
+    intervalo=settings.AUDITORIA_INTERVALO_SEGUNDOS,
+    fila_maxima=settings.AUDITORIA_FILA_MAXIMA,
+)
@@ -0,0 +1,228 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class CacheBackend(ABC):
+    """
+    Armazenamento do cache. As chaves são versionadas pela geração do namespace:
+    invalidar um namespace só incrementa a geração, e as entradas antigas
+    deixam de ser encontradas (e expiram pelo TTL).
+    """
+
+    # backends locais guardam o objeto pronto e invalidam de forma síncrona
+    local = False
+
+    @abstractmethod
+    async def geracao(self, namespace: str) -> int:
+        ...
+
+    @abstractmethod
+    async def get(self, namespace: str, geracao: int, chave: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, namespace: str, geracao: int, chave: str, valor: Any, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidar(self, namespace: str) -> None:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """LRU em memória do processo, limitado por número de entradas, com TTL por entrada."""
+
+    local = True
+
+    def __init__(self, max_entradas: int = 512):
+        self.max_entradas = max_entradas
+        self._dados: "OrderedDict[Tuple[str, int, str], Tuple[float, Any]]" = OrderedDict()
+        self._geracoes: Dict[str, int] = {}
+
+    async def geracao(self, namespace: str) -> int:
+        return self._geracoes.get(namespace, 0)
+
+    async def get(self, namespace: str, geracao: int, chave: str) -> Optional[Any]:
+        k = (namespace, geracao, chave)
+        entrada = self._dados.get(k)
+        if entrada is None:
+            return None
+        expira_em, valor = entrada
+        if expira_em <= time.monotonic():
+            del self._dados[k]
+            return None
+        self._dados.move_to_end(k)
+        return valor
+
+    async def set(self, namespace: str, geracao: int, chave: str, valor: Any, ttl: int) -> None:
+        if geracao != self._geracoes.get(namespace, 0):
+            # invalidado enquanto o valor era calculado: não guarda dado velho
+            return
+        k = (namespace, geracao, chave)
+        self._dados[k] = (time.monotonic() + ttl, valor)
+        self._dados.move_to_end(k)
+        while len(self._dados) > self.max_entradas:
+            self._dados.popitem(last=False)
+
+    def invalidar_agora(self, namespace: str) -> None:
+        self._geracoes[namespace] = self._geracoes.get(namespace, 0) + 1
+        for k in [k for k in self._dados if k[0] == namespace]:
+            del self._dados[k]
+
+    async def invalidar(self, namespace: str) -> None:
+        self.invalidar_agora(namespace)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend compartilhado entre workers. Os valores são gravados como JSON e a
+    geração de cada namespace fica numa chave própria, então a invalidação feita
+    por um worker vale para todos. Requer o pacote `redis` (opcional).
+    """
+
+    def __init__(self, url: str, prefixo: str = "cache:"):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requer o pacote 'redis' instalado.") from e
+        self.redis = redis_asyncio.from_url(url)
+        self.prefixo = prefixo
+
+    def _chave(self, namespace: str, geracao: int, chave: str) -> str:
+        return f"{self.prefixo}{namespace}:{geracao}:{chave}"
+
+    async def geracao(self, namespace: str) -> int:
+        valor = await self.redis.get(f"{self.prefixo}{namespace}:geracao")
+        return int(valor) if valor else 0
+
+    async def get(self, namespace: str, geracao: int, chave: str) -> Optional[Any]:
+        return await self.redis.get(self._chave(namespace, geracao, chave))
+
+    async def set(self, namespace: str, geracao: int, chave: str, valor: Any, ttl: int) -> None:
+        await self.redis.set(self._chave(namespace, geracao, chave), valor, ex=ttl)
+
+    async def invalidar(self, namespace: str) -> None:
+        await self.redis.incr(f"{self.prefixo}{namespace}:geracao")
+
+
+class ResponseCache:
+    """
+    Cache de respostas (schemas pydantic) na frente dos services.
+
+    Misses concorrentes da mesma chave dentro do processo são coalescidos:
+    só a primeira requisição calcula, as outras aguardam o mesmo resultado.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self._em_voo: Dict[Tuple[str, int, str], asyncio.Future] = {}
+        self._tarefas: Set[asyncio.Task] = set()
+
+    async def obter(self, namespace: str, chave: str, carregar: Callable[[], Awaitable[M]], schema: Type[M]) -> M:
+        if self.ttl <= 0:
+            return await carregar()
+
+        geracao = await self.backend.geracao(namespace)
+        valor = await self.backend.get(namespace, geracao, chave)
+        if valor is not None:
+            return valor if self.backend.local else schema.model_validate_json(valor)
+
+        k = (namespace, geracao, chave)
+        em_voo = self._em_voo.get(k)
+        if em_voo is not None:
+            return await asyncio.shield(em_voo)
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._em_voo[k] = futuro
+        try:
+            resultado = await carregar()
+            armazenado = resultado if self.backend.local else resultado.model_dump_json()
+            await self.backend.set(namespace, geracao, chave, armazenado, self.ttl)
+            futuro.set_result(resultado)
+            return resultado
+        except BaseException as e:
+            futuro.set_exception(e)
+            futuro.exception()  # evita o aviso de exceção não lida quando ninguém estava esperando
+            raise
+        finally:
+            self._em_voo.pop(k, None)
+
+    async def invalidar(self, namespace: str) -> None:
+        await self.backend.invalidar(namespace)
+
+    def agendar_invalidacao(self, namespace: str) -> None:
+        """Chamado de eventos síncronos (after_commit), onde não dá para usar await."""
+        if self.backend.local:
+            self.backend.invalidar_agora(namespace)
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        tarefa = loop.create_task(self.backend.invalidar(namespace))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+
+def invalidar_ao_gravar(cache: ResponseCache, namespace: str, tabelas: Iterable[str]) -> None:
+    """
+    Invalida `namespace` sempre que uma transação que escreveu em alguma das
+    `tabelas` for commitada, seja por flush do ORM ou por insert/update/delete em lote.
+    """
+    tabelas = set(tabelas)
+    marcador = f"cache_invalidar:{namespace}"
+
+    @event.listens_for(Session, "after_flush")
+    def _after_flush(session, flush_context):
+        for obj in chain(session.new, session.dirty, session.deleted):
+            if getattr(obj, "__tablename__", None) in tabelas:
+                session.info[marcador] = True
+                return
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _do_orm_execute(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            tabela = getattr(orm_execute_state.statement, "table", None)
+            if tabela is not None and tabela.name in tabelas:
+                orm_execute_state.session.info[marcador] = True
+
+    @event.listens_for(Session, "after_commit")
+    def _after_commit(session):
+        if session.info.pop(marcador, False):
+            cache.agendar_invalidacao(namespace)
+
+    @event.listens_for(Session, "after_rollback")
+    def _after_rollback(session):
+        session.info.pop(marcador, None)
+
+
+def criar_backend(max_entradas: int) -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.REDIS_URL:
+            raise RuntimeError("CACHE_BACKEND=redis requer REDIS_URL.")
+        return RedisCacheBackend(settings.REDIS_URL)
+    return MemoryCacheBackend(max_entradas)
+
+
+dashboard_cache = ResponseCache(criar_backend(settings.DASHBOARD_CACHE_MAX_ENTRADAS), settings.DASHBOARD_CACHE_TTL_SEGUNDOS)
+
+# Um namespace por usuário (principal:<id>): alterar um usuário não derruba o cache dos outros.
+# Só liga com CACHE_BACKEND=redis: desativar um usuário ou revogar seus tokens tem de valer na
+# hora em todos os workers, e em memória só o processo que fez a alteração ficaria sabendo.
+principal_cache = ResponseCache(
+    criar_backend(settings.AUTH_CACHE_MAX_ENTRADAS),
+    settings.AUTH_CACHE_TTL_SEGUNDOS if settings.CACHE_BACKEND == "redis" else 0,
+)
@@ -1,6 +1,26 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import re
 
+def _url_async(url: str) -> str:
+    """URL do Postgres no formato do asyncpg (sslmode/channel_binding da libpq não existem lá)."""
+    needs_ssl = "sslmode=require" in url
+
+    url = re.sub(r'[?&]sslmode=[^&]+', '', url)
+    url = re.sub(r'[?&]channel_binding=[^&]+', '', url)
+
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql+asyncpg://", 1)
+    elif url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    if needs_ssl:
+        separator = "&" if "?" in url else "?"
+        if "ssl=" not in url:
+            url += f"{separator}ssl=require"
+
+    return url
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8', extra='ignore')
 
@@ -11,10 +31,106 @@ class Settings(BaseSettings):
     POSTGRES_DB: str | None = None
     
     DATABASE_URL: str | None = None
+    # Réplicas de leitura (URLs separadas por vírgula): listas, dashboards e exportações leem delas
+    DATABASE_REPLICA_URLS: str = ""
+    # Réplica atrasada além disto, ou fora do ar, sai do rodízio até a próxima verificação
+    DB_REPLICA_ATRASO_MAXIMO_SEGUNDOS: float = 5.0
+    DB_REPLICA_VERIFICACAO_SEGUNDOS: float = 5.0
+    # Depois de gravar, o usuário lê do primário por este tempo (vê o que acabou de escrever)
+    DB_LEITURA_PROPRIA_SEGUNDOS: float = 10.0
+
+    # Engine do banco (Postgres/asyncpg)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SEGUNDOS: float = 30
+    DB_POOL_RECYCLE_SEGUNDOS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Prepared statements em cache por conexão (0 desliga)
+    DB_PREPARED_STATEMENT_CACHE: int = 100
+    # Limite por comando aplicado em cada conexão (0 = sem limite); não vale para migrações
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_APPLICATION_NAME: str = "projeto-ge-api"
+    # Loga cada comando SQL (só para depuração)
+    DB_ECHO: bool = False
+    # Atrás do PgBouncer (modo transação) ou de Postgres serverless: NullPool e sem prepared statements
+    DB_PGBOUNCER: bool = False
+    # Tentativas de conexão (com espera crescente) enquanto o banco acorda de um cold start
+    DB_CONEXAO_TENTATIVAS: int = 3
+    DB_CONEXAO_ESPERA_SEGUNDOS: float = 0.5
+
+    # Controle de admissão por classe de carga: requisições simultâneas, espera máxima
+    # por uma vaga (depois disso, 503 com Retry-After) e statement_timeout (0 = o da conexão).
+    # Leituras + analíticas abaixo do pool (DB_POOL_SIZE + DB_MAX_OVERFLOW) deixam conexões para as escritas;
+    # as exportações só usam conexão por instantes, a cada página lida.
+    CARGA_ESCRITA_LIMITE: int = 32
+    CARGA_ESCRITA_ESPERA_SEGUNDOS: float = 5.0
+    CARGA_ESCRITA_TIMEOUT_MS: int = 10000
+    CARGA_LEITURA_LIMITE: int = 12
+    CARGA_LEITURA_ESPERA_SEGUNDOS: float = 2.0
+    CARGA_LEITURA_TIMEOUT_MS: int = 15000
+    CARGA_ANALITICA_LIMITE: int = 4
+    CARGA_ANALITICA_ESPERA_SEGUNDOS: float = 0.5
+    CARGA_ANALITICA_TIMEOUT_MS: int = 60000
+    # Pacotes ZIP de evidências: a vaga fica presa enquanto o download dura
+    CARGA_EXPORTACAO_LIMITE: int = 4
+    CARGA_EXPORTACAO_ESPERA_SEGUNDOS: float = 0.5
+    CARGA_EXPORTACAO_TIMEOUT_MS: int = 60000
     
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Sessões renováveis: o refresh token vale por isto desde a última renovação
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Custo do bcrypt (log2 das rodadas); hashes com outro custo são refeitos no próximo login
+    BCRYPT_ROUNDS: int = 12
+    # Hash/verificação de senha numa pool de threads: quantas ao mesmo tempo e quanto esperar por vaga
+    SENHA_HASH_CONCORRENCIA: int = 4
+    SENHA_HASH_FILA_TIMEOUT_SEGUNDOS: float = 5.0
+
+    # Cache de respostas do dashboard ("memoria" por processo ou "redis" compartilhado)
+    CACHE_BACKEND: str = "memoria"
+    REDIS_URL: str | None = None
+    # Atraso máximo dos números de execuções e defeitos nos dashboards (ver dashboard_service)
+    DASHBOARD_CACHE_TTL_SEGUNDOS: int = 30
+    DASHBOARD_CACHE_MAX_ENTRADAS: int = 512
+    # Usuário autenticado (id, ativo, nível e permissões) guardado entre requisições; 0 desliga.
+    # Só vale com CACHE_BACKEND=redis (a revogação precisa chegar a todos os workers)
+    AUTH_CACHE_TTL_SEGUNDOS: int = 60
+    AUTH_CACHE_MAX_ENTRADAS: int = 10000
+
+    # Logs de auditoria gravados em lote por uma tarefa de fundo
+    AUDITORIA_LOTE_TAMANHO: int = 200
+    AUDITORIA_INTERVALO_SEGUNDOS: float = 1.0
+    AUDITORIA_FILA_MAXIMA: int = 10000
+
+    # Evidências enviadas pelos testadores
+    EVIDENCIAS_DIR: str = "evidencias"
+    EVIDENCIA_TAMANHO_MAXIMO_MB: int = 200
+    # prefixos aceitos, sempre dentro dos tipos que o conteúdo identifica (PNG, JPEG, GIF, WebP, PDF, WebM, MP4, MOV e texto)
+    EVIDENCIA_TIPOS_PERMITIDOS: str = "image/,video/,application/pdf,text/plain"
+    EVIDENCIA_GC_CARENCIA_HORAS: int = 24
+    # Upload retomável: sessões paradas por mais que isto são descartadas
+    EVIDENCIA_UPLOAD_EXPIRACAO_HORAS: int = 24
+    # Onde ficam os blobs: "local" (EVIDENCIAS_DIR) ou "s3" (bucket S3/MinIO, requer boto3)
+    EVIDENCIA_ARMAZENAMENTO: str = "local"
+    # Endereço público da API usado nas URLs de evidência gravadas em passos e defeitos
+    EVIDENCIA_URL_BASE: str = "http://localhost:8000"
+    # Validade das URLs assinadas de envio direto e de download
+    EVIDENCIA_URL_VALIDADE_SEGUNDOS: int = 900
+    EVIDENCIA_S3_BUCKET: str | None = None
+    EVIDENCIA_S3_ENDPOINT_URL: str | None = None
+    EVIDENCIA_S3_REGIAO: str | None = None
+    EVIDENCIA_S3_ACCESS_KEY: str | None = None
+    EVIDENCIA_S3_SECRET_KEY: str | None = None
+    EVIDENCIA_S3_PREFIXO: str = ""
+    # Variantes WebP das imagens (nome:largura), geradas num pool de processos (requer Pillow)
+    EVIDENCIA_VARIANTES: str = "thumb:320,web:1280"
+    EVIDENCIA_VARIANTE_QUALIDADE: int = 80
+    EVIDENCIA_DERIVADOS_PROCESSOS: int = 2
+
+    # logs_sistema: partições mensais criadas com antecedência e descartadas após a retenção (0 = sem limite)
+    LOG_PARTICOES_FUTURAS: int = 3
+    LOG_RETENCAO_MESES: int = 12
 
     @property
     def ASYNC_DATABASE_URL(self) -> str:
@@ -29,22 +145,11 @@ class Settings(BaseSettings):
                 f"{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
             )
 
-        needs_ssl = "sslmode=require" in url
+        return _url_async(url)
 
-        url = re.sub(r'[?&]sslmode=[^&]+', '', url)
-        url = re.sub(r'[?&]channel_binding=[^&]+', '', url)
-
-        if url.startswith("postgres://"):
-            url = url.replace("postgres://", "postgresql+asyncpg://", 1)
-        elif url.startswith("postgresql://"):
-            url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
-
-        if needs_ssl:
-            separator = "&" if "?" in url else "?"
-            if "ssl=" not in url:
-                url += f"{separator}ssl=require"
-
-        return url
+    @property
+    def ASYNC_REPLICA_URLS(self) -> list[str]:
+        return [_url_async(url.strip()) for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 
     PROJECT_NAME: str = "Projeto GE"
     API_V1_STR: str = "/api/v1"
@@ -1,20 +1,114 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+import asyncio
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
+from sqlalchemy.util import await_only
 from .config import settings
 
-engine = create_async_engine(settings.ASYNC_DATABASE_URL, echo=True)
+logger = logging.getLogger(__name__)
 
-AsyncSessionLocal = sessionmaker(
-    bind=engine, class_=AsyncSession, autocommit=False, autoflush=False
-)
 
-Base = declarative_base()
+def _opcoes_postgres(para_migracoes: bool) -> Dict[str, Any]:
+    connect_args: Dict[str, Any] = {}
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME + ("-migracoes" if para_migracoes else "")}
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
-from .config import settings
+    if settings.DB_PGBOUNCER:
+        # modo transação: cada transação pode cair num backend diferente, então
+        # nada de prepared statements nomeados reaproveitados nem estado de sessão
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+        if settings.DB_STATEMENT_TIMEOUT_MS and not para_migracoes:
+            # o PgBouncer recusa statement_timeout como parâmetro de conexão
+            logger.warning("DB_PGBOUNCER ativo: configure statement_timeout no role do banco (DB_STATEMENT_TIMEOUT_MS ignorado).")
+    else:
+        connect_args["prepared_statement_cache_size"] = settings.DB_PREPARED_STATEMENT_CACHE
+        # migrações (CREATE INDEX CONCURRENTLY, backfills) podem passar do limite das requisições
+        if settings.DB_STATEMENT_TIMEOUT_MS and not para_migracoes:
+            server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+
+    connect_args["server_settings"] = server_settings
+    opcoes: Dict[str, Any] = {"connect_args": connect_args}
+
+    if settings.DB_PGBOUNCER or para_migracoes:
+        # o pool fica no PgBouncer; aqui cada checkout abre e fecha a conexão
+        opcoes["poolclass"] = NullPool
+    else:
+        opcoes.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SEGUNDOS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SEGUNDOS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return opcoes
+
+
+def _conectar_com_retentativas(engine: AsyncEngine) -> None:
+    """
+    Postgres gerenciado/serverless derruba ou recusa a primeira conexão
+    enquanto acorda: repete o connect com espera crescente antes de desistir.
+    Erros de autenticação e de configuração não são repetidos.
+    """
+
+    @event.listens_for(engine.sync_engine, "do_connect")
+    def _do_connect(dialect, conn_rec, cargs, cparams):
+        asyncpg = dialect.dbapi.asyncpg
+        transitorios = (OSError, asyncio.TimeoutError, asyncpg.CannotConnectNowError, asyncpg.ConnectionDoesNotExistError)
+        for tentativa in range(1, settings.DB_CONEXAO_TENTATIVAS + 1):
+            try:
+                return dialect.connect(*cargs, **cparams)
+            except transitorios as e:
+                if tentativa == settings.DB_CONEXAO_TENTATIVAS:
+                    raise
+                espera = settings.DB_CONEXAO_ESPERA_SEGUNDOS * 2 ** (tentativa - 1)
+                logger.warning(f"Falha ao conectar no banco ({e!r}); tentativa {tentativa}, nova tentativa em {espera:.1f}s")
+                # roda dentro do greenlet do SQLAlchemy: espera sem bloquear o event loop
+                await_only(asyncio.sleep(espera))
+
+
+def criar_engine(url: str = None, para_migracoes: bool = False) -> AsyncEngine:
+    """
+    Engine configurada pelo Settings (DB_*). `para_migracoes` usa NullPool e
+    não aplica o statement_timeout das requisições.
+    """
+    url = url or settings.ASYNC_DATABASE_URL
+    # SQL no log só quando pedido (DB_ECHO): o echo escreve cada comando de forma síncrona
+    opcoes: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    postgres = make_url(url).get_backend_name() == "postgresql"
+    if postgres:
+        opcoes.update(_opcoes_postgres(para_migracoes))
+    engine = create_async_engine(url, **opcoes)
+    if postgres and settings.DB_CONEXAO_TENTATIVAS > 1:
+        _conectar_com_retentativas(engine)
+    return engine
 
-engine = create_async_engine(settings.ASYNC_DATABASE_URL, echo=True)
+
+def estatisticas_pool(engine_alvo: AsyncEngine = None) -> Dict[str, Any]:
+    pool = (engine_alvo or engine).pool
+    estatisticas: Dict[str, Any] = {"tipo": type(pool).__name__, "status": pool.status()}
+    if hasattr(pool, "checkedout"):
+        estatisticas.update(
+            tamanho=pool.size(),
+            em_uso=pool.checkedout(),
+            ociosas=pool.checkedin(),
+            # conexões abertas além de pool_size (o contador interno começa em -pool_size)
+            overflow=max(pool.overflow(), 0),
+            # primária e réplicas recebem o mesmo max_overflow em _opcoes_postgres
+            limite=settings.DB_POOL_SIZE + max(settings.DB_MAX_OVERFLOW, 0),
+        )
+    return estatisticas
+
+
+engine = criar_engine()
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -26,9 +120,153 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+# Usuário autenticado da requisição atual (definido em deps.get_current_user)
+usuario_da_requisicao: ContextVar[Optional[int]] = ContextVar("usuario_da_requisicao", default=None)
+
+# 0 se a réplica está em dia; senão, há quanto tempo foi aplicada a última transação recebida
+_SQL_ATRASO_POSTGRES = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicasLeitura:
+    """
+    Escolhe de onde ler: uma réplica saudável (em rodízio) ou o primário.
+
+    Uma tarefa de fundo mede o atraso de cada réplica; as que estão fora do ar
+    ou atrasadas além de DB_REPLICA_ATRASO_MAXIMO_SEGUNDOS saem do rodízio, e
+    sem nenhuma saudável a leitura vai para o primário. Quem gravou há menos
+    de DB_LEITURA_PROPRIA_SEGUNDOS também lê do primário, para ver o que
+    acabou de escrever. Esse registro é do processo: com vários workers, a
+    leitura seguinte pode cair em outro, e aí vale o limite de atraso.
+    """
+
+    def __init__(self, replicas: List[AsyncEngine], atraso_maximo: float, janela_leitura_propria: float):
+        self.replicas = replicas
+        self.atraso_maximo = atraso_maximo
+        self.janela_leitura_propria = janela_leitura_propria
+        # até a primeira verificação ninguém está no rodízio
+        self._saudaveis: List[AsyncEngine] = []
+        self._proxima = 0
+        self._escritas: Dict[int, float] = {}
+
+    def registrar_escrita(self, usuario_id: int) -> None:
+        agora = time.monotonic()
+        self._escritas[usuario_id] = agora
+        if len(self._escritas) > 10000:
+            corte = agora - self.janela_leitura_propria
+            self._escritas = {u: t for u, t in self._escritas.items() if t > corte}
+
+    def escolher(self, usuario_id: Optional[int]) -> AsyncEngine:
+        if usuario_id is not None:
+            escrita = self._escritas.get(usuario_id)
+            if escrita is not None and time.monotonic() - escrita < self.janela_leitura_propria:
+                return engine
+        saudaveis = self._saudaveis
+        if not saudaveis:
+            return engine
+        self._proxima = (self._proxima + 1) % len(saudaveis)
+        return saudaveis[self._proxima]
+
+    async def _atraso(self, replica: AsyncEngine) -> float:
+        async with replica.connect() as conn:
+            if replica.dialect.name != "postgresql":
+                await conn.execute(text("SELECT 1"))
+                return 0.0
+            return float((await conn.execute(_SQL_ATRASO_POSTGRES)).scalar() or 0)
+
+    async def verificar(self) -> None:
+        saudaveis = []
+        for replica in self.replicas:
+            try:
+                atraso = await asyncio.wait_for(self._atraso(replica), timeout=self.atraso_maximo)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Réplica {replica.url.host or replica.url.database} fora do rodízio: {e!r}")
+                continue
+            if atraso > self.atraso_maximo:
+                logger.warning(f"Réplica {replica.url.host or replica.url.database} fora do rodízio: {atraso:.1f}s de atraso")
+                continue
+            saudaveis.append(replica)
+        self._saudaveis = saudaveis
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {"total": len(self.replicas), "saudaveis": len(self._saudaveis)}
+
+    async def monitorar(self, intervalo: float) -> None:
+        """Tarefa de fundo do lifespan."""
+        while True:
+            await self.verificar()
+            await asyncio.sleep(intervalo)
+
+    async def encerrar(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+
+replicas = ReplicasLeitura(
+    [criar_engine(url) for url in settings.ASYNC_REPLICA_URLS],
+    atraso_maximo=settings.DB_REPLICA_ATRASO_MAXIMO_SEGUNDOS,
+    janela_leitura_propria=settings.DB_LEITURA_PROPRIA_SEGUNDOS,
+)
+
+
+class _SessaoLeitura(Session):
+    # escolhe no primeiro comando, quando o usuário da requisição já é conhecido, e mantém até o fim
+    def get_bind(self, mapper=None, clause=None, **kw):
+        escolhida = self.info.get("engine_leitura")
+        if escolhida is None:
+            escolhida = self.info["engine_leitura"] = replicas.escolher(usuario_da_requisicao.get()).sync_engine
+        return escolhida
+
+
+if replicas.replicas:
+    AsyncSessionLeitura = sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=_SessaoLeitura,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+    _MARCADOR_ESCRITA = "replicas:escreveu"
+
+    @event.listens_for(Session, "after_flush")
+    def _after_flush(session, flush_context):
+        if session.new or session.dirty or session.deleted:
+            session.info[_MARCADOR_ESCRITA] = True
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _do_orm_execute(orm_execute_state):
+        # SQL textual também conta: na dúvida, o usuário lê do primário por um instante
+        if not orm_execute_state.is_select:
+            orm_execute_state.session.info[_MARCADOR_ESCRITA] = True
+
+    @event.listens_for(Session, "after_commit")
+    def _after_commit(session):
+        usuario_id = usuario_da_requisicao.get()
+        if session.info.pop(_MARCADOR_ESCRITA, False) and usuario_id is not None:
+            replicas.registrar_escrita(usuario_id)
+
+    @event.listens_for(Session, "after_rollback")
+    def _after_rollback(session):
+        session.info.pop(_MARCADOR_ESCRITA, None)
+else:
+    AsyncSessionLeitura = AsyncSessionLocal
+
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+async def get_read_db() -> AsyncSession:
+    """Sessão só de leitura (listas, dashboards, exportações): réplica quando houver uma em dia."""
+    async with AsyncSessionLeitura() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
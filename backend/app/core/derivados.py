@@ -0,0 +1,155 @@
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Formatos que o Pillow decodifica; os demais (vídeo, PDF) são servidos no original
+EXTENSOES_IMAGEM = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp"}
+
+
+def ler_variantes(texto: str) -> Dict[str, int]:
+    """'thumb:320,web:1280' -> {'thumb': 320, 'web': 1280}"""
+    variantes = {}
+    for item in texto.split(","):
+        nome, _, largura = item.strip().partition(":")
+        if nome and largura.isdigit():
+            variantes[nome] = int(largura)
+    return variantes
+
+
+def _gerar(origem: str, destino: str, largura: int, qualidade: int) -> None:
+    # roda num processo do pool: decodificar e redimensionar prende a CPU
+    from PIL import Image, ImageOps
+
+    with Image.open(origem) as img:
+        # JPEG: decodifica já reduzido quando possível
+        img.draft("RGB", (largura, largura))
+        img = ImageOps.exif_transpose(img)
+        if img.width > largura:
+            img.thumbnail((largura, img.height), Image.Resampling.LANCZOS)
+        transparente = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+        img = img.convert("RGBA" if transparente else "RGB")
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = f"{destino}.{os.getpid()}.parcial"
+        img.save(temporario, "WEBP", quality=qualidade, method=4)
+    # só aparece com o nome final depois de completo
+    os.replace(temporario, destino)
+
+
+class GeradorDerivados:
+    """
+    Miniaturas e versões para web (WebP em larguras fixas) das evidências de imagem.
+
+    A geração roda num pool de processos, fora do event loop e das requisições:
+    o upload só agenda, e o pedido de uma variante que ainda não existe gera na
+    hora e espera. Pedidos simultâneos da mesma variante compartilham o mesmo
+    trabalho. Os arquivos ficam em evidencias/.derivados/<variante>/ e, como o
+    original é imutável, nunca precisam ser refeitos.
+
+    Requer o pacote `Pillow` (opcional): sem ele, ou se a geração falhar,
+    `obter` devolve None e quem chamou serve o original.
+    """
+
+    def __init__(self, diretorio: str, variantes: Dict[str, int], qualidade: int = 80, processos: int = 2):
+        self.diretorio = diretorio
+        self.variantes = variantes
+        self.qualidade = qualidade
+        self.processos = processos
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pendentes: Dict[str, asyncio.Future] = {}
+        self._agendadas: Set[asyncio.Task] = set()
+
+    @property
+    def ativo(self) -> bool:
+        return self._pool is not None
+
+    def iniciar(self) -> None:
+        if importlib.util.find_spec("PIL") is None:
+            logger.warning("Pillow não instalado: evidências serão servidas sem miniaturas.")
+            return
+        self._pool = self._criar_pool()
+
+    def _criar_pool(self) -> ProcessPoolExecutor:
+        # spawn: o processo da aplicação já tem threads e um event loop, fork não é seguro
+        return ProcessPoolExecutor(max_workers=self.processos, mp_context=multiprocessing.get_context("spawn"))
+
+    async def encerrar(self) -> None:
+        for tarefa in list(self._agendadas):
+            tarefa.cancel()
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+    def suporta(self, caminho: str) -> bool:
+        return os.path.splitext(caminho)[1].lower() in EXTENSOES_IMAGEM
+
+    def caminho(self, chave: str, variante: str) -> str:
+        return os.path.join(self.diretorio, ".derivados", variante, chave[:2], f"{chave}.webp")
+
+    async def obter(self, origem: str, chave: str, variante: str) -> Optional[str]:
+        """Caminho da variante de `origem`, gerando se ainda não existir."""
+        if not self.suporta(origem):
+            return None
+        destino = self.caminho(chave, variante)
+        if await asyncio.to_thread(os.path.exists, destino):
+            return destino
+        if not self.ativo:
+            return None
+
+        pool = self._pool
+        trabalho = self._pendentes.get(destino)
+        if trabalho is None:
+            loop = asyncio.get_running_loop()
+            trabalho = loop.run_in_executor(
+                pool, _gerar, origem, destino, self.variantes[variante], self.qualidade
+            )
+            self._pendentes[destino] = trabalho
+            trabalho.add_done_callback(lambda _: self._pendentes.pop(destino, None))
+        try:
+            # shield: um cliente que desiste não cancela o trabalho dos outros
+            await asyncio.shield(trabalho)
+        except asyncio.CancelledError:
+            raise
+        except BrokenProcessPool as e:
+            # um processo morreu (ex.: falta de memória numa imagem enorme): o pool não volta sozinho
+            logger.error(f"Pool de derivados interrompido ao gerar {origem}: {e}")
+            if self._pool is pool:
+                self._pool = self._criar_pool()
+            return None
+        except Exception as e:
+            logger.error(f"Falha ao gerar a variante '{variante}' de {origem}: {e}")
+            return None
+        return destino
+
+    def agendar(self, origem: str, chave: str) -> None:
+        """Gera todas as variantes em segundo plano (chamado depois do upload)."""
+        if not self.ativo or not self.suporta(origem):
+            return
+        for variante in self.variantes:
+            tarefa = asyncio.create_task(self.obter(origem, chave, variante))
+            self._agendadas.add(tarefa)
+            tarefa.add_done_callback(self._agendadas.discard)
+
+    def remover(self, chave: str) -> None:
+        """Apaga as variantes de um blob removido (síncrono: chamar numa thread)."""
+        for variante in self.variantes:
+            try:
+                os.remove(self.caminho(chave, variante))
+            except FileNotFoundError:
+                pass
+
+
+derivados = GeradorDerivados(
+    settings.EVIDENCIAS_DIR,
+    ler_variantes(settings.EVIDENCIA_VARIANTES),
+    qualidade=settings.EVIDENCIA_VARIANTE_QUALIDADE,
+    processos=settings.EVIDENCIA_DERIVADOS_PROCESSOS,
+)
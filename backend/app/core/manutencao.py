@@ -0,0 +1,34 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+
+@asynccontextmanager
+async def trava_exclusiva(nome: str) -> AsyncIterator[bool]:
+    """
+    Trava consultiva do Postgres para as manutenções de fundo: com vários
+    workers, só quem a obtém roda a rodada (DDL de partições, retenção, GC);
+    os outros recebem False e pulam. Fica numa transação aberta numa conexão
+    própria (pg_try_advisory_xact_lock), o que funciona também atrás do
+    PgBouncer, e é liberada sozinha se o processo morrer.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    async with engine.connect() as conexao:
+        async with conexao.begin():
+            obtida = await conexao.scalar(text("SELECT pg_try_advisory_xact_lock(hashtext(:nome))"), {"nome": nome})
+            yield bool(obtida)
+
+
+async def aguardar(parar: Optional[asyncio.Event], segundos: float) -> None:
+    """Espera o intervalo entre rodadas, voltando antes se o encerramento for pedido."""
+    if parar is None:
+        await asyncio.sleep(segundos)
+        return
+    with suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(parar.wait(), segundos)
@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Generic, List, Mapping, Optional, Sequence, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, literal, select, text, tuple_
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+class PageParams:
+    """Parâmetros de uma página: cursor opaco, tamanho e se o total deve ser estimado."""
+
+    def __init__(self, cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT, incluir_total: bool = False):
+        self.cursor = cursor
+        self.limit = max(1, min(limit, MAX_LIMIT))
+        self.incluir_total = incluir_total
+
+
+class Page(Generic[T]):
+    def __init__(self, items: List[T], next_cursor: Optional[str] = None, total: Optional[int] = None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+    def map(self, fn: Callable[[T], R]) -> "Page[R]":
+        return Page([fn(i) for i in self.items], self.next_cursor, self.total)
+
+
+class Keyset:
+    """
+    Chave de ordenação para paginação por cursor.
+    A última coluna precisa ser única (normalmente o id) para desempate.
+    """
+
+    def __init__(self, *columns: ColumnElement, descending: bool = True):
+        self.columns = columns
+        self.descending = descending
+
+    def apply(self, query: Select, cursor_values: Optional[List[Any]]) -> Select:
+        if cursor_values is not None:
+            chave = tuple_(*self.columns)
+            valores = tuple_(*[literal(v, c.type) for c, v in zip(self.columns, cursor_values)])
+            query = query.where(chave < valores if self.descending else chave > valores)
+        ordem = [c.desc() if self.descending else c.asc() for c in self.columns]
+        return query.order_by(*ordem)
+
+    def values_from(self, item: Any) -> List[Any]:
+        if isinstance(item, Mapping):
+            return [item[c.key] for c in self.columns]
+        return [getattr(item, c.key) for c in self.columns]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError(cursor)
+        return [datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v for v in payload]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+
+
+def apply_filters(query: Select, filtros: Dict[ColumnElement, Any]) -> Select:
+    """Aplica filtros de igualdade ignorando os que vierem como None."""
+    for coluna, valor in filtros.items():
+        if valor is not None:
+            query = query.where(coluna == valor)
+    return query
+
+
+async def estimate_total(db: AsyncSession, query: Select) -> int:
+    """
+    No Postgres usa a estimativa do planner (EXPLAIN), que não varre a tabela.
+    Nos demais bancos (ou se a query não puder ser renderizada) faz um COUNT exato.
+    """
+    base = query.order_by(None).limit(None)
+    dialect = db.get_bind().dialect
+
+    if dialect.name == "postgresql":
+        try:
+            sql = str(base.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+        except CompileError:
+            sql = None
+        if sql:
+            plano = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()
+            if isinstance(plano, str):
+                plano = json.loads(plano)
+            return int(plano[0]["Plan"]["Plan Rows"])
+
+    query_count = select(func.count()).select_from(base.subquery())
+    return (await db.execute(query_count)).scalar() or 0
+
+
+async def paginate(db: AsyncSession, query: Select, keyset: Keyset, params: PageParams, scalars: bool = True) -> Page:
+    """
+    Executa `query` paginada por keyset. Busca `limit + 1` linhas para saber
+    se existe próxima página sem precisar de COUNT.
+    """
+    total = await estimate_total(db, query) if params.incluir_total else None
+
+    cursor_values = decode_cursor(params.cursor, len(keyset.columns)) if params.cursor else None
+    query = keyset.apply(query, cursor_values).limit(params.limit + 1)
+
+    result = await db.execute(query)
+    rows = list(result.scalars().all() if scalars else result.mappings().all())
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_cursor = encode_cursor(keyset.values_from(rows[-1]))
+
+    return Page(rows, next_cursor, total)
@@ -1,10 +1,24 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any, Union
+from typing import Optional, Any, Tuple, Union
+from fastapi import HTTPException
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max iguais ao padrão: hash com outro custo é considerado desatualizado e refeito no login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt solta o GIL: threads bastam para tirar o custo do event loop e rodar em paralelo
+_pool_senhas = ThreadPoolExecutor(max_workers=settings.SENHA_HASH_CONCORRENCIA, thread_name_prefix="senha")
+_vagas_senhas = asyncio.Semaphore(settings.SENHA_HASH_CONCORRENCIA)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,15 +26,41 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _no_pool(funcao, *args):
+    """
+    Roda `funcao` numa thread do pool de senhas. Quem espera vaga por mais de
+    SENHA_HASH_FILA_TIMEOUT_SEGUNDOS recebe 503: num pico de logins é melhor
+    recusar cedo do que acumular requisições que vão estourar o timeout do cliente.
+    """
+    try:
+        await asyncio.wait_for(_vagas_senhas.acquire(), timeout=settings.SENHA_HASH_FILA_TIMEOUT_SEGUNDOS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, tente novamente em instantes.",
+            headers={"Retry-After": "2"},
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool_senhas, funcao, *args)
+    finally:
+        _vagas_senhas.release()
+
+async def verificar_senha(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(senha confere, novo hash se o custo configurado mudou desde que este foi gerado)"""
+    return await _no_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def gerar_hash_senha(password: str) -> str:
+    return await _no_pool(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    
+
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
+
     to_encode.update({"exp": expire})
-    
+
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Manutenção do dashboard_rollup.
+
+    python -m app.dashboard_rollup rebuild            # recalcula tudo a partir das tabelas de origem
+    python -m app.dashboard_rollup check              # lista divergências (sai com código 1 se houver)
+    python -m app.dashboard_rollup check --corrigir   # se houver divergência, faz o rebuild
+"""
+import asyncio
+import sys
+from app.core.database import AsyncSessionLocal
+from app.repositories.dashboard_rollup_repository import DashboardRollupRepository
+
+async def rebuild():
+    async with AsyncSessionLocal() as session:
+        total = await DashboardRollupRepository(session).reconstruir()
+        print(f"--- Rollup reconstruído: {total} linhas ---")
+
+async def check(corrigir: bool = False) -> bool:
+    async with AsyncSessionLocal() as session:
+        divergencias = await DashboardRollupRepository(session).verificar()
+
+    if not divergencias:
+        print("--- Rollup consistente ---")
+        return True
+
+    print(f"--- {len(divergencias)} divergência(s) no rollup ---")
+    for d in divergencias:
+        print(f"projeto={d['projeto_id']} {d['dimensao']}={d['chave']}: "
+              f"esperado={d['esperado']} armazenado={d['armazenado']}")
+
+    if corrigir:
+        await rebuild()
+        return True
+    return False
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    comando = args[0] if args else "check"
+    try:
+        if comando == "rebuild":
+            asyncio.run(rebuild())
+        elif comando == "check":
+            if not asyncio.run(check("--corrigir" in args)):
+                sys.exit(1)
+        else:
+            print(__doc__)
+            sys.exit(2)
+    except Exception as e:
+        print(f"Execution Error: {e}")
+        sys.exit(1)
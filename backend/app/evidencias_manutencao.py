@@ -0,0 +1,69 @@
+"""
+Manutenção do armazenamento de evidências.
+
+    python -m app.evidencias_manutencao gc         # remove blobs sem referência há mais de EVIDENCIA_GC_CARENCIA_HORAS
+                                                   # e uploads retomáveis parados há mais de EVIDENCIA_UPLOAD_EXPIRACAO_HORAS
+    python -m app.evidencias_manutencao recontar   # recalcula as referências a partir de passos e defeitos
+
+A aplicação já roda o GC no startup e depois a cada hora.
+"""
+import asyncio
+import logging
+import sys
+from datetime import timedelta
+from typing import Optional
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.manutencao import aguardar, trava_exclusiva
+from app.repositories.evidencia_repository import EvidenciaRepository
+from app.services.evidencia_service import EvidenciaService
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_SEGUNDOS = 60 * 60
+
+def _carencia() -> timedelta:
+    return timedelta(hours=settings.EVIDENCIA_GC_CARENCIA_HORAS)
+
+def _expiracao() -> timedelta:
+    return timedelta(hours=settings.EVIDENCIA_UPLOAD_EXPIRACAO_HORAS)
+
+async def gc():
+    async with AsyncSessionLocal() as session:
+        service = EvidenciaService(session)
+        removidos = await service.coletar_lixo(_carencia())
+        expirados = await service.expirar_uploads(_expiracao())
+        print(f"--- {removidos} blob(s) órfão(s) removido(s), {expirados} upload(s) expirado(s) ---")
+
+async def recontar():
+    async with AsyncSessionLocal() as session:
+        divergencias = await EvidenciaRepository(session).recontar()
+    print(f"--- {len(divergencias)} contagem(ns) corrigida(s) ---")
+    for d in divergencias:
+        print(f"{d['sha256']}: esperado={d['esperado']} armazenado={d['armazenado']}")
+
+async def manter_periodicamente(intervalo: int = INTERVALO_SEGUNDOS, parar: Optional[asyncio.Event] = None):
+    """Tarefa de fundo do lifespan: coleta os blobs órfãos (um worker por vez)."""
+    while not (parar and parar.is_set()):
+        try:
+            async with trava_exclusiva("manutencao:evidencias") as obtida:
+                if obtida:
+                    async with AsyncSessionLocal() as session:
+                        service = EvidenciaService(session)
+                        await service.coletar_lixo(_carencia())
+                        await service.expirar_uploads(_expiracao())
+        except Exception as e:
+            logger.error(f"Falha no GC de evidências: {e}")
+        await aguardar(parar, intervalo)
+
+if __name__ == "__main__":
+    comandos = {"gc": gc, "recontar": recontar}
+    comando = sys.argv[1] if len(sys.argv) > 1 else None
+    if comando not in comandos:
+        print(__doc__)
+        sys.exit(2)
+    try:
+        asyncio.run(comandos[comando]())
+    except Exception as e:
+        print(f"Execution Error: {e}")
+        sys.exit(1)
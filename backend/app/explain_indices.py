@@ -0,0 +1,146 @@
+"""
+Roda EXPLAIN nas queries reais dos repositórios e mostra quais índices o
+planner usou e onde ainda sobra Seq Scan.
+
+    python -m app.explain_indices                 # plano com as estatísticas atuais
+    python -m app.explain_indices --forcar-indices # SET enable_seqscan = off
+
+Em bases pequenas o planner prefere Seq Scan mesmo com índice disponível;
+`--forcar-indices` serve para confirmar que o índice é elegível para a query.
+Tudo roda dentro de uma transação que é desfeita no final (inclusive os deletes).
+"""
+import asyncio
+import re
+import sys
+from typing import List, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import Base, engine
+from app.core.pagination import PageParams
+from app.models.password_reset import PasswordReset
+from app.models.projeto import Projeto
+from app.models.testing import CasoTeste, CicloTeste, ExecucaoTeste
+from app.repositories.caso_teste_repository import CasoTesteRepository
+from app.repositories.ciclo_teste_repository import CicloTesteRepository
+from app.repositories.dashboard_repository import DashboardRepository
+from app.repositories.defeito_repository import DefeitoRepository
+from app.repositories.execucao_teste_repository import ExecucaoTesteRepository
+from app.repositories.log_repository import LogRepository
+from app.repositories.password_reset_repository import PasswordResetRepository
+from app.repositories.projeto_repository import ProjetoRepository
+
+RE_INDICE = re.compile(r"(?:Index Scan|Index Only Scan|Bitmap Index Scan)(?: Backward)? (?:using|on) (\w+)")
+RE_SEQ = re.compile(r"Seq Scan on (\w+)")
+
+
+async def _primeiro_id(session: AsyncSession, coluna):
+    return (await session.execute(select(coluna).limit(1))).scalar()
+
+
+async def capturar_queries(session: AsyncSession) -> List[Tuple[str, str, object]]:
+    capturadas: List[Tuple[str, str, object]] = []
+    atual = {"nome": ""}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            capturadas.append((atual["nome"], statement, parameters))
+
+    usuario_id = await _primeiro_id(session, ExecucaoTeste.responsavel_id)
+    projeto_id = await _primeiro_id(session, Projeto.id)
+    sistema_id = await _primeiro_id(session, Projeto.sistema_id)
+    ciclo_id = await _primeiro_id(session, CicloTeste.id)
+    caso_id = await _primeiro_id(session, CasoTeste.id)
+    execucao_id = await _primeiro_id(session, ExecucaoTeste.id)
+    token = await _primeiro_id(session, PasswordReset.token)
+
+    dashboard = DashboardRepository(session)
+    casos = CasoTesteRepository(session)
+    ciclos = CicloTesteRepository(session)
+    defeitos = DefeitoRepository(session)
+    execucoes = ExecucaoTesteRepository(session)
+    params = PageParams(limit=20)
+
+    chamadas = [
+        ("dashboard.kpis_gerais", lambda: dashboard.get_kpis_gerais(sistema_id)),
+        ("dashboard.status_execucao", lambda: dashboard.get_status_execucao_geral(sistema_id)),
+        ("dashboard.defeitos_severidade", lambda: dashboard.get_defeitos_por_severidade(sistema_id)),
+        ("dashboard.modulos_defeitos", lambda: dashboard.get_modulos_com_mais_defeitos(5, sistema_id)),
+        ("dashboard.runner_kpis", lambda: dashboard.get_runner_kpis(usuario_id)),
+        ("dashboard.runner_timeline", lambda: dashboard.get_runner_timeline(usuario_id)),
+        ("dashboard.velocidade", lambda: dashboard.get_performance_velocity(usuario_id)),
+        ("casos.listar_projeto", lambda: casos.get_all_by_projeto(projeto_id, params)),
+        ("casos.listar_responsavel", lambda: casos.get_all(params, responsavel_id=usuario_id)),
+        ("casos.listar_ciclo", lambda: casos.get_all(params, ciclo_id=ciclo_id)),
+        ("casos.get_by_id", lambda: casos.get_by_id(caso_id)),
+        ("ciclos.listar_projeto", lambda: ciclos.list_by_projeto(projeto_id, params)),
+        ("defeitos.listar", lambda: defeitos.get_all_with_details(params, projeto_id=projeto_id)),
+        ("defeitos.por_execucao", lambda: defeitos.get_by_execucao(execucao_id, params)),
+        ("execucoes.minhas", lambda: execucoes.get_minhas_execucoes(usuario_id, params)),
+        ("execucoes.minhas_pendentes", lambda: execucoes.get_minhas_execucoes(usuario_id, params, status="pendente")),
+        ("execucoes.pendencias_ciclo", lambda: execucoes.verificar_pendencias_ciclo(ciclo_id)),
+        ("execucoes.passos", lambda: execucoes.listar_passos(execucao_id)),
+        ("logs.listar", lambda: LogRepository(session).get_all()),
+        ("reset.por_token", lambda: PasswordResetRepository(session).get_by_token(token or "")),
+        ("reset.por_usuario", lambda: PasswordResetRepository(session).get_by_usuario_id(usuario_id)),
+        ("casos.delete", lambda: casos.delete(caso_id)),
+        ("projetos.delete", lambda: ProjetoRepository(session).delete(projeto_id)),
+    ]
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for nome, chamada in chamadas:
+            atual["nome"] = nome
+            try:
+                await chamada()
+            except Exception as e:
+                print(f"[{nome}] ignorada: {e}")
+                await session.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    return capturadas
+
+
+async def explicar(forcar_indices: bool = False):
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint")
+            queries = await capturar_queries(session)
+            await session.close()
+
+            if forcar_indices:
+                await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+            usados = set()
+            for nome, sql, parametros in queries:
+                try:
+                    plano = (await conn.exec_driver_sql(f"EXPLAIN {sql}", parametros)).scalars().all()
+                except Exception as e:
+                    print(f"[{nome}] EXPLAIN falhou: {e}")
+                    continue
+                texto = "\n".join(plano)
+                indices = sorted(set(RE_INDICE.findall(texto)))
+                seq = sorted(set(RE_SEQ.findall(texto)))
+                usados.update(indices)
+                print(f"[{nome}]")
+                print(f"    índices: {', '.join(indices) or '-'}")
+                if seq:
+                    print(f"    seq scan: {', '.join(seq)}")
+        finally:
+            await trans.rollback()
+
+    declarados = {i.name for t in Base.metadata.sorted_tables for i in t.indexes if i.name}
+    nao_usados = sorted(declarados - usados)
+    print("--- Índices declarados não usados por nenhuma query ---")
+    print("\n".join(nao_usados) if nao_usados else "nenhum")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(explicar("--forcar-indices" in sys.argv[1:]))
+    except Exception as e:
+        print(f"Execution Error: {e}")
+        sys.exit(1)
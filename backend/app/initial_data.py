@@ -9,6 +9,7 @@ from app.seeds.projetos import seed_projetos
 from app.seeds.ciclos import seed_ciclos
 from app.seeds.casos import seed_casos
 from app.seeds.execucoes import seed_execucoes
+from app.repositories.dashboard_rollup_repository import DashboardRollupRepository
 
 async def seed_db():
     async with AsyncSessionLocal() as session:
@@ -35,8 +36,8 @@ async def seed_db():
 
             await seed_execucoes(session)
 
-            # Final commit for all changes
-            await session.commit()
+            # Seeds write directly to the tables, so the dashboard rollup is rebuilt (commits everything)
+            await DashboardRollupRepository(session).reconstruir()
             print("--- Seed Completed Successfully! ---")
 
         except Exception as e:
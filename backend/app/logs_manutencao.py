@@ -0,0 +1,55 @@
+"""
+Manutenção de logs_sistema (partições mensais no Postgres).
+
+    python -m app.logs_manutencao particoes   # cria as partições do mês atual e das próximas LOG_PARTICOES_FUTURAS
+    python -m app.logs_manutencao retencao    # descarta partições mais antigas que LOG_RETENCAO_MESES
+
+A aplicação já roda as duas coisas no startup e depois uma vez por dia.
+"""
+import asyncio
+import logging
+import sys
+from typing import Optional
+from app.core.database import AsyncSessionLocal
+from app.core.manutencao import aguardar, trava_exclusiva
+from app.services.log_service import LogService
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_SEGUNDOS = 24 * 60 * 60
+
+async def particoes():
+    async with AsyncSessionLocal() as session:
+        criadas = await LogService(session).manter_particoes()
+        print(f"--- Partições criadas: {', '.join(criadas) or 'nenhuma'} ---")
+
+async def retencao():
+    async with AsyncSessionLocal() as session:
+        removidas = await LogService(session).aplicar_retencao()
+        print(f"--- Removido pela retenção: {', '.join(removidas) or 'nada'} ---")
+
+async def manter_periodicamente(intervalo: int = INTERVALO_SEGUNDOS, parar: Optional[asyncio.Event] = None):
+    """Tarefa de fundo do lifespan: garante partições e aplica a retenção (um worker por vez)."""
+    while not (parar and parar.is_set()):
+        try:
+            async with trava_exclusiva("manutencao:logs_sistema") as obtida:
+                if obtida:
+                    async with AsyncSessionLocal() as session:
+                        service = LogService(session)
+                        await service.manter_particoes()
+                        await service.aplicar_retencao()
+        except Exception as e:
+            logger.error(f"Falha na manutenção de logs_sistema: {e}")
+        await aguardar(parar, intervalo)
+
+if __name__ == "__main__":
+    comandos = {"particoes": particoes, "retencao": retencao}
+    comando = sys.argv[1] if len(sys.argv) > 1 else None
+    if comando not in comandos:
+        print(__doc__)
+        sys.exit(2)
+    try:
+        asyncio.run(comandos[comando]())
+    except Exception as e:
+        print(f"Execution Error: {e}")
+        sys.exit(1)
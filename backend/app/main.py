@@ -1,13 +1,25 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from app.core.config import settings
-from app.core.database import Base, engine
+from app.core.database import Base, engine, estatisticas_pool, replicas
+from app.core import admissao
+from app.core.auditoria import auditoria
+from app.core.derivados import derivados
+from app.logs_manutencao import manter_periodicamente as manter_logs
+from app.evidencias_manutencao import manter_periodicamente as manter_evidencias
+from app.sessoes_manutencao import manter_periodicamente as manter_sessoes
+from app.api.deps import get_current_active_user
 from app.api.v1.api import api_router
+from app.api.v1.endpoints import evidencias
+from app.schemas.usuario import UsuarioAutenticado
+import asyncio
 import os
 
-os.makedirs("evidencias", exist_ok=True)
+os.makedirs(settings.EVIDENCIAS_DIR, exist_ok=True)
+
+# no encerramento, quanto a rodada de manutenção em andamento pode levar antes de ser cancelada
+ESPERA_MANUTENCAO_SEGUNDOS = 30
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -17,7 +29,27 @@ async def lifespan(app: FastAPI):
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    auditoria.iniciar()
+    derivados.iniciar()
+    parar = asyncio.Event()
+    manutencoes = [
+        asyncio.create_task(manter_logs(parar=parar)),
+        asyncio.create_task(manter_evidencias(parar=parar)),
+        asyncio.create_task(manter_sessoes(parar=parar)),
+    ]
+    monitores = []
+    if replicas.replicas:
+        monitores.append(asyncio.create_task(replicas.monitorar(settings.DB_REPLICA_VERIFICACAO_SEGUNDOS)))
     yield
+    # a rodada em andamento termina (um DROP de partição ou o GC não são cortados no meio), até o limite
+    parar.set()
+    _, pendentes = await asyncio.wait(manutencoes, timeout=ESPERA_MANUTENCAO_SEGUNDOS)
+    for tarefa in [*pendentes, *monitores]:
+        tarefa.cancel()
+    await asyncio.gather(*manutencoes, *monitores, return_exceptions=True)
+    await auditoria.encerrar()
+    await derivados.encerrar()
+    await replicas.encerrar()
     await engine.dispose()
 
 app = FastAPI(
@@ -27,16 +59,21 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# antes do CORS: o 503 de carga também sai com os headers de CORS
+app.add_middleware(admissao.AdmissaoMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Next-Cursor", "X-Total-Estimado", "ETag", "Content-Range", "Accept-Ranges", "Content-Disposition", "Upload-Offset"],
 )
 
-app.mount("/evidencias", StaticFiles(directory="evidencias"), name="evidencias")
 app.include_router(api_router, prefix=settings.API_V1_STR)
+# fora do prefixo da API: as URLs de evidência já gravadas apontam para /evidencias/...
+app.include_router(evidencias.router, prefix="/evidencias", tags=["Evidências"])
 
 @app.get("/", summary="Endpoint raiz da API")
 def read_root():
@@ -44,4 +81,16 @@ def read_root():
 
 @app.get("/health", summary="Verifica a saúde da API")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/pool", summary="Conexões do pool do banco")
+def health_pool(current_user: UsuarioAutenticado = Depends(get_current_active_user)):
+    # detalhes internos de pool e admissão: só para admins
+    if current_user.nivel_acesso.nome != 'admin':
+        raise HTTPException(status_code=403, detail="Apenas admins podem ver o estado do pool.")
+    return {
+        "primario": estatisticas_pool(),
+        "replicas": [estatisticas_pool(replica) for replica in replicas.replicas],
+        "rodizio": replicas.estatisticas(),
+        "cargas": admissao.estatisticas(),
+    }
\ No newline at end of file
@@ -5,4 +5,8 @@ from .modulo import Modulo
 from .projeto import Projeto
 from .testing import (CasoTeste, CicloTeste, PassoCasoTeste, ExecucaoTeste, ExecucaoPasso, StatusExecucaoEnum, StatusPassoEnum)
 from .metrica import Metrica
-from .password_reset import PasswordReset
\ No newline at end of file
+from .password_reset import PasswordReset
+from .log import LogSistema
+from .dashboard_rollup import DashboardRollup
+from .evidencia import Evidencia, UploadEvidencia
+from .sessao import SessaoUsuario
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+# Dimensões guardadas no rollup. `chave` é o valor do enum correspondente.
+DIMENSAO_EXECUCAO_STATUS = "execucao_status"
+DIMENSAO_DEFEITO_STATUS = "defeito_status"
+DIMENSAO_DEFEITO_SEVERIDADE_ABERTO = "defeito_severidade_aberto"
+
+class DashboardRollup(Base):
+    """
+    Contadores pré-agregados do dashboard por projeto.
+    Mantidos pelos repositórios na mesma transação das escritas em
+    execuções e defeitos; sistema_id e modulo_id são cópias do projeto.
+    """
+    __tablename__ = "dashboard_rollup"
+
+    projeto_id = Column(Integer, ForeignKey("projetos.id", ondelete="CASCADE"), primary_key=True)
+    dimensao = Column(String(50), primary_key=True)
+    chave = Column(String(50), primary_key=True)
+
+    sistema_id = Column(Integer, nullable=False)
+    modulo_id = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_dashboard_rollup_sistema_dimensao', 'sistema_id', 'dimensao'),
+    )
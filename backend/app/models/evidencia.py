@@ -0,0 +1,60 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class Evidencia(Base):
+    """
+    Arquivo de evidência endereçado pelo conteúdo: o blob fica em
+    evidencias/<sha256[:2]>/<sha256><extensao> e é gravado uma única vez,
+    mesmo que anexado a vários passos e defeitos.
+
+    `referencias` conta quantas vezes o hash aparece nas colunas
+    ExecucaoPasso.evidencias e Defeito.evidencias; é mantido pelos
+    repositórios na mesma transação das escritas. Blobs com zero
+    referências há mais que a carência são removidos pelo GC.
+    """
+    __tablename__ = "evidencias"
+
+    sha256 = Column(String(64), primary_key=True)
+    tamanho = Column(BigInteger, nullable=False)
+    mime = Column(String(100), nullable=False)
+    extensao = Column(String(10), nullable=False)
+    referencias = Column(Integer, nullable=False, default=0, server_default="0")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_evidencias_referencias_updated', 'referencias', 'updated_at'),
+    )
+
+class UploadEvidencia(Base):
+    """
+    Sessão de upload retomável. Os bytes recebidos ficam no backend de
+    armazenamento (evidencias/.uploads/<id>.part no disco, um multipart
+    upload no S3) e `recebido` marca até onde o arquivo está confirmado:
+    depois de uma queda (ou de reiniciar o worker) o cliente consulta a
+    sessão e continua a partir desse offset, em qualquer nó. `referencia` e
+    `partes` guardam o que o backend precisa para juntar os trechos (no S3, o
+    UploadId e o ETag de cada parte). Ao concluir, o arquivo entra no
+    armazenamento por hash e a sessão é apagada.
+    """
+    __tablename__ = "evidencia_uploads"
+
+    id = Column(String(36), primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False)
+    passo_id = Column(Integer, ForeignKey("execucoes_passos.id", ondelete="CASCADE"), nullable=False)
+    nome_arquivo = Column(String(255), nullable=True)
+    content_type = Column(String(100), nullable=True)
+    tamanho = Column(BigInteger, nullable=False)
+    recebido = Column(BigInteger, nullable=False, default=0, server_default="0")
+    referencia = Column(String(1024), nullable=True)
+    partes = Column(JSONB, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_evidencia_uploads_updated_at', 'updated_at'),
+    )
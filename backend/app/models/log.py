@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,14 +6,24 @@ from app.core.database import Base
 class LogSistema(Base):
     __tablename__ = "logs_sistema"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # No Postgres a tabela é particionada por mês em created_at (PK física: id, created_at)
+    # e é criada pela migração e5b9c3d7a1f2; os índices abaixo existem na tabela-pai.
+    id = Column(Integer, primary_key=True)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=True)
     sistema_id = Column(Integer, ForeignKey("sistemas.id"), nullable=True)
     acao = Column(String)
     entidade = Column(String)
     entidade_id = Column(Integer, nullable=True)
     detalhes = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        Index('ix_logs_sistema_created_at_id', 'created_at', 'id'),
+        Index('ix_logs_sistema_sistema_created', 'sistema_id', 'created_at', 'id'),
+        Index('ix_logs_sistema_usuario_created', 'usuario_id', 'created_at', 'id'),
+        Index('ix_logs_sistema_entidade_created', 'entidade', 'created_at', 'id'),
+        Index('ix_logs_sistema_acao_created', 'acao', 'created_at', 'id'),
+    )
 
     usuario = relationship("Usuario")
-    sistema = relationship("Sistema")
\ No newline at end of file
+    sistema = relationship("Sistema")
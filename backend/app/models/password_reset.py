@@ -6,6 +6,6 @@ class PasswordReset(Base):
     __tablename__ = "password_resets"
     
     id = Column(Integer, primary_key=True)
-    id_usuario = Column(Integer, ForeignKey("usuarios.id"))
+    id_usuario = Column(Integer, ForeignKey("usuarios.id"), index=True)
     token = Column(String(255), unique=True, nullable=False)
     expira_em = Column(DateTime, nullable=False, default=lambda: datetime.utcnow() + timedelta(minutes=15))
\ No newline at end of file
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -28,6 +28,7 @@ class Projeto(Base):
 
     __table_args__ = (
         UniqueConstraint('modulo_id', 'nome', name='uq_projeto_por_modulo'),
+        Index('ix_projetos_sistema_id', 'sistema_id'),
     )
 
     modulo = relationship("Modulo", back_populates="projetos")
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class SessaoUsuario(Base):
+    """
+    Sessão de login renovável. O refresh token entregue ao cliente é
+    `<id>.<segredo>`; aqui fica só o SHA-256 do segredo, trocado a cada
+    renovação. Apresentar um segredo que já foi trocado indica token vazado
+    e encerra a sessão.
+    """
+    __tablename__ = "sessoes_usuario"
+
+    id = Column(String(36), primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("usuarios.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False)
+    # token_versao do usuário na abertura: trocar senha, nível ou status invalida a sessão
+    token_versao = Column(Integer, nullable=False)
+    expira_em = Column(DateTime(timezone=True), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_sessoes_usuario_expira_em', 'expira_em'),
+    )
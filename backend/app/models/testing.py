@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Enum, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -78,15 +78,21 @@ class CicloTeste(Base):
     
     casos = relationship("CasoTeste", back_populates="ciclo")
 
+    # Contagem de execuções por status, preenchida por instância pelo CicloTesteRepository
+    # com uma agregação agrupada (não carrega as execuções). None = não carregada.
+    progresso = None
+
+    @property
+    def testes_por_status(self):
+        return dict(self.progresso or {})
+
     @property
     def total_testes(self):
-        return len(self.execucoes) if self.execucoes else 0
+        return sum((self.progresso or {}).values())
 
     @property
     def testes_concluidos(self):
-        if not self.execucoes:
-            return 0
-        return sum(1 for e in self.execucoes if e.status_geral == StatusExecucaoEnum.fechado)
+        return (self.progresso or {}).get(StatusExecucaoEnum.fechado.value, 0)
     
 class CasoTeste(Base):
     __tablename__ = "casos_teste"
@@ -109,6 +115,9 @@ class CasoTeste(Base):
 
     __table_args__ = (
         UniqueConstraint('projeto_id', 'nome', name='uq_casoteste_nome_projeto'),
+        Index('ix_casos_teste_projeto_id', 'projeto_id', 'id'),
+        Index('ix_casos_teste_responsavel_id', 'responsavel_id'),
+        Index('ix_casos_teste_ciclo_id', 'ciclo_id'),
     )
 
     projeto = relationship("Projeto", back_populates="casos_teste")
@@ -152,6 +161,14 @@ class ExecucaoTeste(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index('ix_execucoes_teste_responsavel_status_updated', 'responsavel_id', 'status_geral', 'updated_at'),
+        Index('ix_execucoes_teste_responsavel_updated', 'responsavel_id', 'updated_at', 'id'),
+        Index('ix_execucoes_teste_ciclo_status', 'ciclo_teste_id', 'status_geral'),
+        Index('ix_execucoes_teste_caso_teste_id', 'caso_teste_id'),
+        Index('ix_execucoes_teste_updated_at', 'updated_at'),
+    )
+
     ciclo = relationship("CicloTeste", back_populates="execucoes")
     caso_teste = relationship("CasoTeste", back_populates="execucoes")
     responsavel = relationship("Usuario", back_populates="execucoes_atribuidas")
@@ -172,6 +189,11 @@ class ExecucaoPasso(Base):
     
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index('ix_execucoes_passos_execucao_status', 'execucao_teste_id', 'status'),
+        Index('ix_execucoes_passos_passo_caso_teste_id', 'passo_caso_teste_id'),
+    )
+
     execucao_pai = relationship("ExecucaoTeste", back_populates="passos_executados")
     passo_template = relationship("PassoCasoTeste", back_populates="execucoes_deste_passo")
 
@@ -190,4 +212,10 @@ class Defeito(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index('ix_defeitos_execucao_status', 'execucao_teste_id', 'status'),
+        # Parcial: o dashboard só conta defeitos que ainda não foram fechados
+        Index('ix_defeitos_abertos', 'severidade', 'execucao_teste_id', postgresql_where=text("status <> 'fechado'")),
+    )
+
     execucao = relationship("ExecucaoTeste", back_populates="defeitos")
\ No newline at end of file
@@ -14,6 +14,8 @@ class Usuario(Base):
     
     nivel_acesso_id = Column(Integer, ForeignKey("niveis_acesso.id"), nullable=False)
     ativo = Column(Boolean, default=True)
+    # incrementada ao trocar senha, nível ou status: tokens emitidos antes deixam de valer
+    token_versao = Column(Integer, nullable=False, default=0, server_default="0")
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
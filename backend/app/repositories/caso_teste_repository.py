@@ -1,50 +1,79 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from sqlalchemy import delete, update as sqlalchemy_update, desc, and_
-from typing import Sequence, Optional
-
-from app.models.testing import CasoTeste, PassoCasoTeste, ExecucaoTeste, StatusExecucaoEnum, ExecucaoPasso, Defeito
+from sqlalchemy import Row, delete, update as sqlalchemy_update, desc, and_, func
+from typing import Optional
+
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
+from app.models.testing import (
+    CasoTeste, CicloTeste, PassoCasoTeste, ExecucaoTeste, StatusExecucaoEnum, ExecucaoPasso, Defeito,
+    PrioridadeEnum, StatusCasoTesteEnum
+)
+from app.models.projeto import Projeto
 from app.models.usuario import Usuario
+from app.repositories.dashboard_rollup_repository import DashboardRollupRepository
+from app.repositories.evidencia_repository import EvidenciaRepository
 from app.schemas.caso_teste import CasoTesteCreate, CasoTesteUpdate
 
 class CasoTesteRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.rollup = DashboardRollupRepository(db)
+        self.evidencias = EvidenciaRepository(db)
 
     async def get_by_nome_projeto(self, nome: str, projeto_id: int) -> Optional[CasoTeste]:
         query = select(CasoTeste).where(CasoTeste.nome == nome, CasoTeste.projeto_id == projeto_id)
         result = await self.db.execute(query)
         return result.scalars().first()
     
-    async def get_all(self) -> Sequence[CasoTeste]:
-        query = (
-            select(CasoTeste)
-            .options(
-                selectinload(CasoTeste.passos),
-                selectinload(CasoTeste.responsavel).selectinload(Usuario.nivel_acesso),
-                selectinload(CasoTeste.ciclo),
-                selectinload(CasoTeste.projeto)
-            )
-            .order_by(CasoTeste.id.desc())
+    async def get_all(
+        self,
+        params: PageParams,
+        projeto_id: Optional[int] = None,
+        prioridade: Optional[PrioridadeEnum] = None,
+        status: Optional[StatusCasoTesteEnum] = None,
+        responsavel_id: Optional[int] = None,
+        ciclo_id: Optional[int] = None
+    ) -> Page:
+        # Projeção enxuta para listagens: só as colunas da tabela + nomes relacionados.
+        # O grafo completo (passos, responsável, ciclo) fica restrito ao get_by_id.
+        total_passos = (
+            select(func.count(PassoCasoTeste.id))
+            .where(PassoCasoTeste.caso_teste_id == CasoTeste.id)
+            .correlate(CasoTeste)
+            .scalar_subquery()
         )
-        result = await self.db.execute(query)
-        return result.scalars().all()
-    
-    async def get_all_by_projeto(self, projeto_id: int) -> Sequence[CasoTeste]:
         query = (
-            select(CasoTeste)
-            .options(
-                selectinload(CasoTeste.passos),
-                selectinload(CasoTeste.responsavel).selectinload(Usuario.nivel_acesso),
-                selectinload(CasoTeste.ciclo),
-                selectinload(CasoTeste.projeto)
+            select(
+                CasoTeste.id,
+                CasoTeste.projeto_id,
+                CasoTeste.nome,
+                CasoTeste.prioridade,
+                CasoTeste.status,
+                CasoTeste.responsavel_id,
+                CasoTeste.ciclo_id,
+                CasoTeste.created_at,
+                CasoTeste.updated_at,
+                Projeto.nome.label('projeto_nome'),
+                Usuario.nome.label('responsavel_nome'),
+                CicloTeste.nome.label('ciclo_nome'),
+                total_passos.label('total_passos')
             )
-            .where(CasoTeste.projeto_id == projeto_id)
-            .order_by(CasoTeste.id.desc())
+            .join(Projeto, CasoTeste.projeto_id == Projeto.id)
+            .outerjoin(Usuario, CasoTeste.responsavel_id == Usuario.id)
+            .outerjoin(CicloTeste, CasoTeste.ciclo_id == CicloTeste.id)
         )
-        result = await self.db.execute(query)
-        return result.scalars().all()
+        query = apply_filters(query, {
+            CasoTeste.projeto_id: projeto_id,
+            CasoTeste.prioridade: prioridade,
+            CasoTeste.status: status,
+            CasoTeste.responsavel_id: responsavel_id,
+            CasoTeste.ciclo_id: ciclo_id,
+        })
+        return await paginate(self.db, query, Keyset(CasoTeste.id), params, scalars=False)
+    
+    async def get_all_by_projeto(self, projeto_id: int, params: PageParams, **filtros) -> Page:
+        return await self.get_all(params, projeto_id=projeto_id, **filtros)
 
     async def get_by_id(self, caso_id: int) -> Optional[CasoTeste]:
         query = (
@@ -86,6 +115,7 @@ class CasoTesteRepository:
             )
             self.db.add(nova_execucao)
             await self.db.flush() 
+            await self.rollup.contabilizar_execucoes([nova_execucao.id])
 
             if passos_objs:
                 passos_execucao = [
@@ -121,6 +151,7 @@ class CasoTesteRepository:
             ids_para_deletar = [id_ for id_ in ids_no_banco if id_ not in incoming_ids]
 
             if ids_para_deletar:
+                await self.evidencias.descontar(ExecucaoPasso.evidencias, ExecucaoPasso.passo_caso_teste_id.in_(ids_para_deletar))
                 await self.db.execute(delete(ExecucaoPasso).where(ExecucaoPasso.passo_caso_teste_id.in_(ids_para_deletar)))
                 await self.db.execute(delete(PassoCasoTeste).where(PassoCasoTeste.id.in_(ids_para_deletar)))
 
@@ -165,11 +196,12 @@ class CasoTesteRepository:
                 self.db.add(execucao_ativa)
 
             if passos_data is not None:
-                await self.db.execute(
-                    delete(ExecucaoPasso)
-                    .where(ExecucaoPasso.execucao_teste_id == execucao_ativa.id)
-                    .where(ExecucaoPasso.passo_caso_teste_id.notin_(current_passos_ids))
+                removidos = (
+                    ExecucaoPasso.execucao_teste_id == execucao_ativa.id,
+                    ExecucaoPasso.passo_caso_teste_id.notin_(current_passos_ids)
                 )
+                await self.evidencias.descontar(ExecucaoPasso.evidencias, *removidos)
+                await self.db.execute(delete(ExecucaoPasso).where(*removidos))
                 subquery_existentes = select(ExecucaoPasso.passo_caso_teste_id).where(ExecucaoPasso.execucao_teste_id == execucao_ativa.id)
                 
                 query_passos_faltantes = select(PassoCasoTeste).where(
@@ -190,16 +222,28 @@ class CasoTesteRepository:
         await self.db.commit()
         return await self.get_by_id(caso_id)
 
-    async def delete(self, caso_id: int) -> bool:
-        execs = await self.db.execute(select(ExecucaoTeste.id).where(ExecucaoTeste.caso_teste_id == caso_id))
+    async def delete(self, caso_id: int) -> Optional[Row]:
+        """Remove o caso e dependências; devolve (nome, projeto_id) do caso removido ou None."""
+        # travadas (em ordem de id) antes do desconto no rollup
+        execs = await self.db.execute(
+            select(ExecucaoTeste.id)
+            .where(ExecucaoTeste.caso_teste_id == caso_id)
+            .order_by(ExecucaoTeste.id)
+            .with_for_update()
+        )
         execs_ids = execs.scalars().all()
 
         if execs_ids:
+            await self.rollup.contabilizar_execucoes(execs_ids, sinal=-1)
+            await self.evidencias.descontar_execucoes(execs_ids)
             await self.db.execute(delete(ExecucaoPasso).where(ExecucaoPasso.execucao_teste_id.in_(execs_ids)))
             await self.db.execute(delete(Defeito).where(Defeito.execucao_teste_id.in_(execs_ids)))
             await self.db.execute(delete(ExecucaoTeste).where(ExecucaoTeste.id.in_(execs_ids)))
 
         await self.db.execute(delete(PassoCasoTeste).where(PassoCasoTeste.caso_teste_id == caso_id))
-        result = await self.db.execute(delete(CasoTeste).where(CasoTeste.id == caso_id))
+        result = await self.db.execute(
+            delete(CasoTeste).where(CasoTeste.id == caso_id).returning(CasoTeste.nome, CasoTeste.projeto_id)
+        )
+        removido = result.first()
         await self.db.commit()
-        return result.rowcount > 0
\ No newline at end of file
+        return removido
\ No newline at end of file
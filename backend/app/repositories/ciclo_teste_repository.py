@@ -1,11 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy import delete, update as sqlalchemy_update
-from typing import Sequence, Optional
+from sqlalchemy import Row, delete, func, update as sqlalchemy_update
+from typing import Iterable, Optional
 
-from app.models.testing import CicloTeste, ExecucaoTeste
-from app.models.usuario import Usuario
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
+from app.models.testing import CicloTeste, ExecucaoTeste, StatusCicloEnum
 from app.schemas.ciclo_teste import CicloTesteCreate
 
 class CicloTesteRepository:
@@ -17,17 +16,25 @@ class CicloTesteRepository:
         result = await self.db.execute(query)
         return result.scalars().first()
 
-    async def list_by_projeto(self, projeto_id: int) -> Sequence[CicloTeste]:
+    async def _carregar_progresso(self, ciclos: Iterable[CicloTeste]) -> None:
+        ciclos = list(ciclos)
+        if not ciclos:
+            return
+
         query = (
-            select(CicloTeste)
-            .options(
-                selectinload(CicloTeste.execucoes).selectinload(ExecucaoTeste.responsavel)
-            )
-            .where(CicloTeste.projeto_id == projeto_id)
-            .order_by(CicloTeste.data_inicio.desc())
+            select(ExecucaoTeste.ciclo_teste_id, ExecucaoTeste.status_geral, func.count())
+            .where(ExecucaoTeste.ciclo_teste_id.in_([c.id for c in ciclos]))
+            .group_by(ExecucaoTeste.ciclo_teste_id, ExecucaoTeste.status_geral)
         )
-        result = await self.db.execute(query)
-        return result.unique().scalars().all()
+        progresso = {c.id: {} for c in ciclos}
+        for ciclo_id, status, total in (await self.db.execute(query)).all():
+            progresso[ciclo_id][getattr(status, "value", status)] = total
+
+        for ciclo in ciclos:
+            ciclo.progresso = progresso[ciclo.id]
+
+    async def list_by_projeto(self, projeto_id: int, params: PageParams, **filtros) -> Page[CicloTeste]:
+        return await self.get_all(params, projeto_id=projeto_id, **filtros)
 
     async def create(self, projeto_id: int, ciclo_data: CicloTesteCreate) -> CicloTeste:
         dados_ciclo = ciclo_data.model_dump(exclude={'projeto_id'})        
@@ -37,24 +44,26 @@ class CicloTesteRepository:
         return await self.get_by_id(db_ciclo.id)
 
     async def get_by_id(self, ciclo_id: int) -> Optional[CicloTeste]:
-        query = (
-            select(CicloTeste)
-            .options(selectinload(CicloTeste.execucoes).selectinload(ExecucaoTeste.responsavel))
-            .where(CicloTeste.id == ciclo_id)
-        )
+        query = select(CicloTeste).where(CicloTeste.id == ciclo_id)
         result = await self.db.execute(query)
-        return result.scalars().first()
+        ciclo = result.scalars().first()
+        if ciclo:
+            await self._carregar_progresso([ciclo])
+        return ciclo
     
-    async def get_all(self) -> Sequence[CicloTeste]:
-        query = (
-            select(CicloTeste)
-            .options(
-                selectinload(CicloTeste.execucoes).selectinload(ExecucaoTeste.responsavel)
-            )
-            .order_by(CicloTeste.data_inicio.desc())
-        )
-        result = await self.db.execute(query)
-        return result.unique().scalars().all()
+    async def get_all(
+        self,
+        params: PageParams,
+        projeto_id: Optional[int] = None,
+        status: Optional[StatusCicloEnum] = None
+    ) -> Page[CicloTeste]:
+        query = apply_filters(select(CicloTeste), {
+            CicloTeste.projeto_id: projeto_id,
+            CicloTeste.status: status,
+        })
+        page = await paginate(self.db, query, Keyset(CicloTeste.id), params)
+        await self._carregar_progresso(page.items)
+        return page
 
     async def update(self, ciclo_id: int, dados: dict) -> Optional[CicloTeste]:
         if not dados:
@@ -66,7 +75,11 @@ class CicloTesteRepository:
         await self.db.commit()
         return await self.get_by_id(ciclo_id)
 
-    async def delete(self, ciclo_id: int) -> bool:
-        result = await self.db.execute(delete(CicloTeste).where(CicloTeste.id == ciclo_id))
+    async def delete(self, ciclo_id: int) -> Optional[Row]:
+        """Devolve (nome, projeto_id) do ciclo removido ou None."""
+        result = await self.db.execute(
+            delete(CicloTeste).where(CicloTeste.id == ciclo_id).returning(CicloTeste.nome, CicloTeste.projeto_id)
+        )
+        removido = result.first()
         await self.db.commit()
-        return result.rowcount > 0
\ No newline at end of file
+        return removido
\ No newline at end of file
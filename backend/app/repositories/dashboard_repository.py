@@ -1,9 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, desc, case, or_
+from sqlalchemy import func, desc, case, or_, and_, true
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+import enum
 
+from app.models.dashboard_rollup import (
+    DashboardRollup,
+    DIMENSAO_EXECUCAO_STATUS, DIMENSAO_DEFEITO_STATUS, DIMENSAO_DEFEITO_SEVERIDADE_ABERTO
+)
 from app.models.modulo import Modulo
 from app.models.projeto import Projeto, StatusProjetoEnum
 from app.models.testing import (
@@ -14,190 +19,169 @@ from app.models.testing import (
 )
 from app.models.usuario import Usuario
 
+STATUS_FINALIZADOS = [StatusExecucaoEnum.fechado, StatusExecucaoEnum.falha, StatusExecucaoEnum.bloqueado]
+
 class DashboardRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_kpis_gerais(self, sistema_id: Optional[int] = None) -> Dict[str, Any]:
-        # --- 1. PROJETOS ---
-        q_projetos = select(func.count(Projeto.id)).where(Projeto.status == StatusProjetoEnum.ativo)
-        if sistema_id:
-            q_projetos = q_projetos.where(Projeto.sistema_id == sistema_id)
-
-        # --- 2. CICLOS ---
-        q_ciclos = select(func.count(CicloTeste.id)).join(Projeto).where(
-            CicloTeste.status.in_([StatusCicloEnum.em_execucao, StatusCicloEnum.planejado])
+    def _contar(self, condicao):
+        """
+        COUNT(*) FILTER (WHERE ...) no Postgres; nos demais bancos (SQLite)
+        cai para SUM(CASE ...), que dá o mesmo resultado.
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            return func.count().filter(condicao)
+        return func.coalesce(func.sum(case((condicao, 1), else_=0)), 0)
+
+    def _somar(self, condicao, coluna):
+        if self.db.get_bind().dialect.name == "postgresql":
+            return func.coalesce(func.sum(coluna).filter(condicao), 0)
+        return func.coalesce(func.sum(case((condicao, coluna), else_=0)), 0)
+
+    def _rollup(self, dimensao: str, chaves: List[enum.Enum]):
+        return self._somar(
+            and_(DashboardRollup.dimensao == dimensao, DashboardRollup.chave.in_([c.value for c in chaves])),
+            DashboardRollup.total
         )
-        if sistema_id:
-            q_ciclos = q_ciclos.where(Projeto.sistema_id == sistema_id)
 
-        # --- 3. CASOS DE TESTE ---
-        q_casos = select(func.count(CasoTeste.id)).join(Projeto)
+    async def get_kpis_gerais(self, sistema_id: Optional[int] = None) -> Dict[str, Any]:
+        # Uma única ida ao banco. Cadastros (projetos, ciclos, casos) são contados
+        # direto nas tabelas; execuções e defeitos vêm do dashboard_rollup, que não
+        # cresce com o histórico.
+        q_escopo = select(Projeto.id, Projeto.status)
         if sistema_id:
-            q_casos = q_casos.where(Projeto.sistema_id == sistema_id)
-
-        # --- 4. DEFEITOS ABERTOS ---
-        q_defeitos_abertos = (
-            select(func.count(Defeito.id))
-            .join(Defeito.execucao)
-            .join(ExecucaoTeste.caso_teste)
-            .join(CasoTeste.projeto)
-            .where(Defeito.status.in_([StatusDefeitoEnum.aberto, StatusDefeitoEnum.em_teste]))
+            q_escopo = q_escopo.where(Projeto.sistema_id == sistema_id)
+        escopo = q_escopo.cte("escopo_projetos")
+
+        # --- PROJETOS ---
+        projetos = (
+            select(self._contar(escopo.c.status == StatusProjetoEnum.ativo).label("total_projetos"))
+            .select_from(escopo)
+            .subquery()
         )
-        if sistema_id:
-            q_defeitos_abertos = q_defeitos_abertos.where(Projeto.sistema_id == sistema_id)
 
-        # --- 5. DEFEITOS CRITICOS/ALTOS ---
-        q_criticos = (
-            select(func.count(Defeito.id))
-            .join(Defeito.execucao)
-            .join(ExecucaoTeste.caso_teste)
-            .join(CasoTeste.projeto)
-            .where(
-                Defeito.status != StatusDefeitoEnum.fechado,
-                Defeito.severidade.in_([SeveridadeDefeitoEnum.critico, SeveridadeDefeitoEnum.alto])
-            )
+        # --- CICLOS ---
+        ciclos = (
+            select(func.count().label("total_ciclos_ativos"))
+            .select_from(CicloTeste)
+            .join(escopo, escopo.c.id == CicloTeste.projeto_id)
+            .where(CicloTeste.status.in_([StatusCicloEnum.em_execucao, StatusCicloEnum.planejado]))
+            .subquery()
         )
-        if sistema_id:
-            q_criticos = q_criticos.where(Projeto.sistema_id == sistema_id)
 
-        # --- 6. AGUARDANDO RETESTE (Defeitos corrigidos) ---
-        q_reteste = (
-            select(func.count(Defeito.id))
-            .join(Defeito.execucao)
-            .join(ExecucaoTeste.caso_teste)
-            .join(CasoTeste.projeto)
-            .where(Defeito.status == StatusDefeitoEnum.corrigido)
+        # --- CASOS DE TESTE ---
+        casos = (
+            select(func.count().label("total_casos_teste"))
+            .select_from(CasoTeste)
+            .join(escopo, escopo.c.id == CasoTeste.projeto_id)
+            .subquery()
         )
-        if sistema_id:
-            q_reteste = q_reteste.where(Projeto.sistema_id == sistema_id)
 
-        # --- 7. STATUS DE EXECUÇÃO (Para KPIs e Taxas) ---
-        #  Passou (fechado), Falhou (falha) e Pendentes separadamente
-        q_exec_stats = (
-            select(
-                func.sum(case((ExecucaoTeste.status_geral == StatusExecucaoEnum.fechado, 1), else_=0)), # Passou
-                func.sum(case((ExecucaoTeste.status_geral == StatusExecucaoEnum.falha, 1), else_=0)),   # Falhou
-                func.sum(case((ExecucaoTeste.status_geral.in_([StatusExecucaoEnum.pendente, StatusExecucaoEnum.em_progresso]), 1), else_=0)), # Pendente
-                func.sum(case((ExecucaoTeste.status_geral == StatusExecucaoEnum.bloqueado, 1), else_=0)) # Bloqueado
-            )
-            .join(ExecucaoTeste.caso_teste)
-            .join(CasoTeste.projeto)
+        # --- DEFEITOS E STATUS DE EXECUÇÃO (Para KPIs e Taxas) ---
+        q_rollup = select(
+            self._rollup(DIMENSAO_DEFEITO_STATUS, [StatusDefeitoEnum.aberto, StatusDefeitoEnum.em_teste]).label("total_defeitos_abertos"),
+            self._rollup(DIMENSAO_DEFEITO_SEVERIDADE_ABERTO, [SeveridadeDefeitoEnum.critico, SeveridadeDefeitoEnum.alto]).label("total_defeitos_criticos"),
+            self._rollup(DIMENSAO_DEFEITO_STATUS, [StatusDefeitoEnum.corrigido]).label("total_aguardando_reteste"),
+            self._rollup(DIMENSAO_EXECUCAO_STATUS, [StatusExecucaoEnum.fechado]).label("passed"),
+            self._rollup(DIMENSAO_EXECUCAO_STATUS, [StatusExecucaoEnum.falha]).label("failed"),
+            self._rollup(DIMENSAO_EXECUCAO_STATUS, [StatusExecucaoEnum.pendente, StatusExecucaoEnum.em_progresso]).label("total_pendentes"),
+            self._rollup(DIMENSAO_EXECUCAO_STATUS, [StatusExecucaoEnum.bloqueado]).label("total_bloqueados"),
         )
         if sistema_id:
-            q_exec_stats = q_exec_stats.where(Projeto.sistema_id == sistema_id)
-
-        # EXECUÇÃO DAS QUERIES
-        total_projetos = (await self.db.execute(q_projetos)).scalar() or 0
-        total_ciclos = (await self.db.execute(q_ciclos)).scalar() or 0
-        total_casos = (await self.db.execute(q_casos)).scalar() or 0
-        total_defeitos = (await self.db.execute(q_defeitos_abertos)).scalar() or 0
-        total_criticos = (await self.db.execute(q_criticos)).scalar() or 0
-        total_reteste_def = (await self.db.execute(q_reteste)).scalar() or 0
-        
-        exec_stats_result = (await self.db.execute(q_exec_stats)).first()
-        
-        passed = exec_stats_result[0] or 0
-        failed = exec_stats_result[1] or 0
-        pending = exec_stats_result[2] or 0
-        blocked = exec_stats_result[3] or 0
+            q_rollup = q_rollup.where(DashboardRollup.sistema_id == sistema_id)
+        rollup = q_rollup.subquery()
+
+        # Cada subquery devolve exatamente uma linha, o join em TRUE só as coloca lado a lado
+        query = select(projetos, ciclos, casos, rollup).select_from(
+            projetos
+            .join(ciclos, true())
+            .join(casos, true())
+            .join(rollup, true())
+        )
+        row = (await self.db.execute(query)).mappings().one()
+
+        passed = row["passed"] or 0
+        failed = row["failed"] or 0
 
-        
         total_executed_valid = passed + failed
         taxa = round((passed / total_executed_valid * 100), 1) if total_executed_valid > 0 else 0.0
 
-        total_aguardando_reteste = total_reteste_def
-
         return {
-            "total_projetos": total_projetos,
-            "total_ciclos_ativos": total_ciclos,
-            "total_casos_teste": total_casos,
+            "total_projetos": row["total_projetos"] or 0,
+            "total_ciclos_ativos": row["total_ciclos_ativos"] or 0,
+            "total_casos_teste": row["total_casos_teste"] or 0,
             "taxa_sucesso_ciclos": taxa,
-            "total_defeitos_abertos": total_defeitos,
-            "total_defeitos_criticos": total_criticos,
-            "total_pendentes": pending,
-            "total_bloqueados": blocked,
-            "total_aguardando_reteste": total_aguardando_reteste
+            "total_defeitos_abertos": row["total_defeitos_abertos"] or 0,
+            "total_defeitos_criticos": row["total_defeitos_criticos"] or 0,
+            "total_pendentes": row["total_pendentes"] or 0,
+            "total_bloqueados": row["total_bloqueados"] or 0,
+            "total_aguardando_reteste": row["total_aguardando_reteste"] or 0
         }
 
-    async def get_status_execucao_geral(self, sistema_id: Optional[int] = None) -> List[tuple]:
+    async def _get_rollup_por_chave(self, dimensao: str, sistema_id: Optional[int] = None) -> List[tuple]:
+        total = func.sum(DashboardRollup.total)
         query = (
-            select(ExecucaoTeste.status_geral, func.count(ExecucaoTeste.id))
-            .join(ExecucaoTeste.caso_teste)
-            .join(CasoTeste.projeto)
-            .group_by(ExecucaoTeste.status_geral)
+            select(DashboardRollup.chave, total)
+            .where(DashboardRollup.dimensao == dimensao)
+            .group_by(DashboardRollup.chave)
+            .having(total > 0)
         )
         if sistema_id:
-            query = query.where(Projeto.sistema_id == sistema_id)
-            
+            query = query.where(DashboardRollup.sistema_id == sistema_id)
+
         result = await self.db.execute(query)
         return result.all()
 
+    async def get_status_execucao_geral(self, sistema_id: Optional[int] = None) -> List[tuple]:
+        return await self._get_rollup_por_chave(DIMENSAO_EXECUCAO_STATUS, sistema_id)
+
     async def get_defeitos_por_severidade(self, sistema_id: Optional[int] = None) -> List[tuple]:
-        query = (
-            select(Defeito.severidade, func.count(Defeito.id))
-            .join(Defeito.execucao)
-            .join(ExecucaoTeste.caso_teste)
-            .join(CasoTeste.projeto)
-            .where(Defeito.status != StatusDefeitoEnum.fechado)
-            .group_by(Defeito.severidade)
-        )
-        if sistema_id:
-            query = query.where(Projeto.sistema_id == sistema_id)
-            
-        result = await self.db.execute(query)
-        return result.all()
+        return await self._get_rollup_por_chave(DIMENSAO_DEFEITO_SEVERIDADE_ABERTO, sistema_id)
     
     async def get_modulos_com_mais_defeitos(self, limit: int = 5, sistema_id: Optional[int] = None) -> List[tuple]:
+        total = func.sum(DashboardRollup.total)
         query = (
-            select(Modulo.nome, func.count(Defeito.id))
-            .select_from(Defeito)
-            .join(Defeito.execucao)
-            .join(ExecucaoTeste.caso_teste)
-            .join(CasoTeste.projeto)
-            .join(Projeto.modulo)
+            select(Modulo.nome, total)
+            .select_from(DashboardRollup)
+            .join(Modulo, Modulo.id == DashboardRollup.modulo_id)
+            .where(DashboardRollup.dimensao == DIMENSAO_DEFEITO_STATUS)
             .group_by(Modulo.nome)
-            .order_by(desc(func.count(Defeito.id)))
+            .having(total > 0)
+            .order_by(desc(total))
             .limit(limit)
         )
         
         if sistema_id:
-            query = query.where(Projeto.sistema_id == sistema_id)
+            query = query.where(DashboardRollup.sistema_id == sistema_id)
 
         result = await self.db.execute(query)
         return result.all()
 
     # --- metodos do runner ---
     async def get_runner_kpis(self, runner_id: int) -> Dict[str, Any]:
-        q_concluidos = select(func.count(ExecucaoTeste.id)).where(
-            ExecucaoTeste.responsavel_id == runner_id,
-            ExecucaoTeste.status_geral.in_([StatusExecucaoEnum.fechado, StatusExecucaoEnum.falha, StatusExecucaoEnum.bloqueado])
-        )
-
-        q_defeitos = select(func.count(Defeito.id)).join(Defeito.execucao).where(
-            ExecucaoTeste.responsavel_id == runner_id
-        )
-
-        q_fila = select(func.count(ExecucaoTeste.id)).where(
-            ExecucaoTeste.responsavel_id == runner_id,
-            ExecucaoTeste.status_geral == StatusExecucaoEnum.pendente
+        q_defeitos = (
+            select(func.count(Defeito.id))
+            .join(Defeito.execucao)
+            .where(ExecucaoTeste.responsavel_id == runner_id)
+            .scalar_subquery()
         )
 
-        q_last = select(func.max(ExecucaoTeste.updated_at)).where(
-            ExecucaoTeste.responsavel_id == runner_id
-        )
+        query = select(
+            self._contar(ExecucaoTeste.status_geral.in_(STATUS_FINALIZADOS)).label("total_concluidos"),
+            self._contar(ExecucaoTeste.status_geral == StatusExecucaoEnum.pendente).label("total_fila"),
+            func.max(ExecucaoTeste.updated_at).label("ultima_atividade"),
+            q_defeitos.label("total_defeitos"),
+        ).where(ExecucaoTeste.responsavel_id == runner_id)
 
-        total_concluidos = (await self.db.execute(q_concluidos)).scalar() or 0
-        total_defeitos = (await self.db.execute(q_defeitos)).scalar() or 0
-        total_fila = (await self.db.execute(q_fila)).scalar() or 0
-        ultima_atividade = (await self.db.execute(q_last)).scalar()
+        row = (await self.db.execute(query)).mappings().one()
 
         return {
-            "total_concluidos": total_concluidos,
-            "total_defeitos": total_defeitos,
+            "total_concluidos": row["total_concluidos"] or 0,
+            "total_defeitos": row["total_defeitos"] or 0,
             "tempo_medio_minutos": 0.0,
-            "total_fila": total_fila,
-            "ultima_atividade": ultima_atividade
+            "total_fila": row["total_fila"] or 0,
+            "ultima_atividade": row["ultima_atividade"]
         }
 
     async def get_status_distribution(self, runner_id: Optional[int] = None) -> List[tuple]:
@@ -277,46 +261,41 @@ class DashboardRepository:
         return result.all()
 
     async def get_team_stats_aggregates(self) -> Dict[str, Any]:
-        # 1. total de execucoes 
-        q_total_exec = select(func.count(ExecucaoTeste.id)).where(
-            ExecucaoTeste.status_geral.in_([StatusExecucaoEnum.fechado, StatusExecucaoEnum.falha, StatusExecucaoEnum.bloqueado])
+        q_defects = select(func.count(Defeito.id)).scalar_subquery()
+
+        query = select(
+            self._contar(ExecucaoTeste.status_geral.in_(STATUS_FINALIZADOS)).label("total_executions"),
+            self._contar(ExecucaoTeste.status_geral == StatusExecucaoEnum.fechado).label("passed_executions"),
+            q_defects.label("total_defects"),
         )
-        
-        # 2. execucoes aprovadas
-        q_passed = select(func.count(ExecucaoTeste.id)).where(ExecucaoTeste.status_geral == StatusExecucaoEnum.fechado)
-        
-        # 3. total de defeitos
-        q_defects = select(func.count(Defeito.id))
 
-        total_exec = (await self.db.execute(q_total_exec)).scalar() or 0
-        passed = (await self.db.execute(q_passed)).scalar() or 0
-        total_defects = (await self.db.execute(q_defects)).scalar() or 0
+        row = (await self.db.execute(query)).mappings().one()
 
         return {
-            "total_executions": total_exec,
-            "passed_executions": passed,
-            "total_defects": total_defects
+            "total_executions": row["total_executions"] or 0,
+            "passed_executions": row["passed_executions"] or 0,
+            "total_defects": row["total_defects"] or 0
         }
 
     async def get_user_stats_aggregates(self, user_id: int) -> Dict[str, Any]:
-        q_bugs = select(func.count(Defeito.id)).where(Defeito.criado_por_id == user_id)
-
-        q_execs = select(func.count(ExecucaoTeste.id)).where(
-            ExecucaoTeste.responsavel_id == user_id,
-            ExecucaoTeste.status_geral.in_([StatusExecucaoEnum.fechado, StatusExecucaoEnum.falha, StatusExecucaoEnum.bloqueado])
+        # Defeito não guarda autor: quem reporta é o responsável pela execução em que foi aberto
+        q_bugs = (
+            select(func.count(Defeito.id))
+            .join(Defeito.execucao)
+            .where(ExecucaoTeste.responsavel_id == user_id)
+            .scalar_subquery()
         )
 
-        q_blocked = select(func.count(ExecucaoTeste.id)).where(
-            ExecucaoTeste.responsavel_id == user_id,
-            ExecucaoTeste.status_geral == StatusExecucaoEnum.bloqueado
-        )
+        query = select(
+            self._contar(ExecucaoTeste.status_geral.in_(STATUS_FINALIZADOS)).label("total_executions"),
+            self._contar(ExecucaoTeste.status_geral == StatusExecucaoEnum.bloqueado).label("blocked_executions"),
+            q_bugs.label("reported_bugs"),
+        ).where(ExecucaoTeste.responsavel_id == user_id)
 
-        reported_bugs = (await self.db.execute(q_bugs)).scalar() or 0
-        total_execs = (await self.db.execute(q_execs)).scalar() or 0
-        blocked_execs = (await self.db.execute(q_blocked)).scalar() or 0
+        row = (await self.db.execute(query)).mappings().one()
 
         return {
-            "reported_bugs": reported_bugs,
-            "total_executions": total_execs,
-            "blocked_executions": blocked_execs
-        }
\ No newline at end of file
+            "reported_bugs": row["reported_bugs"] or 0,
+            "total_executions": row["total_executions"] or 0,
+            "blocked_executions": row["blocked_executions"] or 0
+        }
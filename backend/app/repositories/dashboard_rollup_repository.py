@@ -0,0 +1,191 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import String, cast, delete, event, func, insert, literal_column, text, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.dashboard_rollup import (
+    DashboardRollup,
+    DIMENSAO_EXECUCAO_STATUS, DIMENSAO_DEFEITO_STATUS, DIMENSAO_DEFEITO_SEVERIDADE_ABERTO
+)
+from app.models.projeto import Projeto
+from app.models.testing import CasoTeste, Defeito, ExecucaoTeste, StatusDefeitoEnum
+
+COLUNAS = ["projeto_id", "sistema_id", "modulo_id", "dimensao", "chave", "total"]
+
+# deltas da transação, por (projeto_id, dimensao, chave), gravados no commit
+_PENDENTE = "rollup:pendente"
+
+
+def _upsert(dialeto: str, linhas: List[Dict[str, Any]]):
+    insert_dialeto = postgresql.insert if dialeto == "postgresql" else sqlite.insert
+    stmt = insert_dialeto(DashboardRollup).values(linhas)
+    return stmt.on_conflict_do_update(
+        index_elements=[DashboardRollup.projeto_id, DashboardRollup.dimensao, DashboardRollup.chave],
+        set_={
+            "total": DashboardRollup.total + stmt.excluded.total,
+            "sistema_id": stmt.excluded.sistema_id,
+            "modulo_id": stmt.excluded.modulo_id,
+            "updated_at": func.now(),
+        },
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _gravar_pendente(session):
+    pendente = session.info.pop(_PENDENTE, None)
+    if not pendente:
+        return
+    # um único upsert, sempre na mesma ordem de chave: escritas concorrentes travam as
+    # linhas do rollup na mesma sequência e não entram em deadlock
+    linhas = [pendente[chave] for chave in sorted(pendente) if pendente[chave]["total"]]
+    if linhas:
+        session.execute(_upsert(session.get_bind().dialect.name, linhas))
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendente(session):
+    session.info.pop(_PENDENTE, None)
+
+
+class DashboardRollupRepository:
+    """
+    Mantém a tabela dashboard_rollup.
+
+    Os outros repositórios chamam `contabilizar_*` com sinal -1 antes de alterar
+    ou apagar linhas e com +1 depois de gravá-las, sempre antes do commit. Os
+    deltas se acumulam na sessão e são gravados num único upsert no commit,
+    então o rollup anda junto com a transação da escrita. As linhas de origem
+    precisam estar travadas (SELECT ... FOR UPDATE) antes do desconto: senão
+    duas escritas concorrentes descontam o mesmo status antigo.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # --- consultas de origem (mesma definição usada no rebuild e na verificação) ---
+
+    def _origem(self, dimensao: str, coluna, base, *filtros):
+        chave = cast(coluna, String(50))
+        query = (
+            select(
+                Projeto.id.label("projeto_id"),
+                Projeto.sistema_id,
+                Projeto.modulo_id,
+                literal_column(f"'{dimensao}'", String).label("dimensao"),
+                chave.label("chave"),
+                func.count().label("total"),
+            )
+            .select_from(base)
+        )
+        if base is Defeito:
+            query = query.join(ExecucaoTeste, ExecucaoTeste.id == Defeito.execucao_teste_id)
+        return (
+            query
+            .join(CasoTeste, CasoTeste.id == ExecucaoTeste.caso_teste_id)
+            .join(Projeto, Projeto.id == CasoTeste.projeto_id)
+            .where(*filtros)
+            .group_by(Projeto.id, Projeto.sistema_id, Projeto.modulo_id, chave)
+        )
+
+    def _origens_execucoes(self, *filtros):
+        return [self._origem(DIMENSAO_EXECUCAO_STATUS, ExecucaoTeste.status_geral, ExecucaoTeste, *filtros)]
+
+    def _origens_defeitos(self, *filtros):
+        return [
+            self._origem(DIMENSAO_DEFEITO_STATUS, Defeito.status, Defeito, *filtros),
+            self._origem(
+                DIMENSAO_DEFEITO_SEVERIDADE_ABERTO, Defeito.severidade, Defeito,
+                Defeito.status != StatusDefeitoEnum.fechado, *filtros
+            ),
+        ]
+
+    def _origens(self):
+        return self._origens_execucoes() + self._origens_defeitos()
+
+    # --- manutenção incremental ---
+
+    async def _aplicar(self, origens: list, sinal: int) -> None:
+        rows = (await self.db.execute(union_all(*origens))).mappings().all()
+        pendente = self.db.info.setdefault(_PENDENTE, {})
+        for row in rows:
+            if not row["total"]:
+                continue
+            chave = (row["projeto_id"], row["dimensao"], row["chave"] or "")
+            anterior = pendente.get(chave)
+            pendente[chave] = {**row, "total": row["total"] * sinal + (anterior["total"] if anterior else 0)}
+
+    async def contabilizar_execucoes(self, execucao_ids: Sequence[int], sinal: int = 1, com_defeitos: bool = True) -> None:
+        """Soma (+1) ou desconta (-1) o estado atual das execuções, e opcionalmente dos seus defeitos."""
+        if not execucao_ids:
+            return
+        origens = self._origens_execucoes(ExecucaoTeste.id.in_(execucao_ids))
+        if com_defeitos:
+            origens += self._origens_defeitos(Defeito.execucao_teste_id.in_(execucao_ids))
+        await self._aplicar(origens, sinal)
+
+    async def contabilizar_defeitos(self, defeito_ids: Sequence[int], sinal: int = 1) -> None:
+        if not defeito_ids:
+            return
+        await self._aplicar(self._origens_defeitos(Defeito.id.in_(defeito_ids)), sinal)
+
+    async def sincronizar_projeto(self, projeto_id: int) -> None:
+        """Recopia sistema_id/modulo_id quando o projeto muda de lugar."""
+        await self.db.execute(
+            update(DashboardRollup)
+            .where(DashboardRollup.projeto_id == projeto_id)
+            .values(
+                sistema_id=select(Projeto.sistema_id).where(Projeto.id == projeto_id).scalar_subquery(),
+                modulo_id=select(Projeto.modulo_id).where(Projeto.id == projeto_id).scalar_subquery(),
+            )
+        )
+
+    async def remover_projeto(self, projeto_id: int) -> None:
+        pendente = self.db.info.get(_PENDENTE, {})
+        for chave in [c for c in pendente if c[0] == projeto_id]:
+            del pendente[chave]
+        await self.db.execute(delete(DashboardRollup).where(DashboardRollup.projeto_id == projeto_id))
+
+    # --- rebuild e verificação ---
+
+    async def reconstruir(self) -> int:
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Segura as escritas incrementais até o rebuild terminar
+            await self.db.execute(text("LOCK TABLE dashboard_rollup IN EXCLUSIVE MODE"))
+
+        await self.db.execute(delete(DashboardRollup))
+        origem = union_all(*self._origens()).subquery()
+        await self.db.execute(
+            insert(DashboardRollup).from_select(COLUNAS, select(*[origem.c[c] for c in COLUNAS]))
+        )
+        await self.db.commit()
+
+        return (await self.db.execute(select(func.count()).select_from(DashboardRollup))).scalar() or 0
+
+    async def verificar(self) -> List[Dict[str, Any]]:
+        """Compara o rollup com a contagem feita nas tabelas de origem. Lista vazia = consistente."""
+        def indexar(rows):
+            return {
+                (r["projeto_id"], r["dimensao"], r["chave"]): (r["sistema_id"], r["modulo_id"], r["total"])
+                for r in rows if r["total"]
+            }
+
+        esperado = indexar((await self.db.execute(union_all(*self._origens()))).mappings().all())
+        armazenado = indexar(
+            (await self.db.execute(select(*[DashboardRollup.__table__.c[c] for c in COLUNAS]))).mappings().all()
+        )
+
+        divergencias = []
+        for chave in sorted(esperado.keys() | armazenado.keys(), key=str):
+            if esperado.get(chave) != armazenado.get(chave):
+                projeto_id, dimensao, valor = chave
+                divergencias.append({
+                    "projeto_id": projeto_id,
+                    "dimensao": dimensao,
+                    "chave": valor,
+                    "esperado": esperado.get(chave),
+                    "armazenado": armazenado.get(chave),
+                })
+        return divergencias
@@ -1,18 +1,22 @@
-from typing import Sequence, Optional, List
+from typing import Optional, List
 import json
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload, aliased
-from sqlalchemy import desc
 
-from app.models.testing import Defeito, ExecucaoTeste, CasoTeste, ExecucaoPasso
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
+from app.models.testing import Defeito, ExecucaoTeste, CasoTeste, ExecucaoPasso, StatusDefeitoEnum, SeveridadeDefeitoEnum
 from app.models.projeto import Projeto
 from app.models.usuario import Usuario
+from app.repositories.dashboard_rollup_repository import DashboardRollupRepository
+from app.repositories.evidencia_repository import EvidenciaRepository
 from app.schemas.defeito import DefeitoCreate, DefeitoUpdate
 
 class DefeitoRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.rollup = DashboardRollupRepository(db)
+        self.evidencias = EvidenciaRepository(db)
 
     def _get_load_options(self):
         return [
@@ -56,6 +60,9 @@ class DefeitoRepository:
         # 2. Criação
         novo_defeito = Defeito(**dados_dict)
         self.db.add(novo_defeito)
+        await self.db.flush()
+        await self.rollup.contabilizar_defeitos([novo_defeito.id])
+        await self.evidencias.ajustar_referencias(depois=[novo_defeito.evidencias])
         await self.db.commit()
         
         # 3. Recarrega
@@ -68,7 +75,8 @@ class DefeitoRepository:
         return result.scalars().first()
 
     async def update(self, id: int, dados: DefeitoUpdate) -> Optional[Defeito]:
-        defeito = await self.get_by_id(id)
+        # trava o defeito: status/severidade e evidências lidos aqui são descontados do rollup e das referências
+        defeito = await self.get_by_id(id, para_atualizar=True)
         if not defeito:
             return None
             
@@ -78,15 +86,22 @@ class DefeitoRepository:
         if 'evidencias' in update_data and isinstance(update_data['evidencias'], list):
              update_data['evidencias'] = json.dumps(update_data['evidencias'])
 
+        await self.rollup.contabilizar_defeitos([id], sinal=-1)
+        if 'evidencias' in update_data:
+            await self.evidencias.ajustar_referencias([defeito.evidencias], [update_data['evidencias']])
         for key, value in update_data.items():
             setattr(defeito, key, value)
+        await self.db.flush()
+        await self.rollup.contabilizar_defeitos([id])
             
         await self.db.commit()
         return await self.get_by_id(id)
 
     async def delete(self, id: int) -> bool:
-        defeito = await self.db.get(Defeito, id)
+        defeito = await self.db.get(Defeito, id, with_for_update=True)
         if defeito:
+            await self.rollup.contabilizar_defeitos([id], sinal=-1)
+            await self.evidencias.ajustar_referencias(antes=[defeito.evidencias])
             await self.db.delete(defeito)
             await self.db.commit()
             return True
@@ -94,27 +109,36 @@ class DefeitoRepository:
 
     # --- MÉTODOS DE LEITURA ---
 
-    async def get_by_id(self, id: int) -> Optional[Defeito]:
+    async def get_by_id(self, id: int, para_atualizar: bool = False) -> Optional[Defeito]:
         query = (
             select(Defeito)
             .options(*self._get_load_options())
             .where(Defeito.id == id)
         )
+        if para_atualizar:
+            query = query.with_for_update(of=Defeito).execution_options(populate_existing=True)
         result = await self.db.execute(query)
         return result.scalars().first()
 
     # Trazido da MAIN (Necessário para o Service)
-    async def get_by_execucao(self, execucao_id: int) -> Sequence[Defeito]:
+    async def get_by_execucao(self, execucao_id: int, params: PageParams) -> Page[Defeito]:
         query = (
             select(Defeito)
             .options(*self._get_load_options())
             .where(Defeito.execucao_teste_id == execucao_id)
         )
-        result = await self.db.execute(query)
-        return result.scalars().all()
+        return await paginate(self.db, query, Keyset(Defeito.id), params)
 
     # Mantido do HEAD (Essencial para a Tabela do Dashboard)
-    async def get_all_with_details(self, responsavel_id: Optional[int] = None):
+    async def get_all_with_details(
+        self,
+        params: PageParams,
+        responsavel_id: Optional[int] = None,
+        status: Optional[StatusDefeitoEnum] = None,
+        severidade: Optional[SeveridadeDefeitoEnum] = None,
+        projeto_id: Optional[int] = None,
+        ciclo_id: Optional[int] = None
+    ) -> Page:
         Runner = aliased(Usuario)  
         Manager = aliased(Usuario) 
 
@@ -139,11 +163,12 @@ class DefeitoRepository:
             .join(Projeto, CasoTeste.projeto_id == Projeto.id)
             .outerjoin(Runner, ExecucaoTeste.responsavel_id == Runner.id)
             .outerjoin(Manager, Projeto.responsavel_id == Manager.id)
-            .order_by(desc(Defeito.id))
         )
-
-        if responsavel_id:
-            query = query.where(ExecucaoTeste.responsavel_id == responsavel_id)
-
-        result = await self.db.execute(query)
-        return result.mappings().all()
\ No newline at end of file
+        query = apply_filters(query, {
+            ExecucaoTeste.responsavel_id: responsavel_id,
+            Defeito.status: status,
+            Defeito.severidade: severidade,
+            CasoTeste.projeto_id: projeto_id,
+            ExecucaoTeste.ciclo_teste_id: ciclo_id,
+        })
+        return await paginate(self.db, query, Keyset(Defeito.id), params, scalars=False)
\ No newline at end of file
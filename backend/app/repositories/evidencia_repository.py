@@ -0,0 +1,189 @@
+import json
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.evidencia import Evidencia
+from app.models.testing import CasoTeste, CicloTeste, Defeito, ExecucaoPasso, ExecucaoTeste, PassoCasoTeste
+
+_HASH = re.compile(r"[0-9a-f]{64}")
+
+def extrair_hashes(valor: Any) -> List[str]:
+    """
+    Hashes de blobs citados num valor de evidências (texto JSON, lista de URLs
+    ou None). URLs antigas, no formato {passo}_{uuid}, não têm hash e são ignoradas.
+    """
+    if not valor:
+        return []
+    if not isinstance(valor, str):
+        valor = json.dumps(valor)
+    return _HASH.findall(valor)
+
+class EvidenciaRepository:
+    """
+    Metadados dos blobs de evidência e a contagem de referências.
+
+    Os outros repositórios chamam `ajustar_referencias` (ou `descontar_*` antes
+    de apagar linhas) sempre que ExecucaoPasso.evidencias ou Defeito.evidencias
+    mudam, antes do commit, como fazem com o rollup do dashboard. O valor
+    antigo tem de ser lido com a linha travada (FOR UPDATE), senão duas edições
+    concorrentes descontam a mesma referência e o GC apaga um blob em uso.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, sha256: str) -> Optional[Evidencia]:
+        return await self.db.get(Evidencia, sha256)
+
+    async def registrar(self, sha256: str, tamanho: int, mime: str, extensao: str) -> Evidencia:
+        """
+        Cria o registro do blob ou, se já existir, só renova updated_at (o que
+        tira o blob da janela do GC). Faz commit: o arquivo só deve ser movido
+        para o lugar definitivo depois disto.
+        """
+        dialeto = self.db.get_bind().dialect.name
+        insert_dialeto = postgresql.insert if dialeto == "postgresql" else sqlite.insert
+        stmt = insert_dialeto(Evidencia).values(sha256=sha256, tamanho=tamanho, mime=mime, extensao=extensao)
+        stmt = stmt.on_conflict_do_update(index_elements=[Evidencia.sha256], set_={"updated_at": func.now()})
+        await self.db.execute(stmt)
+        await self.db.commit()
+        return await self.db.get(Evidencia, sha256, populate_existing=True)
+
+    # --- contagem de referências ---
+
+    async def ajustar_referencias(self, antes: Iterable[Any] = (), depois: Iterable[Any] = ()) -> None:
+        """Aplica a diferença de referências entre os valores antigos e os novos das colunas de evidências."""
+        delta = Counter()
+        for valor in depois:
+            delta.update(extrair_hashes(valor))
+        for valor in antes:
+            delta.subtract(extrair_hashes(valor))
+
+        por_delta: Dict[int, List[str]] = {}
+        for sha256, n in delta.items():
+            if n:
+                por_delta.setdefault(n, []).append(sha256)
+        if por_delta:
+            # trava antes, em ordem de hash: os UPDATEs abaixo (um por delta) travariam na ordem do plano
+            alterados = sorted(h for hashes in por_delta.values() for h in hashes)
+            await self.db.execute(
+                select(Evidencia.sha256).where(Evidencia.sha256.in_(alterados)).order_by(Evidencia.sha256).with_for_update()
+            )
+        for n, hashes in por_delta.items():
+            await self.db.execute(
+                update(Evidencia)
+                .where(Evidencia.sha256.in_(hashes))
+                .values(referencias=Evidencia.referencias + n)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def descontar(self, coluna, *filtros) -> None:
+        """Desconta as referências das linhas que vão ser apagadas, limpas ou regravadas (travando-as até o commit)."""
+        query = select(coluna).where(*filtros).order_by(coluna.class_.id).with_for_update()
+        textos = (await self.db.execute(query)).scalars().all()
+        await self.ajustar_referencias(antes=textos)
+
+    async def descontar_execucoes(self, execucao_ids: Iterable[int]) -> None:
+        """Passos e defeitos das execuções que vão ser apagadas."""
+        execucao_ids = list(execucao_ids)
+        if not execucao_ids:
+            return
+        await self.descontar(ExecucaoPasso.evidencias, ExecucaoPasso.execucao_teste_id.in_(execucao_ids))
+        await self.descontar(Defeito.evidencias, Defeito.execucao_teste_id.in_(execucao_ids))
+
+    # --- recontagem e GC ---
+
+    async def recontar(self) -> List[Dict[str, Any]]:
+        """
+        Recalcula `referencias` a partir das colunas de origem e corrige as
+        divergências. Devolve o que foi corrigido.
+        """
+        contagem = Counter()
+        for coluna in (ExecucaoPasso.evidencias, Defeito.evidencias):
+            result = await self.db.stream(select(coluna).where(coluna.isnot(None)).execution_options(yield_per=1000))
+            async for texto in result.scalars():
+                contagem.update(extrair_hashes(texto))
+
+        armazenado = dict((await self.db.execute(select(Evidencia.sha256, Evidencia.referencias))).all())
+        divergencias = [
+            {"sha256": h, "esperado": contagem.get(h, 0), "armazenado": n}
+            for h, n in armazenado.items() if contagem.get(h, 0) != n
+        ]
+        for d in divergencias:
+            await self.db.execute(
+                update(Evidencia).where(Evidencia.sha256 == d["sha256"]).values(referencias=d["esperado"])
+            )
+        await self.db.commit()
+        return divergencias
+
+    async def orfas(self, carencia: timedelta, limite: int = 500) -> List[Evidencia]:
+        """
+        Blobs sem referência há mais que `carencia`, travados até o commit para
+        que um upload do mesmo conteúdo espere o GC terminar.
+        """
+        corte = datetime.now(timezone.utc) - carencia
+        query = (
+            select(Evidencia)
+            .where(Evidencia.referencias <= 0, Evidencia.updated_at < corte)
+            .order_by(Evidencia.updated_at)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+        )
+        return list((await self.db.execute(query)).scalars().all())
+
+    # --- listagens para o pacote ZIP (keyset por id, uma página por consulta) ---
+
+    async def escopo_existe(self, escopo: str, id: int) -> bool:
+        modelo = {"ciclo": CicloTeste, "execucao": ExecucaoTeste, "defeito": Defeito}[escopo]
+        return (await self.db.execute(select(modelo.id).where(modelo.id == id))).first() is not None
+
+    async def pagina_passos(self, escopo: str, id: int, depois_de: int, limite: int) -> List[Any]:
+        """Passos executados com evidência, com caso e execução, para o ciclo ou a execução."""
+        filtro = ExecucaoTeste.ciclo_teste_id == id if escopo == "ciclo" else ExecucaoTeste.id == id
+        query = (
+            select(
+                ExecucaoPasso.id, ExecucaoPasso.evidencias, ExecucaoPasso.status, ExecucaoPasso.updated_at,
+                PassoCasoTeste.ordem, ExecucaoTeste.id.label("execucao_id"), ExecucaoTeste.status_geral,
+                CasoTeste.id.label("caso_id"), CasoTeste.nome.label("caso_nome"),
+            )
+            .join(ExecucaoTeste, ExecucaoPasso.execucao_teste_id == ExecucaoTeste.id)
+            .join(CasoTeste, ExecucaoTeste.caso_teste_id == CasoTeste.id)
+            .join(PassoCasoTeste, ExecucaoPasso.passo_caso_teste_id == PassoCasoTeste.id)
+            .where(filtro, ExecucaoPasso.evidencias.isnot(None), ExecucaoPasso.evidencias.notin_(["", "[]"]))
+            .where(ExecucaoPasso.id > depois_de)
+            .order_by(ExecucaoPasso.id)
+            .limit(limite)
+        )
+        return list((await self.db.execute(query)).all())
+
+    async def pagina_defeitos(self, escopo: str, id: int, depois_de: int, limite: int) -> List[Any]:
+        filtros = {
+            "ciclo": ExecucaoTeste.ciclo_teste_id == id,
+            "execucao": ExecucaoTeste.id == id,
+            "defeito": Defeito.id == id,
+        }
+        query = (
+            select(
+                Defeito.id, Defeito.evidencias, Defeito.titulo, Defeito.status, Defeito.created_at,
+                ExecucaoTeste.id.label("execucao_id"), ExecucaoTeste.status_geral,
+                CasoTeste.id.label("caso_id"), CasoTeste.nome.label("caso_nome"),
+            )
+            .join(ExecucaoTeste, Defeito.execucao_teste_id == ExecucaoTeste.id)
+            .join(CasoTeste, ExecucaoTeste.caso_teste_id == CasoTeste.id)
+            .where(filtros[escopo], Defeito.evidencias.isnot(None), Defeito.evidencias.notin_(["", "[]"]))
+            .where(Defeito.id > depois_de)
+            .order_by(Defeito.id)
+            .limit(limite)
+        )
+        return list((await self.db.execute(query)).all())
+
+    async def remover(self, hashes: List[str]) -> None:
+        if hashes:
+            await self.db.execute(delete(Evidencia).where(Evidencia.sha256.in_(hashes)))
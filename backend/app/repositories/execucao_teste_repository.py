@@ -1,20 +1,28 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import update
+from sqlalchemy import update, insert, func, literal, case, exists
 from sqlalchemy.orm import selectinload
-from typing import Sequence, Optional
+from typing import Sequence, Optional, List, Dict, Tuple
 import json # <--- Importar json
 
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
 from app.models.testing import (
     ExecucaoTeste, ExecucaoPasso, PassoCasoTeste, 
-    CasoTeste, StatusExecucaoEnum, StatusPassoEnum
+    CasoTeste, StatusExecucaoEnum, StatusPassoEnum,
+    StatusCasoTesteEnum, PrioridadeEnum
 )
 from app.models.usuario import Usuario
+from app.repositories.dashboard_rollup_repository import DashboardRollupRepository
+from app.repositories.evidencia_repository import EvidenciaRepository
 from app.schemas.execucao_teste import ExecucaoPassoUpdate
 
 class ExecucaoTesteRepository:
+    TAMANHO_BLOCO = 1000
+
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.rollup = DashboardRollupRepository(db)
+        self.evidencias = EvidenciaRepository(db)
 
     async def verificar_pendencias_ciclo(self, ciclo_id: int) -> bool:
         query = select(ExecucaoTeste).where(
@@ -33,6 +41,7 @@ class ExecucaoTesteRepository:
         )
         self.db.add(nova_exec)
         await self.db.flush() 
+        await self.rollup.contabilizar_execucoes([nova_exec.id])
 
         query_passos = select(PassoCasoTeste.id).where(PassoCasoTeste.caso_teste_id == caso_id)
         passos_ids = (await self.db.execute(query_passos)).scalars().all()
@@ -52,6 +61,121 @@ class ExecucaoTesteRepository:
         await self.db.commit()
         return await self.get_by_id(nova_exec.id)
 
+    async def alocar_em_lote(
+        self,
+        ciclo_id: int,
+        caso_ids: Optional[List[int]] = None,
+        projeto_id: Optional[int] = None,
+        status_caso: Optional[StatusCasoTesteEnum] = None,
+        prioridade: Optional[PrioridadeEnum] = None,
+        responsavel_fixo_id: Optional[int] = None,
+        rodizio_ids: Optional[List[int]] = None,
+    ) -> Dict[str, int]:
+        """
+        Cria as execuções (e seus passos) de todos os casos selecionados com
+        INSERT ... SELECT, numa transação. Casos que já têm execução neste ciclo
+        são ignorados. Sem responsável fixo/rodízio, usa o responsável do caso
+        (casos sem responsável ficam de fora). Uma lista de `caso_ids` é
+        processada em blocos, em ordem de id (o rodízio continua de um bloco
+        para o outro).
+        """
+        filtros = []
+        if projeto_id is not None:
+            filtros.append(CasoTeste.projeto_id == projeto_id)
+        if status_caso is not None:
+            filtros.append(CasoTeste.status == status_caso)
+        if prioridade is not None:
+            filtros.append(CasoTeste.prioridade == prioridade)
+
+        if caso_ids is None:
+            blocos_casos = [[]]
+        else:
+            caso_ids = sorted(set(caso_ids))
+            blocos_casos = [caso_ids[i:i + self.TAMANHO_BLOCO] for i in range(0, len(caso_ids), self.TAMANHO_BLOCO)]
+
+        total_selecionados = 0
+        novos_ids: List[int] = []
+        for bloco_casos in blocos_casos:
+            filtros_bloco = filtros + [CasoTeste.id.in_(bloco_casos)] if caso_ids is not None else filtros
+            total_selecionados += (
+                await self.db.execute(select(func.count()).select_from(CasoTeste).where(*filtros_bloco))
+            ).scalar() or 0
+            selecao = self._selecao_alocacao(ciclo_id, filtros_bloco, responsavel_fixo_id, rodizio_ids, len(novos_ids))
+            stmt = (
+                insert(ExecucaoTeste)
+                .from_select(["caso_teste_id", "responsavel_id", "ciclo_teste_id", "status_geral"], selecao)
+                .returning(ExecucaoTeste.id)
+            )
+            novos_ids.extend((await self.db.execute(stmt)).scalars().all())
+
+        passos_criados = 0
+        # Em blocos para não estourar o limite de parâmetros do driver
+        for i in range(0, len(novos_ids), self.TAMANHO_BLOCO):
+            bloco = novos_ids[i:i + self.TAMANHO_BLOCO]
+            selecao_passos = (
+                select(
+                    ExecucaoTeste.id,
+                    PassoCasoTeste.id,
+                    literal(StatusPassoEnum.pendente, ExecucaoPasso.status.type),
+                    literal(""),
+                    literal("[]"),
+                )
+                .join(PassoCasoTeste, PassoCasoTeste.caso_teste_id == ExecucaoTeste.caso_teste_id)
+                .where(ExecucaoTeste.id.in_(bloco))
+            )
+            result = await self.db.execute(
+                insert(ExecucaoPasso).from_select(
+                    ["execucao_teste_id", "passo_caso_teste_id", "status", "resultado_obtido", "evidencias"],
+                    selecao_passos
+                )
+            )
+            passos_criados += result.rowcount
+            await self.rollup.contabilizar_execucoes(bloco)
+
+        await self.db.commit()
+
+        return {
+            "casos_selecionados": total_selecionados,
+            "execucoes_criadas": len(novos_ids),
+            "passos_criados": passos_criados,
+            "casos_ignorados": total_selecionados - len(novos_ids),
+        }
+
+    def _selecao_alocacao(
+        self,
+        ciclo_id: int,
+        filtros: list,
+        responsavel_fixo_id: Optional[int],
+        rodizio_ids: Optional[List[int]],
+        deslocamento: int,
+    ):
+        """SELECT (caso, responsável, ciclo, status) dos casos ainda sem execução no ciclo."""
+        ja_alocado = exists().where(
+            ExecucaoTeste.ciclo_teste_id == ciclo_id,
+            ExecucaoTeste.caso_teste_id == CasoTeste.id
+        )
+        candidatos = select(CasoTeste.id.label("caso_id"), CasoTeste.responsavel_id).where(*filtros, ~ja_alocado)
+
+        if rodizio_ids:
+            ordem = candidatos.add_columns(
+                ((func.row_number().over(order_by=CasoTeste.id) - 1 + deslocamento) % len(rodizio_ids)).label("posicao")
+            ).subquery()
+            responsavel = case(
+                *[(ordem.c.posicao == i, rid) for i, rid in enumerate(rodizio_ids)]
+            )
+            selecao = select(ordem.c.caso_id, responsavel)
+        elif responsavel_fixo_id is not None:
+            base = candidatos.subquery()
+            selecao = select(base.c.caso_id, literal(responsavel_fixo_id))
+        else:
+            base = candidatos.where(CasoTeste.responsavel_id.isnot(None)).subquery()
+            selecao = select(base.c.caso_id, base.c.responsavel_id)
+
+        return selecao.add_columns(
+            literal(ciclo_id),
+            literal(StatusExecucaoEnum.pendente, ExecucaoTeste.status_geral.type)
+        )
+
     async def get_by_id(self, id: int) -> Optional[ExecucaoTeste]:
         query = (
             select(ExecucaoTeste)
@@ -73,10 +197,10 @@ class ExecucaoTesteRepository:
     async def get_minhas_execucoes(
         self, 
         usuario_id: int, 
+        params: PageParams,
         status: Optional[StatusExecucaoEnum] = None,
-        skip: int = 0,
-        limit: int = 20
-    ) -> Sequence[ExecucaoTeste]:
+        ciclo_id: Optional[int] = None
+    ) -> Page[ExecucaoTeste]:
         
         query = (
             select(ExecucaoTeste)
@@ -92,45 +216,169 @@ class ExecucaoTesteRepository:
             )
             .where(ExecucaoTeste.responsavel_id == usuario_id)
         )
-
-        if status:
-            query = query.where(ExecucaoTeste.status_geral == status)
-
-        query = query.order_by(ExecucaoTeste.updated_at.desc()).offset(skip).limit(limit)
-            
-        result = await self.db.execute(query)
-        return result.scalars().all()
+        query = apply_filters(query, {
+            ExecucaoTeste.status_geral: status,
+            ExecucaoTeste.ciclo_teste_id: ciclo_id,
+        })
+        return await paginate(self.db, query, Keyset(ExecucaoTeste.updated_at, ExecucaoTeste.id), params)
 
     async def get_execucao_passo(self, passo_id: int) -> Optional[ExecucaoPasso]:
         return await self.db.get(ExecucaoPasso, passo_id)
 
     # --- CORREÇÃO AQUI ---
     async def update_passo(self, passo_id: int, data: ExecucaoPassoUpdate) -> Optional[ExecucaoPasso]:
-        passo = await self.db.get(ExecucaoPasso, passo_id)
-        
-        if passo:
-            update_data = data.model_dump(exclude_unset=True)
-            
-            # TRATAMENTO DE EVIDÊNCIAS: Se vier como lista, converte para JSON String
-            if 'evidencias' in update_data:
-                ev = update_data['evidencias']
-                if isinstance(ev, list):
-                    update_data['evidencias'] = json.dumps(ev)
-            
-            for k, v in update_data.items():
-                setattr(passo, k, v)
-            
-            await self.db.commit()
-            
-            query = (
-                select(ExecucaoPasso)
-                .options(selectinload(ExecucaoPasso.passo_template))
+        """
+        Grava o passo e consolida o status da execução na mesma transação,
+        sem carregar a execução: trava a execução, faz o UPDATE no passo e
+        depois `recalcular_status`, que só escreve se o status mudar.
+        """
+        execucao_id = (await self.db.execute(
+            select(ExecucaoPasso.execucao_teste_id).where(ExecucaoPasso.id == passo_id)
+        )).scalar()
+        if execucao_id is None:
+            return None
+        await self.travar_execucoes([execucao_id])
+
+        update_data = data.model_dump(exclude_unset=True)
+
+        # TRATAMENTO DE EVIDÊNCIAS: Se vier como lista, converte para JSON String
+        if 'evidencias' in update_data:
+            ev = update_data['evidencias']
+            if isinstance(ev, list):
+                update_data['evidencias'] = json.dumps(ev)
+
+        evidencias_antes = None
+        if 'evidencias' in update_data:
+            evidencias_antes = (await self.db.execute(
+                select(ExecucaoPasso.evidencias).where(ExecucaoPasso.id == passo_id).with_for_update()
+            )).scalar()
+
+        if update_data:
+            await self.db.execute(
+                update(ExecucaoPasso)
                 .where(ExecucaoPasso.id == passo_id)
+                .values(**update_data)
+                .execution_options(synchronize_session=False)
             )
-            result = await self.db.execute(query)
-            return result.scalars().first()
-            
-        return None
+
+        if 'evidencias' in update_data:
+            await self.evidencias.ajustar_referencias([evidencias_antes], [update_data['evidencias']])
+        await self.recalcular_status([execucao_id])
+        await self.db.commit()
+
+        query = (
+            select(ExecucaoPasso)
+            .options(selectinload(ExecucaoPasso.passo_template))
+            .where(ExecucaoPasso.id == passo_id)
+            .execution_options(populate_existing=True)
+        )
+        result = await self.db.execute(query)
+        return result.scalars().first()
+
+    async def travar_execucoes(self, execucao_ids: Sequence[int]) -> None:
+        """
+        SELECT ... FOR UPDATE nas execuções, em ordem de id, antes de qualquer
+        escrita nos passos delas. Gravações concorrentes na mesma execução
+        ficam em fila, e cada uma recalcula o status já vendo os passos
+        gravados pela anterior. A ordem fixa (execução antes de passo, id
+        crescente) é a mesma de `update_status` e evita deadlocks entre lotes.
+        """
+        await self.db.execute(
+            select(ExecucaoTeste.id)
+            .where(ExecucaoTeste.id.in_(execucao_ids))
+            .order_by(ExecucaoTeste.id)
+            .with_for_update()
+        )
+
+    async def get_execucoes_dos_passos(self, passo_ids: Sequence[int]) -> Dict[int, int]:
+        """Mapa passo_id -> execucao_teste_id dos passos que existem."""
+        query = select(ExecucaoPasso.id, ExecucaoPasso.execucao_teste_id).where(ExecucaoPasso.id.in_(passo_ids))
+        return dict((await self.db.execute(query)).all())
+
+    async def update_passos_em_lote(
+        self, linhas: List[Dict], execucao_ids: Sequence[int]
+    ) -> Tuple[List[ExecucaoPasso], List[Tuple[int, StatusExecucaoEnum]]]:
+        """
+        Grava vários passos num UPDATE em lote por chave primária (cada linha é
+        um dict com `id` e só os campos enviados) e recalcula uma única vez o
+        status das execuções afetadas, tudo numa transação.
+        """
+        await self.travar_execucoes(execucao_ids)
+        # ordem de id, estável: repetições do mesmo passo mantêm a ordem do lote
+        linhas = sorted(linhas, key=lambda linha: linha['id'])
+        for linha in linhas:
+            ev = linha.get('evidencias')
+            if isinstance(ev, list):
+                linha['evidencias'] = json.dumps(ev)
+
+        com_evidencias = [linha for linha in linhas if 'evidencias' in linha]
+        if com_evidencias:
+            await self.evidencias.descontar(
+                ExecucaoPasso.evidencias, ExecucaoPasso.id.in_({linha['id'] for linha in com_evidencias})
+            )
+
+        await self.db.execute(update(ExecucaoPasso), linhas)
+
+        if com_evidencias:
+            # repetições do mesmo passo no lote: vale a última, como no UPDATE
+            finais = {linha['id']: linha['evidencias'] for linha in com_evidencias}
+            await self.evidencias.ajustar_referencias(depois=finais.values())
+        alteradas = await self.recalcular_status(execucao_ids)
+        await self.db.commit()
+
+        query = (
+            select(ExecucaoPasso)
+            .options(selectinload(ExecucaoPasso.passo_template))
+            .where(ExecucaoPasso.id.in_({linha['id'] for linha in linhas}))
+            .order_by(ExecucaoPasso.id)
+            .execution_options(populate_existing=True)
+        )
+        passos = (await self.db.execute(query)).scalars().all()
+        return list(passos), alteradas
+
+    async def recalcular_status(self, execucao_ids: Sequence[int]) -> List[Tuple[int, StatusExecucaoEnum]]:
+        """
+        Consolida o status_geral das execuções a partir dos seus passos, em SQL:
+        todos aprovados -> fechado; algum reprovado -> em_progresso; pendente com
+        passos lançados -> em_progresso. Só atualiza (e devolve) as execuções cujo
+        status muda. Não faz commit.
+        """
+        if not execucao_ids:
+            return []
+
+        def passo_da_execucao(*cond):
+            return exists().where(ExecucaoPasso.execucao_teste_id == ExecucaoTeste.id, *cond)
+
+        tipo = ExecucaoTeste.status_geral.type
+        novo = case(
+            (~passo_da_execucao(ExecucaoPasso.status != StatusPassoEnum.aprovado), literal(StatusExecucaoEnum.fechado, tipo)),
+            (passo_da_execucao(ExecucaoPasso.status == StatusPassoEnum.reprovado), literal(StatusExecucaoEnum.em_progresso, tipo)),
+            (ExecucaoTeste.status_geral == StatusExecucaoEnum.pendente, literal(StatusExecucaoEnum.em_progresso, tipo)),
+            else_=ExecucaoTeste.status_geral
+        )
+
+        # trava as linhas que vão mudar para o desconto/soma do rollup bater com o UPDATE
+        query = (
+            select(ExecucaoTeste.id)
+            .where(ExecucaoTeste.id.in_(execucao_ids), ExecucaoTeste.status_geral.is_distinct_from(novo))
+            .order_by(ExecucaoTeste.id)
+            .with_for_update(of=ExecucaoTeste)
+        )
+        candidatos = (await self.db.execute(query)).scalars().all()
+        if not candidatos:
+            return []
+
+        await self.rollup.contabilizar_execucoes(candidatos, sinal=-1, com_defeitos=False)
+        stmt = (
+            update(ExecucaoTeste)
+            .where(ExecucaoTeste.id.in_(candidatos))
+            .values(status_geral=novo)
+            .returning(ExecucaoTeste.id, ExecucaoTeste.status_geral)
+            .execution_options(synchronize_session="fetch")
+        )
+        alteradas = [tuple(row) for row in (await self.db.execute(stmt)).all()]
+        await self.rollup.contabilizar_execucoes(candidatos, com_defeitos=False)
+        return alteradas
 
     async def update_status_geral(self, exec_id: int, status: StatusExecucaoEnum) -> Optional[ExecucaoTeste]:
         return await self.update_status(exec_id, status)
@@ -141,6 +389,9 @@ class ExecucaoTesteRepository:
         return result.scalars().all()
     
     async def update_status(self, id: int, status: StatusExecucaoEnum):
+        # trava a execução antes de descontar o status atual do rollup
+        await self.db.execute(select(ExecucaoTeste.id).where(ExecucaoTeste.id == id).with_for_update())
+        await self.rollup.contabilizar_execucoes([id], sinal=-1, com_defeitos=False)
         stmt = (
             update(ExecucaoTeste)
             .where(ExecucaoTeste.id == id)
@@ -148,14 +399,17 @@ class ExecucaoTesteRepository:
             .execution_options(synchronize_session="fetch")
         )
         await self.db.execute(stmt)
+        await self.rollup.contabilizar_execucoes([id], com_defeitos=False)
 
         if status == StatusExecucaoEnum.reteste:
+            reprovados = (
+                ExecucaoPasso.execucao_teste_id == id,
+                ExecucaoPasso.status == StatusPassoEnum.reprovado
+            )
+            await self.evidencias.descontar(ExecucaoPasso.evidencias, *reprovados)
             stmt_passos = (
                 update(ExecucaoPasso)
-                .where(
-                    ExecucaoPasso.execucao_teste_id == id,
-                    ExecucaoPasso.status == StatusPassoEnum.reprovado
-                )
+                .where(*reprovados)
                 .values(
                     status=StatusPassoEnum.pendente,
                     resultado_obtido="",
@@ -1,10 +1,29 @@
+import re
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from typing import Sequence
+from sqlalchemy import delete, or_, text
+from typing import List, Optional
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
 from app.models.log import LogSistema
+from app.models.usuario import Usuario
+from app.models.sistema import Sistema
 from app.schemas.log import LogCreate
 
+PARTICAO_PADRAO = "logs_sistema_padrao"
+_NOME_PARTICAO = re.compile(r"^logs_sistema_(\d{4})_(\d{2})$")
+
+def inicio_do_mes(data: datetime, deslocamento: int = 0) -> datetime:
+    """Primeiro instante do mês de `data`, deslocado em `deslocamento` meses."""
+    indice = data.year * 12 + (data.month - 1) + deslocamento
+    return datetime(indice // 12, indice % 12 + 1, 1)
+
+def nome_particao(inicio: datetime) -> str:
+    return f"logs_sistema_{inicio:%Y_%m}"
+
+def eh_particao(nome: str) -> bool:
+    return nome == PARTICAO_PADRAO or bool(_NOME_PARTICAO.match(nome))
+
 class LogRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -16,23 +35,143 @@ class LogRepository:
         await self.db.refresh(novo_log)
         return novo_log
 
-    async def get_all(self, limit: int = 100) -> Sequence[LogSistema]:
+    async def get_page(
+        self,
+        params: PageParams,
+        sistema_id: Optional[int] = None,
+        usuario_id: Optional[int] = None,
+        entidade: Optional[str] = None,
+        entidade_id: Optional[int] = None,
+        acao: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        busca: Optional[str] = None,
+    ) -> Page:
+        """
+        Linhas (mappings) já com os nomes de usuário e sistema, numa única
+        consulta. `busca` procura o texto em detalhes, entidade e nomes (ou o id exato).
+        """
         query = (
-            select(LogSistema)
-            .options(
-                selectinload(LogSistema.usuario),
-                selectinload(LogSistema.sistema)
+            select(
+                LogSistema.id,
+                LogSistema.usuario_id,
+                LogSistema.sistema_id,
+                LogSistema.acao,
+                LogSistema.entidade,
+                LogSistema.entidade_id,
+                LogSistema.detalhes,
+                LogSistema.created_at,
+                Usuario.nome.label("usuario_nome"),
+                Sistema.nome.label("sistema_nome"),
             )
-            .order_by(LogSistema.created_at.desc())
-            .limit(limit)
+            .outerjoin(Usuario, Usuario.id == LogSistema.usuario_id)
+            .outerjoin(Sistema, Sistema.id == LogSistema.sistema_id)
         )
-        result = await self.db.execute(query)
-        return result.scalars().all()
-    
+        query = apply_filters(query, {
+            LogSistema.sistema_id: sistema_id,
+            LogSistema.usuario_id: usuario_id,
+            LogSistema.entidade: entidade,
+            LogSistema.entidade_id: entidade_id,
+            LogSistema.acao: acao,
+        })
+        # intervalo em created_at também deixa o Postgres podar as partições
+        if desde is not None:
+            query = query.where(LogSistema.created_at >= desde)
+        if ate is not None:
+            query = query.where(LogSistema.created_at < ate)
+        if busca:
+            condicoes = [
+                coluna.icontains(busca, autoescape=True)
+                for coluna in (LogSistema.detalhes, LogSistema.entidade, Usuario.nome, Sistema.nome)
+            ]
+            if busca.isdigit():
+                condicoes.append(LogSistema.id == int(busca))
+            query = query.where(or_(*condicoes))
+        return await paginate(self.db, query, Keyset(LogSistema.created_at, LogSistema.id), params, scalars=False)
+
     async def delete(self, id: int):
         log = await self.db.get(LogSistema, id)
         if log:
             await self.db.delete(log)
             await self.db.commit()
             return True
-        return False
\ No newline at end of file
+        return False
+
+    # --- partições e retenção (Postgres) ---
+
+    def _particionado(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    async def _particoes(self) -> List[str]:
+        result = await self.db.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'logs_sistema'"
+        ))
+        return list(result.scalars().all())
+
+    async def garantir_particoes(self, meses_a_frente: int) -> List[str]:
+        """
+        Cria as partições do mês atual e dos próximos `meses_a_frente`. Se a
+        partição padrão já recebeu linhas de um desses meses, elas são movidas
+        para a partição nova. Devolve os nomes criados.
+        """
+        if not self._particionado():
+            return []
+
+        existentes = set(await self._particoes())
+        hoje = datetime.now()
+        criadas = []
+        for i in range(meses_a_frente + 1):
+            inicio, fim = inicio_do_mes(hoje, i), inicio_do_mes(hoje, i + 1)
+            nome = nome_particao(inicio)
+            if nome in existentes:
+                continue
+
+            limites = {"inicio": inicio, "fim": fim}
+            faixa = "created_at >= :inicio AND created_at < :fim"
+            tem_linhas = PARTICAO_PADRAO in existentes and (await self.db.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {PARTICAO_PADRAO} WHERE {faixa})"), limites
+            )).scalar()
+
+            if tem_linhas:
+                await self.db.execute(text(f"ALTER TABLE logs_sistema DETACH PARTITION {PARTICAO_PADRAO}"))
+            await self.db.execute(text(
+                f"CREATE TABLE {nome} PARTITION OF logs_sistema "
+                f"FOR VALUES FROM ('{inicio:%Y-%m-%d}') TO ('{fim:%Y-%m-%d}')"
+            ))
+            if tem_linhas:
+                await self.db.execute(text(f"INSERT INTO {nome} SELECT * FROM {PARTICAO_PADRAO} WHERE {faixa}"), limites)
+                await self.db.execute(text(f"DELETE FROM {PARTICAO_PADRAO} WHERE {faixa}"), limites)
+                await self.db.execute(text(f"ALTER TABLE logs_sistema ATTACH PARTITION {PARTICAO_PADRAO} DEFAULT"))
+            await self.db.commit()
+            criadas.append(nome)
+        return criadas
+
+    async def aplicar_retencao(self, meses: int) -> List[str]:
+        """
+        Descarta o histórico anterior aos últimos `meses` meses. No Postgres
+        remove partições inteiras (DROP TABLE, sem varrer linhas); só o que
+        caiu na partição padrão é apagado linha a linha. Devolve o que foi removido.
+        """
+        if meses <= 0:
+            return []
+        corte = inicio_do_mes(datetime.now(), -meses)
+
+        if not self._particionado():
+            result = await self.db.execute(delete(LogSistema).where(LogSistema.created_at < corte))
+            await self.db.commit()
+            return [f"{result.rowcount} linhas"]
+
+        particoes = await self._particoes()
+        removidas = []
+        for nome in sorted(particoes):
+            m = _NOME_PARTICAO.match(nome)
+            if m and inicio_do_mes(datetime(int(m.group(1)), int(m.group(2)), 1), 1) <= corte:
+                await self.db.execute(text(f"DROP TABLE {nome}"))
+                removidas.append(nome)
+        if PARTICAO_PADRAO in particoes:
+            await self.db.execute(text(f"DELETE FROM {PARTICAO_PADRAO} WHERE created_at < :corte"), {"corte": corte})
+        await self.db.commit()
+        return removidas
@@ -1,8 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete
-from typing import Sequence, Optional
+from typing import Optional
 
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
 from app.models.modulo import Modulo
 from app.schemas.modulo import ModuloCreate
 
@@ -17,9 +18,9 @@ class ModuloRepository:
         await self.db.refresh(db_modulo)
         return db_modulo
 
-    async def get_all(self) -> Sequence[Modulo]:
-        result = await self.db.execute(select(Modulo))
-        return result.scalars().all()
+    async def get_all(self, params: PageParams, sistema_id: Optional[int] = None, ativo: Optional[bool] = None) -> Page[Modulo]:
+        query = apply_filters(select(Modulo), {Modulo.sistema_id: sistema_id, Modulo.ativo: ativo})
+        return await paginate(self.db, query, Keyset(Modulo.id, descending=False), params)
 
     async def get_by_id(self, modulo_id: int) -> Optional[Modulo]:
         result = await self.db.execute(select(Modulo).where(Modulo.id == modulo_id))
@@ -1,17 +1,22 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update, delete, or_
-from typing import Sequence, Optional
-from app.models.projeto import Projeto
+from typing import Optional
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
+from app.models.projeto import Projeto, StatusProjetoEnum
 from app.models.testing import (
     CicloTeste, CasoTeste, PassoCasoTeste, 
     ExecucaoTeste, ExecucaoPasso, 
     Defeito
 )
+from app.repositories.dashboard_rollup_repository import DashboardRollupRepository
+from app.repositories.evidencia_repository import EvidenciaRepository
 
 class ProjetoRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.rollup = DashboardRollupRepository(db)
+        self.evidencias = EvidenciaRepository(db)
 
     async def create(self, projeto_data: Projeto) -> Projeto:
         db_projeto = Projeto(**projeto_data.model_dump())
@@ -21,10 +26,21 @@ class ProjetoRepository:
         await self.db.refresh(db_projeto)
         return db_projeto
     
-    async def get_all(self) -> Sequence[Projeto]:
-        query = select(Projeto)
-        result = await self.db.execute(query)
-        return result.scalars().all()
+    async def get_all(
+        self,
+        params: PageParams,
+        sistema_id: Optional[int] = None,
+        modulo_id: Optional[int] = None,
+        status: Optional[StatusProjetoEnum] = None,
+        responsavel_id: Optional[int] = None
+    ) -> Page[Projeto]:
+        query = apply_filters(select(Projeto), {
+            Projeto.sistema_id: sistema_id,
+            Projeto.modulo_id: modulo_id,
+            Projeto.status: status,
+            Projeto.responsavel_id: responsavel_id,
+        })
+        return await paginate(self.db, query, Keyset(Projeto.id, descending=False), params)
     
     async def get_by_id(self, id: int) -> Optional[Projeto]:
         query = select(Projeto).where(Projeto.id == id)
@@ -44,8 +60,13 @@ class ProjetoRepository:
             .returning(Projeto)
         )
         result = await self.db.execute(query)
+        projeto = result.scalars().first()
+
+        if projeto and update_data.keys() & {"sistema_id", "modulo_id"}:
+            await self.rollup.sincronizar_projeto(id)
+
         await self.db.commit()
-        return result.scalars().first()
+        return projeto
 
     async def delete(self, id: int) -> bool:
         
@@ -62,11 +83,13 @@ class ProjetoRepository:
                 ExecucaoTeste.caso_teste_id.in_(casos_ids) if casos_ids else False,
                 ExecucaoTeste.ciclo_teste_id.in_(ciclos_ids) if ciclos_ids else False
             )
-        )
+        ).order_by(ExecucaoTeste.id).with_for_update()
         result_execs = await self.db.execute(query_execs)
         execs_ids = result_execs.scalars().all()
         
         if execs_ids:
+            await self.rollup.contabilizar_execucoes(execs_ids, sinal=-1)
+            await self.evidencias.descontar_execucoes(execs_ids)
             await self.db.execute(delete(ExecucaoPasso).where(ExecucaoPasso.execucao_teste_id.in_(execs_ids)))
             await self.db.execute(delete(Defeito).where(Defeito.execucao_teste_id.in_(execs_ids)))
             await self.db.execute(delete(ExecucaoTeste).where(ExecucaoTeste.id.in_(execs_ids)))
@@ -78,6 +101,7 @@ class ProjetoRepository:
         if ciclos_ids:
             await self.db.execute(delete(CicloTeste).where(CicloTeste.id.in_(ciclos_ids)))
             
+        await self.rollup.remover_projeto(id)
         query = delete(Projeto).where(Projeto.id == id)
         result = await self.db.execute(query)
         await self.db.commit()
@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, func, update
+
+from app.models.sessao import SessaoUsuario
+
+class SessaoRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, dados: dict) -> SessaoUsuario:
+        sessao = SessaoUsuario(**dados)
+        self.db.add(sessao)
+        await self.db.commit()
+        return sessao
+
+    async def get_ativa(self, sessao_id: str, agora: datetime) -> Optional[SessaoUsuario]:
+        query = select(SessaoUsuario).where(SessaoUsuario.id == sessao_id, SessaoUsuario.expira_em > agora)
+        result = await self.db.execute(query)
+        return result.scalars().first()
+
+    async def rotacionar(self, sessao_id: str, hash_atual: str, hash_novo: str, expira_em: datetime) -> bool:
+        """
+        Troca o segredo da sessão. Só troca se o segredo ainda for o lido:
+        duas renovações com o mesmo refresh token não passam as duas.
+        """
+        result = await self.db.execute(
+            update(SessaoUsuario)
+            .where(SessaoUsuario.id == sessao_id, SessaoUsuario.token_hash == hash_atual)
+            .values(token_hash=hash_novo, expira_em=expira_em, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def remover(self, sessao_id: str) -> None:
+        await self.db.execute(
+            delete(SessaoUsuario).where(SessaoUsuario.id == sessao_id).execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def remover_do_usuario(self, usuario_id: int) -> int:
+        result = await self.db.execute(
+            delete(SessaoUsuario)
+            .where(SessaoUsuario.usuario_id == usuario_id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def remover_expiradas(self, agora: datetime) -> int:
+        result = await self.db.execute(
+            delete(SessaoUsuario)
+            .where(SessaoUsuario.expira_em < agora)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
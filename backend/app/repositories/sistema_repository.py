@@ -1,8 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete
-from typing import Sequence, Optional
+from typing import Optional
 
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
 from app.models import Sistema
 from app.schemas import SistemaCreate, SistemaUpdate
 
@@ -17,9 +18,9 @@ class SistemaRepository:
         await self.db.refresh(db_sistema)
         return db_sistema
 
-    async def get_all_sistemas(self) -> Sequence[Sistema]:
-        result = await self.db.execute(select(Sistema))
-        return result.scalars().all()
+    async def get_all_sistemas(self, params: PageParams, ativo: Optional[bool] = None) -> Page[Sistema]:
+        query = apply_filters(select(Sistema), {Sistema.ativo: ativo})
+        return await paginate(self.db, query, Keyset(Sistema.id, descending=False), params)
 
     async def get_sistema_by_id(self, sistema_id: int) -> Sistema | None:
         result = await self.db.execute(
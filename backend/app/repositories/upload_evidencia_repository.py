@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, func, update
+
+from app.models.evidencia import UploadEvidencia
+
+class UploadEvidenciaRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, dados: dict) -> UploadEvidencia:
+        sessao = UploadEvidencia(**dados)
+        self.db.add(sessao)
+        await self.db.commit()
+        await self.db.refresh(sessao)
+        return sessao
+
+    async def get(self, sessao_id: str) -> Optional[UploadEvidencia]:
+        return await self.db.get(UploadEvidencia, sessao_id, populate_existing=True)
+
+    async def avancar(self, sessao_id: str, de: int, ate: int, **valores) -> bool:
+        """
+        Confirma os bytes [de, ate), junto com `valores` (as partes do
+        backend). Só avança se ninguém confirmou outro bloco desde a leitura
+        da sessão: dois envios do mesmo offset não passam os dois.
+        """
+        result = await self.db.execute(
+            update(UploadEvidencia)
+            .where(UploadEvidencia.id == sessao_id, UploadEvidencia.recebido == de)
+            .values(recebido=ate, updated_at=func.now(), **valores)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def reivindicar(self, sessao_id: str, *filtros) -> bool:
+        """Apaga a sessão; quem conseguir apagar fica com o arquivo (concluir ou cancelar)."""
+        result = await self.db.execute(
+            delete(UploadEvidencia)
+            .where(UploadEvidencia.id == sessao_id, *filtros)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount == 1
+
+    async def remover_expiradas(self, corte: datetime) -> List[str]:
+        result = await self.db.execute(
+            delete(UploadEvidencia)
+            .where(UploadEvidencia.updated_at < corte)
+            .returning(UploadEvidencia.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = list(result.scalars().all())
+        await self.db.commit()
+        return ids
+
+    async def ids_ativos(self) -> List[str]:
+        return list((await self.db.execute(select(UploadEvidencia.id))).scalars().all())
@@ -1,7 +1,8 @@
-from typing import Optional, List, Union, Any, Dict
+from typing import Optional, Union, Any, Dict, Iterable, Set
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
+from app.core.pagination import Page, PageParams, Keyset, apply_filters, paginate
 from app.models.usuario import Usuario
 
 class UsuarioRepository:
@@ -23,12 +24,14 @@ class UsuarioRepository:
         result = await self.db.execute(query)
         return result.scalars().first()
 
-    async def get_all_usuarios(self, ativo: Optional[bool] = None) -> List[Usuario]:
-        query = select(Usuario).options(selectinload(Usuario.nivel_acesso)).order_by(Usuario.id)
-        if ativo is not None:
-            query = query.where(Usuario.ativo == ativo)
-        result = await self.db.execute(query)
-        return result.scalars().all()
+    async def ids_existentes(self, ids: Iterable[int]) -> Set[int]:
+        query = select(Usuario.id).where(Usuario.id.in_(set(ids)))
+        return set((await self.db.execute(query)).scalars().all())
+
+    async def get_all_usuarios(self, params: PageParams, ativo: Optional[bool] = None, nivel_acesso_id: Optional[int] = None) -> Page[Usuario]:
+        query = select(Usuario).options(selectinload(Usuario.nivel_acesso))
+        query = apply_filters(query, {Usuario.ativo: ativo, Usuario.nivel_acesso_id: nivel_acesso_id})
+        return await paginate(self.db, query, Keyset(Usuario.id, descending=False), params)
 
     async def create(self, usuario: Usuario) -> Usuario:
         self.db.add(usuario)
@@ -37,14 +40,20 @@ class UsuarioRepository:
         result = await self.db.execute(query)
         return result.scalars().first()
 
-    async def update(self, user_id: int, update_data: Dict[str, Any]) -> Optional[Usuario]:
+    async def update(self, user_id: int, update_data: Dict[str, Any], revogam_tokens: tuple = ()) -> Optional[Usuario]:
         db_obj = await self.get_by_id(user_id)
         if not db_obj:
             return None
 
+        revogar = any(
+            field in update_data and getattr(db_obj, field) != update_data[field] for field in revogam_tokens
+        )
         for field, value in update_data.items():
             if hasattr(db_obj, field):
                 setattr(db_obj, field, value)
+        if revogar:
+            # incremento no banco: duas alterações simultâneas não ficam com a mesma versão
+            db_obj.token_versao = Usuario.token_versao + 1
             
         self.db.add(db_obj)
         await self.db.commit()
@@ -1,9 +1,12 @@
 from .sistema import SistemaCreate, SistemaResponse, SistemaUpdate
 from .modulo import ModuloCreate, ModuloResponse, ModuloUpdate
 from .usuario import UsuarioCreate, UsuarioResponse, UsuarioUpdate
-from .caso_teste import CasoTesteCreate, CasoTesteResponse, CasoTesteUpdate
+from .caso_teste import CasoTesteCreate, CasoTesteResponse, CasoTesteUpdate, CasoTesteResumo
 from .ciclo_teste import CicloTesteCreate, CicloTesteResponse, CicloTesteUpdate
-from .execucao_teste import (ExecucaoTesteBase, ExecucaoTesteResponse, ExecucaoPassoUpdate, ExecucaoPassoResponse, ExecucaoPassoUpdate)
+from .execucao_teste import (ExecucaoTesteBase, ExecucaoTesteResponse, ExecucaoPassoUpdate, ExecucaoPassoResponse, ExecucaoPassoUpdate,
+                             RegraAlocacaoEnum, AlocacaoLoteCreate, AlocacaoLoteResponse,
+                             ExecucaoPassoLoteItem, ExecucaoPassoLoteUpdate, ExecucaoStatusResumo, ExecucaoPassoLoteResponse)
 from .projeto import ProjetoCreate, ProjetoResponse, ProjetoUpdate
 from .token import Token
 from .metrica import MetricaKPI, MetricaProjeto
+from .evidencia import UploadEvidenciaCreate, UploadEvidenciaResponse, UploadDiretoCreate, UploadDiretoConcluir
@@ -87,4 +87,24 @@ class CasoTesteResponse(CasoTesteBase):
 
     passos: List[PassoCasoTesteResponse] = [] 
 
+    model_config = ConfigDict(from_attributes=True)
+
+# --- LISTAGEM (somente o que a tabela exibe, sem passos) ---
+class CasoTesteResumo(BaseModel):
+    id: int
+    projeto_id: int
+    nome: str
+    prioridade: str
+    status: Optional[StatusCasoTesteEnum] = None
+    responsavel_id: Optional[int] = None
+    ciclo_id: Optional[int] = None
+
+    projeto_nome: Optional[str] = None
+    responsavel_nome: Optional[str] = None
+    ciclo_nome: Optional[str] = None
+    total_passos: int = 0
+
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 from app.models.testing import StatusCicloEnum
 
 class CicloTesteBase(BaseModel):
@@ -27,5 +27,6 @@ class CicloTesteResponse(CicloTesteBase):
     updated_at: Optional[datetime] = None
     total_testes: int = 0
     testes_concluidos: int = 0
+    testes_por_status: Dict[str, int] = {}
 
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
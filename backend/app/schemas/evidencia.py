@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+class UploadEvidenciaCreate(BaseModel):
+    tamanho: int = Field(..., gt=0, description="Tamanho total do arquivo em bytes")
+    nome_arquivo: Optional[str] = Field(None, max_length=255)
+    content_type: Optional[str] = Field(None, max_length=100)
+
+class UploadEvidenciaResponse(BaseModel):
+    id: str
+    passo_id: int
+    nome_arquivo: Optional[str] = None
+    tamanho: int
+    recebido: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class UploadDiretoCreate(BaseModel):
+    sha256: str = Field(..., pattern=r"^[0-9a-f]{64}$", description="SHA-256 do conteúdo, em hexadecimal")
+    tamanho: int = Field(..., gt=0)
+    content_type: str = Field(..., max_length=100)
+    nome_arquivo: Optional[str] = Field(None, max_length=255)
+
+class UploadDiretoConcluir(BaseModel):
+    token: str
@@ -1,9 +1,10 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import List, Optional, Union # <--- Adicionado Union
+from enum import Enum
 
 from app.schemas.caso_teste import CasoTesteResponse, UsuarioSimple, PassoCasoTesteResponse
-from app.models.testing import StatusExecucaoEnum
+from app.models.testing import StatusExecucaoEnum, StatusCasoTesteEnum, PrioridadeEnum
 
 class ExecucaoTesteBase(BaseModel):
     ciclo_teste_id: int
@@ -48,4 +49,45 @@ class ExecucaoTesteResponse(ExecucaoTesteBase):
     responsavel: Optional[UsuarioSimple] = None
     passos_executados: List[ExecucaoPassoResponse] = []
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# --- RESULTADOS DE PASSOS EM LOTE ---
+class ExecucaoPassoLoteItem(ExecucaoPassoUpdate):
+    id: int
+
+class ExecucaoPassoLoteUpdate(BaseModel):
+    passos: List[ExecucaoPassoLoteItem]
+
+class ExecucaoStatusResumo(BaseModel):
+    id: int
+    status_geral: StatusExecucaoEnum
+
+class ExecucaoPassoLoteResponse(BaseModel):
+    passos: List[ExecucaoPassoResponse]                 # passos gravados
+    execucoes_alteradas: List[ExecucaoStatusResumo]     # só as execuções cujo status_geral mudou
+
+# --- ALOCAÇÃO EM LOTE ---
+class RegraAlocacaoEnum(str, Enum):
+    responsavel_do_caso = "responsavel_do_caso"   # usa o responsável cadastrado no caso
+    fixo = "fixo"                                 # todos para responsavel_id
+    rodizio = "rodizio"                           # distribui entre responsaveis_ids, em ordem de id do caso
+
+class AlocacaoLoteCreate(BaseModel):
+    ciclo_teste_id: int
+
+    # Seleção dos casos: lista explícita e/ou filtro (combinados com E)
+    caso_ids: Optional[List[int]] = None
+    projeto_id: Optional[int] = None
+    status_caso: Optional[StatusCasoTesteEnum] = None
+    prioridade: Optional[PrioridadeEnum] = None
+
+    regra: RegraAlocacaoEnum = RegraAlocacaoEnum.responsavel_do_caso
+    responsavel_id: Optional[int] = None
+    responsaveis_ids: Optional[List[int]] = None
+
+class AlocacaoLoteResponse(BaseModel):
+    ciclo_teste_id: int
+    casos_selecionados: int
+    execucoes_criadas: int
+    passos_criados: int
+    casos_ignorados: int
@@ -4,11 +4,13 @@ from typing import Optional
 
 class LogResponse(BaseModel):
     id: int
+    usuario_id: Optional[int] = None
     usuario_nome: Optional[str] = None
     sistema_nome: Optional[str] = None
     sistema_id: Optional[int] = None
     acao: str
     entidade: str
+    entidade_id: Optional[int] = None
     detalhes: Optional[str] = None
     created_at: datetime
 
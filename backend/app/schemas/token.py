@@ -3,10 +3,15 @@ from typing import Optional
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
     username: str 
     nome: str
     role: str
 
 class TokenPayload(BaseModel):
-    sub: Optional[int] = None # ID do usuário
\ No newline at end of file
+    sub: Optional[int] = None # ID do usuário
+    ver: int = 0 # token_versao do usuário na emissão
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
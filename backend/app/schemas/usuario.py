@@ -8,6 +8,23 @@ class NivelAcessoSimple(BaseModel):
     descricao: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
+class NivelAcessoPrincipal(BaseModel):
+    id: int
+    nome: str
+    permissoes: dict = {}
+    model_config = ConfigDict(from_attributes=True)
+
+class UsuarioAutenticado(BaseModel):
+    """O que as rotas precisam do usuário logado; é o que fica no cache de autenticação."""
+    id: int
+    nome: str
+    email: str
+    ativo: bool
+    nivel_acesso_id: int
+    token_versao: int
+    nivel_acesso: NivelAcessoPrincipal
+    model_config = ConfigDict(from_attributes=True)
+
 class UsuarioBase(BaseModel):
     nome: str
     username: Optional[str] = None
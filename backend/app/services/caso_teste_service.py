@@ -1,11 +1,12 @@
-from typing import List, Optional
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
+from app.core.pagination import Page, PageParams
 from app.repositories.caso_teste_repository import CasoTesteRepository
 from app.repositories.usuario_repository import UsuarioRepository
 from app.repositories.projeto_repository import ProjetoRepository
-from app.schemas.caso_teste import CasoTesteCreate, CasoTesteResponse, CasoTesteUpdate
+from app.schemas.caso_teste import CasoTesteCreate, CasoTesteResponse, CasoTesteUpdate, CasoTesteResumo
 
 class CasoTesteService:
     def __init__(self, db: AsyncSession):
@@ -37,13 +38,13 @@ class CasoTesteService:
         novo_caso = await self.repo.create(projeto_id, dados)
         return CasoTesteResponse.model_validate(novo_caso)
 
-    async def listar_todos(self) -> List[CasoTesteResponse]:
-        casos = await self.repo.get_all()
-        return [CasoTesteResponse.model_validate(c) for c in casos]
+    async def listar_todos(self, params: PageParams, **filtros) -> Page[CasoTesteResumo]:
+        casos = await self.repo.get_all(params, **filtros)
+        return casos.map(lambda c: CasoTesteResumo(**c))
     
-    async def listar_casos_teste(self, projeto_id: int) -> List[CasoTesteResponse]:
-        casos = await self.repo.get_all_by_projeto(projeto_id)
-        return [CasoTesteResponse.model_validate(c) for c in casos]
+    async def listar_casos_teste(self, projeto_id: int, params: PageParams, **filtros) -> Page[CasoTesteResumo]:
+        casos = await self.repo.get_all_by_projeto(projeto_id, params, **filtros)
+        return casos.map(lambda c: CasoTesteResumo(**c))
 
     async def obter_caso_teste(self, caso_id: int) -> CasoTesteResponse:
         caso = await self.repo.get_by_id(caso_id)
@@ -63,7 +64,7 @@ class CasoTesteService:
         return CasoTesteResponse.model_validate(caso_atualizado)
 
     async def deletar_caso_teste(self, caso_id: int):
-        caso = await self.repo.get_by_id(caso_id)
-        if not caso:
+        removido = await self.repo.delete(caso_id)
+        if not removido:
             raise HTTPException(status_code=404, detail="Caso de Teste não encontrado")
-        await self.repo.delete(caso_id)
\ No newline at end of file
+        return removido
\ No newline at end of file
@@ -1,9 +1,10 @@
-from typing import Sequence, List, Optional
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from datetime import datetime
 
+from app.core.pagination import Page, PageParams
 from app.repositories.ciclo_teste_repository import CicloTesteRepository
 from app.schemas.ciclo_teste import CicloTesteCreate, CicloTesteUpdate, CicloTesteResponse
 from app.models.testing import CicloTeste 
@@ -13,9 +14,9 @@ class CicloTesteService:
     def __init__(self, db: AsyncSession):
         self.repo = CicloTesteRepository(db)
 
-    async def get_all_ciclos(self) -> Sequence[CicloTesteResponse]:
-        ciclos = await self.repo.get_all()
-        return [CicloTesteResponse.model_validate(c) for c in ciclos]
+    async def get_all_ciclos(self, params: PageParams, **filtros) -> Page[CicloTesteResponse]:
+        ciclos = await self.repo.get_all(params, **filtros)
+        return ciclos.map(CicloTesteResponse.model_validate)
     
     async def obter_ciclo(self, ciclo_id: int) -> Optional[CicloTeste]:
         return await self.repo.get_by_id(ciclo_id)
@@ -52,9 +53,9 @@ class CicloTesteService:
             await self.repo.db.rollback()
             tratar_erro_integridade(e)
 
-    async def listar_por_projeto(self, projeto_id: int):
-        items = await self.repo.list_by_projeto(projeto_id)
-        return [CicloTesteResponse.model_validate(i) for i in items]
+    async def listar_por_projeto(self, projeto_id: int, params: PageParams, **filtros) -> Page[CicloTesteResponse]:
+        items = await self.repo.list_by_projeto(projeto_id, params, **filtros)
+        return items.map(CicloTesteResponse.model_validate)
 
     async def remover_ciclo(self, ciclo_id: int):
         try:
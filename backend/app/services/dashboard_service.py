@@ -1,5 +1,6 @@
 from typing import Optional, List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import ResponseCache, dashboard_cache, invalidar_ao_gravar
 from app.repositories.dashboard_repository import DashboardRepository
 from app.models.testing import StatusExecucaoEnum, SeveridadeDefeitoEnum
 from app.schemas.dashboard import (
@@ -9,6 +10,13 @@ from app.schemas.dashboard import (
     PerformanceResponse, TeamStats, TesterStats
 )
 
+CACHE_NAMESPACE = "dashboard"
+
+# Cadastros mudam pouco e devem aparecer nos dashboards na hora: um commit nessas tabelas
+# derruba o cache. Execuções, defeitos e o rollup mudam a cada passo lançado numa campanha;
+# invalidar por eles zeraria o acerto justamente no pico, então esses números seguem o TTL.
+invalidar_ao_gravar(dashboard_cache, CACHE_NAMESPACE, ["casos_teste", "ciclos_teste", "projetos"])
+
 class DashboardService:
     STATUS_COLORS = {
         "pendente": "#94a3b8",      
@@ -27,10 +35,29 @@ class DashboardService:
         "baixo": "#3b82f6"
     }
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, cache: ResponseCache = dashboard_cache):
         self.repo = DashboardRepository(db)
+        self.cache = cache
 
     async def get_dashboard_data(self, sistema_id: int = None) -> DashboardResponse:
+        return await self.cache.obter(
+            CACHE_NAMESPACE, f"geral:{sistema_id}",
+            lambda: self._calcular_dashboard_data(sistema_id), DashboardResponse
+        )
+
+    async def get_runner_dashboard_data(self, runner_id: Optional[int] = None) -> RunnerDashboardResponse:
+        return await self.cache.obter(
+            CACHE_NAMESPACE, f"runner:{runner_id}",
+            lambda: self._calcular_runner_dashboard_data(runner_id), RunnerDashboardResponse
+        )
+
+    async def get_performance_analytics(self, user_id: Optional[int] = None) -> PerformanceResponse:
+        return await self.cache.obter(
+            CACHE_NAMESPACE, f"performance:{user_id}",
+            lambda: self._calcular_performance_analytics(user_id), PerformanceResponse
+        )
+
+    async def _calcular_dashboard_data(self, sistema_id: int = None) -> DashboardResponse:
         kpis_data = await self.repo.get_kpis_gerais(sistema_id)
         exec_status_data = await self.repo.get_status_execucao_geral(sistema_id)
         severity_data = await self.repo.get_defeitos_por_severidade(sistema_id)
@@ -58,7 +85,7 @@ class DashboardService:
 
         return DashboardResponse(kpis=kpis, charts=charts)
 
-    async def get_runner_dashboard_data(self, runner_id: Optional[int] = None) -> RunnerDashboardResponse:
+    async def _calcular_runner_dashboard_data(self, runner_id: Optional[int] = None) -> RunnerDashboardResponse:
         raw_kpis = await self.repo.get_runner_kpis(runner_id)
         status_dist = await self.repo.get_status_distribution(runner_id)
         raw_timeline = await self.repo.get_runner_timeline(runner_id)
@@ -105,7 +132,7 @@ class DashboardService:
         return RunnerDashboardResponse(kpis=kpis, charts=charts)
 
     
-    async def get_performance_analytics(self, user_id: Optional[int] = None) -> PerformanceResponse:
+    async def _calcular_performance_analytics(self, user_id: Optional[int] = None) -> PerformanceResponse:
         velocity_data = await self.repo.get_performance_velocity(user_id)
         modules_data = await self.repo.get_top_offending_modules_perf(user_id)
 
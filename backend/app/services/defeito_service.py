@@ -1,8 +1,9 @@
 from typing import List, Optional, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.usuario import Usuario
+from app.schemas.usuario import UsuarioAutenticado
 from app.models.testing import StatusExecucaoEnum, StatusDefeitoEnum 
 from app.models.nivel_acesso import NivelAcessoEnum
+from app.core.pagination import Page, PageParams
 from app.repositories.defeito_repository import DefeitoRepository
 from app.repositories.execucao_teste_repository import ExecucaoTesteRepository 
 from app.schemas.defeito import DefeitoCreate, DefeitoUpdate, DefeitoResponse
@@ -15,16 +16,19 @@ class DefeitoService:
     async def registrar_defeito(self, dados: DefeitoCreate):
         return await self.repo.create(dados)
 
-    async def listar_todos(self, current_user: Usuario, filtro_responsavel_id: Optional[int] = None):
+    async def listar_todos(self, current_user: UsuarioAutenticado, params: PageParams, filtro_responsavel_id: Optional[int] = None, **filtros) -> Page:
         
         is_admin = False
         if current_user.nivel_acesso:
              is_admin = current_user.nivel_acesso.nome == NivelAcessoEnum.admin or current_user.nivel_acesso.nome == "admin"
 
         if not is_admin:
-            return await self.repo.get_all_with_details(responsavel_id=current_user.id)
+            return await self.repo.get_all_with_details(params, responsavel_id=current_user.id, **filtros)
         
-        return await self.repo.get_all_with_details(responsavel_id=filtro_responsavel_id)
+        return await self.repo.get_all_with_details(params, responsavel_id=filtro_responsavel_id, **filtros)
+
+    async def listar_por_execucao(self, execucao_id: int, params: PageParams) -> Page:
+        return await self.repo.get_by_execucao(execucao_id, params)
 
     async def atualizar_defeito(self, id: int, dados: DefeitoUpdate):
         defeito_atualizado = await self.repo.update(id, dados)
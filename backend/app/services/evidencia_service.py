@@ -0,0 +1,494 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.requests import ClientDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.armazenamento import ArmazenamentoEvidencias, ArmazenamentoLocal, armazenamento as armazenamento_padrao
+from app.core.assinatura import assinar, verificar
+from app.core.config import settings
+from app.core.derivados import derivados
+from app.models.evidencia import Evidencia, UploadEvidencia
+from app.repositories.evidencia_repository import EvidenciaRepository
+from app.repositories.upload_evidencia_repository import UploadEvidenciaRepository
+
+TAMANHO_BLOCO = 1024 * 1024
+
+# Assinaturas (magic bytes) dos formatos mais comuns de evidência
+ASSINATURAS = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF", "application/pdf"),
+    (b"\x1aE\xdf\xa3", "video/webm"),
+]
+
+# Extensão do blob pelo tipo detectado: o mesmo conteúdo sempre gera o mesmo nome
+EXTENSOES = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "application/pdf": ".pdf",
+    "video/webm": ".webm",
+    "video/mp4": ".mp4",
+    "video/quicktime": ".mov",
+    "text/plain": ".txt",
+}
+
+def tipo_base(content_type: Optional[str]) -> Optional[str]:
+    """'Text/Plain; charset=utf-8' -> 'text/plain'."""
+    return content_type.split(";")[0].strip().lower() or None if content_type else None
+
+def _parece_texto(cabecalho: bytes) -> bool:
+    # sem bytes nulos, UTF-8 válido (o último caractere pode ter sido cortado) e sem cara de marcação
+    if b"\0" in cabecalho or cabecalho.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<"):
+        return False
+    for corte in range(4):
+        try:
+            cabecalho[:len(cabecalho) - corte].decode("utf-8")
+            return True
+        except UnicodeDecodeError:
+            continue
+    return False
+
+def detectar_mime(cabecalho: bytes, declarado: Optional[str]) -> Optional[str]:
+    """
+    Identifica o tipo pelo conteúdo. O Content-Type enviado só vale para
+    texto puro, que não tem assinatura; None se o conteúdo não for reconhecido.
+    """
+    for assinatura, mime in ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return mime
+    if cabecalho[:4] == b"RIFF" and cabecalho[8:12] == b"WEBP":
+        return "image/webp"
+    if cabecalho[4:8] == b"ftyp":
+        return "video/quicktime" if cabecalho[8:10] == b"qt" else "video/mp4"
+    if tipo_base(declarado) == "text/plain" and _parece_texto(cabecalho):
+        return "text/plain"
+    return None
+
+def tipo_permitido(mime: Optional[str]) -> bool:
+    """Só tipos que `detectar_mime` reconhece (SVG e HTML nunca), filtrados por EVIDENCIA_TIPOS_PERMITIDOS."""
+    mime = tipo_base(mime)
+    return mime in EXTENSOES and any(
+        mime.startswith(p.strip()) for p in settings.EVIDENCIA_TIPOS_PERMITIDOS.split(",") if p.strip()
+    )
+
+def _erro_tipo(mime: Optional[str]) -> HTTPException:
+    return HTTPException(status_code=415, detail=f"Tipo de arquivo não permitido: {mime or 'não reconhecido'}")
+
+def _gravar_bloco(arquivo: BinaryIO, resumo, bloco: bytes) -> None:
+    # hashlib e write liberam o GIL para blocos grandes
+    resumo.update(bloco)
+    arquivo.write(bloco)
+
+def _extensao(mime: str) -> str:
+    # só chegam aqui tipos permitidos, todos com extensão própria: o nome enviado nunca vira extensão
+    return EXTENSOES[mime]
+
+def caminho_blob(sha256: str, extensao: str) -> str:
+    """Caminho relativo do blob dentro do diretório de evidências."""
+    return f"{sha256[:2]}/{sha256}{extensao}"
+
+class EvidenciaService:
+    """
+    Recebe arquivos de evidência em blocos, fora do event loop: cada bloco é
+    lido do upload, somado ao SHA-256 e gravado numa thread, com limite de
+    tamanho e checagem de tipo. A memória usada não depende do tamanho do arquivo.
+
+    O arquivo final é endereçado pelo hash do conteúdo, então o mesmo arquivo
+    enviado várias vezes ocupa espaço uma vez só. Onde ele fica (disco ou
+    bucket S3) é decidido pelo backend de armazenamento.
+    """
+
+    def __init__(self, db: AsyncSession, diretorio: str = None, armazenamento: ArmazenamentoEvidencias = None):
+        self.repo = EvidenciaRepository(db)
+        self.uploads = UploadEvidenciaRepository(db)
+        # temporários ficam sempre no disco local; os uploads retomáveis, no armazenamento
+        self.diretorio = diretorio or settings.EVIDENCIAS_DIR
+        if armazenamento is None:
+            armazenamento = ArmazenamentoLocal(diretorio, settings.EVIDENCIA_URL_BASE) if diretorio else armazenamento_padrao
+        self.armazenamento = armazenamento
+        self.tamanho_maximo = settings.EVIDENCIA_TAMANHO_MAXIMO_MB * 1024 * 1024
+
+    def _erro_tamanho(self) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Arquivo excede o limite de {settings.EVIDENCIA_TAMANHO_MAXIMO_MB} MB."
+        )
+
+    async def _receber(self, blocos: AsyncIterator[bytes], declarado: Optional[str], limite: int):
+        """
+        Copia os blocos para um temporário local calculando o SHA-256.
+        Devolve (temporario, sha256, tamanho, mime).
+        """
+        pasta_temporaria = os.path.join(self.diretorio, ".tmp")
+        await asyncio.to_thread(os.makedirs, pasta_temporaria, exist_ok=True)
+        temporario = os.path.join(pasta_temporaria, f"{uuid.uuid4()}.parcial")
+
+        resumo = hashlib.sha256()
+        tamanho = 0
+        mime = None
+        cabecalho = b""
+
+        arquivo = await asyncio.to_thread(open, temporario, "wb")
+        try:
+            async for bloco in blocos:
+                if not bloco:
+                    continue
+                # o primeiro bloco de um stream pode ter menos de 16 bytes: junta até ter o cabeçalho
+                if mime is None:
+                    cabecalho += bloco[:16 - len(cabecalho)]
+                    if len(cabecalho) == 16:
+                        mime = detectar_mime(cabecalho, declarado)
+                        if not tipo_permitido(mime):
+                            raise _erro_tipo(mime)
+                tamanho += len(bloco)
+                if tamanho > limite:
+                    if limite < self.tamanho_maximo:
+                        raise HTTPException(status_code=413, detail="Conteúdo maior que o tamanho declarado.")
+                    raise self._erro_tamanho()
+                await asyncio.to_thread(_gravar_bloco, arquivo, resumo, bloco)
+        except BaseException:
+            await asyncio.to_thread(arquivo.close)
+            await asyncio.to_thread(os.remove, temporario)
+            raise
+        await asyncio.to_thread(arquivo.close)
+
+        if tamanho == 0:
+            await asyncio.to_thread(os.remove, temporario)
+            raise HTTPException(status_code=400, detail="Arquivo vazio.")
+        if mime is None:
+            # arquivo inteiro menor que o cabeçalho
+            mime = detectar_mime(cabecalho, declarado)
+            if not tipo_permitido(mime):
+                await asyncio.to_thread(os.remove, temporario)
+                raise _erro_tipo(mime)
+        return temporario, resumo.hexdigest(), tamanho, mime
+
+    async def salvar_upload(self, file: UploadFile) -> dict:
+        # o multipart já informa o tamanho: rejeita antes de copiar
+        if file.size is not None and file.size > self.tamanho_maximo:
+            raise self._erro_tamanho()
+
+        async def blocos():
+            await file.seek(0)
+            while bloco := await file.read(TAMANHO_BLOCO):
+                yield bloco
+
+        temporario, sha256, tamanho, mime = await self._receber(blocos(), file.content_type, self.tamanho_maximo)
+        return await self._guardar(
+            sha256, tamanho, mime, _extensao(mime),
+            gravar=lambda nome, mime: self.armazenamento.gravar(temporario, nome, mime),
+            descartar=lambda: asyncio.to_thread(os.remove, temporario),
+        )
+
+    async def _guardar(
+        self, sha256: str, tamanho: int, mime: str, extensao: str,
+        gravar: Callable[[str, str], Awaitable[None]], descartar: Callable[[], Awaitable[None]],
+    ) -> dict:
+        """Registra o hash e grava o conteúdo recebido no blob (ou o descarta, se já existir)."""
+        # registra antes de mover: se o GC estiver apagando este hash, o registro espera ele terminar
+        evidencia = await self.repo.registrar(sha256, tamanho, mime, extensao)
+        nome = caminho_blob(sha256, evidencia.extensao)
+
+        deduplicado = await self.armazenamento.existe(nome)
+        if deduplicado:
+            await descartar()
+        else:
+            await gravar(nome, evidencia.mime)
+        self._agendar_derivados(nome, sha256)
+        return self._resultado(evidencia, nome, deduplicado)
+
+    def _agendar_derivados(self, nome: str, sha256: str) -> None:
+        # miniaturas e versão web num processo à parte; a resposta não espera
+        local = self.armazenamento.caminho_local(nome)
+        if local:
+            derivados.agendar(local, sha256)
+
+    def _resultado(self, evidencia: Evidencia, nome: str, deduplicado: bool) -> dict:
+        # URL estável da API: no S3 ela redireciona para um link assinado de curta duração
+        url = f"{settings.EVIDENCIA_URL_BASE.rstrip('/')}/evidencias/{nome}"
+        com_variantes = self.armazenamento.local and derivados.suporta(nome)
+        return {
+            # O Frontend espera: response.data.url
+            "url": url,
+            "variantes": {v: f"{url}?variante={v}" for v in derivados.variantes} if com_variantes else {},
+            "nome": nome,
+            "tamanho": evidencia.tamanho,
+            "mime": evidencia.mime,
+            "sha256": evidencia.sha256,
+            "deduplicado": deduplicado,
+        }
+
+    # --- envio direto ao armazenamento ---
+    #
+    # O cliente informa hash e tamanho, recebe uma URL assinada e manda os
+    # bytes direto para o bucket (ou para PUT /evidencias/direto no disco
+    # local), sem ocupar um worker da API. O token devolvido carrega tudo o
+    # que a conclusão precisa e é verificado sem consultar o banco.
+
+    async def preparar_upload_direto(
+        self, passo_id: int, usuario_id: int, sha256: str, tamanho: int, content_type: str, nome_arquivo: Optional[str]
+    ) -> dict:
+        if tamanho > self.tamanho_maximo:
+            raise self._erro_tamanho()
+        # o conteúdo não passa pela API: o tipo declarado é conferido pelos primeiros bytes na conclusão
+        if not tipo_permitido(content_type):
+            raise _erro_tipo(content_type)
+        mime = tipo_base(content_type)
+
+        # o registro novo (zero referências) fica protegido do GC pela carência, bem maior que a validade
+        evidencia = await self.repo.registrar(sha256, tamanho, mime, _extensao(mime))
+        nome = caminho_blob(sha256, evidencia.extensao)
+        validade = settings.EVIDENCIA_URL_VALIDADE_SEGUNDOS
+        token = assinar(
+            {"n": nome, "s": sha256, "t": evidencia.tamanho, "m": evidencia.mime, "p": passo_id, "u": usuario_id},
+            validade,
+        )
+        resposta = {
+            "token": token,
+            "expira_em": datetime.now(timezone.utc) + timedelta(seconds=validade),
+            "upload_url": None,
+            "metodo": None,
+            "headers": {},
+            "deduplicado": True,
+        }
+        # conteúdo já armazenado: basta concluir
+        if await self.armazenamento.existe(nome):
+            return resposta
+
+        url, headers = self.armazenamento.url_upload(nome, evidencia.mime, evidencia.tamanho, sha256, validade)
+        resposta.update({"upload_url": url, "metodo": "PUT", "headers": headers, "deduplicado": False})
+        return resposta
+
+    async def receber_direto(self, token: str, corpo: AsyncIterator[bytes]) -> dict:
+        """Receptor do envio direto no armazenamento local: confere tamanho e hash assinados."""
+        dados = verificar(token)
+        temporario, sha256, tamanho, mime = await self._receber(corpo, dados["m"], dados["t"])
+        if tamanho != dados["t"] or sha256 != dados["s"]:
+            await asyncio.to_thread(os.remove, temporario)
+            raise HTTPException(status_code=400, detail="Conteúdo não confere com o hash e o tamanho declarados.")
+        if mime != dados["m"]:
+            await asyncio.to_thread(os.remove, temporario)
+            raise HTTPException(status_code=415, detail=f"Conteúdo não confere com o tipo declarado ({dados['m']}).")
+        if await self.armazenamento.existe(dados["n"]):
+            await asyncio.to_thread(os.remove, temporario)
+        else:
+            await self.armazenamento.gravar(temporario, dados["n"], mime)
+        return {"sha256": sha256, "tamanho": tamanho}
+
+    async def concluir_upload_direto(self, token: str, usuario_id: int) -> dict:
+        # a conclusão pode vir logo depois de um envio que terminou no limite da validade
+        dados = verificar(token, tolerancia_segundos=settings.EVIDENCIA_URL_VALIDADE_SEGUNDOS)
+        if dados.get("u") != usuario_id or "p" not in dados:
+            raise HTTPException(status_code=403, detail="Assinatura inválida")
+        nome = dados["n"]
+        conferido = await self.armazenamento.conferir(nome, dados["s"], dados["t"])
+        if conferido is None:
+            raise HTTPException(status_code=409, detail="O arquivo ainda não foi enviado ao armazenamento.")
+        if not conferido:
+            await self.armazenamento.remover(nome)
+            raise HTTPException(status_code=400, detail="Conteúdo não confere com o hash e o tamanho declarados.")
+        # no S3 os bytes não passaram pela API: o tipo declarado é conferido aqui
+        async with aclosing(self.armazenamento.ler(nome, 16)) as blocos:
+            cabecalho = await anext(blocos, b"")
+        if detectar_mime(cabecalho, dados["m"]) != dados["m"]:
+            await self.armazenamento.remover(nome)
+            raise HTTPException(status_code=415, detail=f"Conteúdo não confere com o tipo declarado ({dados['m']}).")
+
+        evidencia = await self.repo.registrar(dados["s"], dados["t"], dados["m"], os.path.splitext(nome)[1])
+        self._agendar_derivados(nome, dados["s"])
+        resultado = self._resultado(evidencia, nome, deduplicado=False)
+        resultado["passo_id"] = dados["p"]
+        return resultado
+
+    # --- upload retomável ---
+    #
+    # POST cria a sessão, cada PUT grava um trecho a partir do offset que o
+    # servidor já confirmou, GET informa esse offset e concluir move o arquivo
+    # para o armazenamento por hash. O estado fica no banco e os trechos no
+    # backend de armazenamento, então sobrevive à queda da conexão, ao
+    # reinício dos workers e a trechos que chegam a nós diferentes.
+
+    async def _sessao(self, sessao_id: str, usuario_id: int) -> UploadEvidencia:
+        sessao = await self.uploads.get(sessao_id)
+        if not sessao or sessao.usuario_id != usuario_id:
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+        return sessao
+
+    async def iniciar_upload(
+        self, passo_id: int, usuario_id: int, tamanho: int, nome_arquivo: Optional[str], content_type: Optional[str]
+    ) -> UploadEvidencia:
+        if tamanho > self.tamanho_maximo:
+            raise self._erro_tamanho()
+        if content_type and not tipo_permitido(content_type):
+            raise _erro_tipo(content_type)
+
+        sessao_id = str(uuid.uuid4())
+        referencia = await self.armazenamento.iniciar_parcial(sessao_id, content_type)
+        return await self.uploads.create({
+            "id": sessao_id,
+            "usuario_id": usuario_id,
+            "passo_id": passo_id,
+            "nome_arquivo": nome_arquivo,
+            "content_type": content_type,
+            "tamanho": tamanho,
+            "referencia": referencia,
+        })
+
+    async def progresso(self, sessao_id: str, usuario_id: int) -> UploadEvidencia:
+        return await self._sessao(sessao_id, usuario_id)
+
+    async def receber_bloco(
+        self, sessao_id: str, usuario_id: int, offset: int, corpo: AsyncIterator[bytes]
+    ) -> UploadEvidencia:
+        """
+        Grava o trecho que começa em `offset`. Se a conexão cair no meio, o que
+        chegou até ali é confirmado (desde que atinja o tamanho mínimo de
+        trecho do backend) e o cliente retoma do novo offset.
+        """
+        sessao = await self._sessao(sessao_id, usuario_id)
+        if offset != sessao.recebido:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Offset {offset} não confere; o servidor já recebeu {sessao.recebido} bytes.",
+                headers={"Upload-Offset": str(sessao.recebido)},
+            )
+
+        # o trecho passa por um temporário local e só depois vai inteiro para o armazenamento
+        pasta_temporaria = os.path.join(self.diretorio, ".tmp")
+        await asyncio.to_thread(os.makedirs, pasta_temporaria, exist_ok=True)
+        temporario = os.path.join(pasta_temporaria, f"{uuid.uuid4()}.parcial")
+
+        escrito = 0
+        cabecalho = b""
+        desconectou = False
+        arquivo = await asyncio.to_thread(open, temporario, "wb")
+        try:
+            try:
+                async for bloco in corpo:
+                    if not bloco:
+                        continue
+                    if offset + escrito + len(bloco) > sessao.tamanho:
+                        raise HTTPException(status_code=413, detail="Trecho ultrapassa o tamanho declarado do arquivo.")
+                    if offset == 0 and len(cabecalho) < 16:
+                        cabecalho += bloco[:16 - len(cabecalho)]
+                        if len(cabecalho) == 16 or offset + escrito + len(bloco) == sessao.tamanho:
+                            mime = detectar_mime(cabecalho, sessao.content_type)
+                            if not tipo_permitido(mime):
+                                raise _erro_tipo(mime)
+                    await asyncio.to_thread(arquivo.write, bloco)
+                    escrito += len(bloco)
+            except ClientDisconnect:
+                # conexão caiu: confirma o que chegou
+                desconectou = True
+            await asyncio.to_thread(arquivo.close)
+        except BaseException:
+            await asyncio.to_thread(arquivo.close)
+            await asyncio.to_thread(os.remove, temporario)
+            raise
+
+        ultimo = offset + escrito == sessao.tamanho
+        minimo = self.armazenamento.tamanho_minimo_trecho
+        if not escrito or (not ultimo and escrito < minimo):
+            await asyncio.to_thread(os.remove, temporario)
+            if escrito and not desconectou:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Trechos que não são o último precisam ter ao menos {minimo} bytes.",
+                    headers={"Upload-Offset": str(sessao.recebido)},
+                )
+            return sessao
+
+        partes = list(sessao.partes or [])
+        try:
+            etiqueta = await self.armazenamento.gravar_trecho(
+                sessao.id, sessao.referencia, len(partes) + 1, offset, temporario
+            )
+        except FileNotFoundError:
+            raise HTTPException(status_code=410, detail="Arquivo parcial expirado; inicie outro upload.")
+
+        valores = {"partes": partes + [etiqueta]} if etiqueta is not None else {}
+        if not await self.uploads.avancar(sessao.id, offset, offset + escrito, **valores):
+            raise HTTPException(status_code=409, detail="Outro envio confirmou este trecho primeiro.")
+        return await self.uploads.get(sessao.id)
+
+    async def concluir_upload(self, sessao_id: str, usuario_id: int) -> dict:
+        sessao = await self._sessao(sessao_id, usuario_id)
+        if sessao.recebido != sessao.tamanho:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incompleto: {sessao.recebido} de {sessao.tamanho} bytes.",
+                headers={"Upload-Offset": str(sessao.recebido)},
+            )
+
+        try:
+            sha256, cabecalho = await self.armazenamento.fechar_parcial(
+                sessao.id, sessao.referencia, list(sessao.partes or []), sessao.tamanho
+            )
+        except FileNotFoundError:
+            raise HTTPException(status_code=410, detail="Arquivo parcial expirado; inicie outro upload.")
+        mime = detectar_mime(cabecalho, sessao.content_type)
+        if not tipo_permitido(mime):
+            raise _erro_tipo(mime)
+
+        # apagar a sessão é o que dá a posse do arquivo: uma segunda conclusão recebe 404
+        if not await self.uploads.reivindicar(sessao.id, UploadEvidencia.recebido == sessao.tamanho):
+            raise HTTPException(status_code=404, detail="Sessão de upload não encontrada")
+        resultado = await self._guardar(
+            sha256, sessao.tamanho, mime, _extensao(mime),
+            gravar=lambda nome, mime: self.armazenamento.promover_parcial(sessao.id, nome, mime),
+            descartar=lambda: self.armazenamento.descartar_parcial(sessao.id, sessao.referencia),
+        )
+        resultado["passo_id"] = sessao.passo_id
+        return resultado
+
+    async def cancelar_upload(self, sessao_id: str, usuario_id: int) -> None:
+        sessao = await self._sessao(sessao_id, usuario_id)
+        if await self.uploads.reivindicar(sessao.id):
+            await self.armazenamento.descartar_parcial(sessao.id, sessao.referencia)
+
+    async def expirar_uploads(self, expiracao: timedelta) -> int:
+        """Apaga sessões paradas há mais que `expiracao` e parciais sem sessão."""
+        corte = datetime.now(timezone.utc) - expiracao
+        expiradas = await self.uploads.remover_expiradas(corte)
+        ativas = set(await self.uploads.ids_ativos())
+        await self.armazenamento.limpar_parciais(ativas, corte)
+        return len(expiradas)
+
+    async def coletar_lixo(self, carencia: timedelta) -> int:
+        """Remove blobs sem referência há mais que `carencia`. Devolve quantos foram removidos."""
+        removidos = 0
+        while True:
+            orfas = await self.repo.orfas(carencia)
+            if not orfas:
+                break
+            for evidencia in orfas:
+                await self.armazenamento.remover(caminho_blob(evidencia.sha256, evidencia.extensao))
+                await asyncio.to_thread(derivados.remover, evidencia.sha256)
+            await self.repo.remover([e.sha256 for e in orfas])
+            await self.repo.db.commit()
+            removidos += len(orfas)
+
+        # uploads interrompidos que deixaram arquivos temporários
+        pasta_temporaria = os.path.join(self.diretorio, ".tmp")
+        if os.path.isdir(pasta_temporaria):
+            corte = time.time() - carencia.total_seconds()
+            for nome in await asyncio.to_thread(os.listdir, pasta_temporaria):
+                caminho = os.path.join(pasta_temporaria, nome)
+                try:
+                    if await asyncio.to_thread(os.path.getmtime, caminho) < corte:
+                        await asyncio.to_thread(os.remove, caminho)
+                except FileNotFoundError:
+                    pass
+        return removidos
@@ -1,34 +1,101 @@
-from typing import List, Optional
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, UploadFile
 
+from app.core.pagination import Page, PageParams
 from app.repositories.execucao_teste_repository import ExecucaoTesteRepository
 from app.repositories.caso_teste_repository import CasoTesteRepository
+from app.repositories.ciclo_teste_repository import CicloTesteRepository
 from app.repositories.defeito_repository import DefeitoRepository
-from app.schemas.execucao_teste import ExecucaoTesteResponse, ExecucaoPassoUpdate, ExecucaoPassoResponse
+from app.repositories.usuario_repository import UsuarioRepository
+from app.services.evidencia_service import EvidenciaService
+from app.schemas.execucao_teste import (
+    ExecucaoTesteResponse, ExecucaoPassoUpdate, ExecucaoPassoResponse,
+    AlocacaoLoteCreate, AlocacaoLoteResponse, RegraAlocacaoEnum,
+    ExecucaoPassoLoteUpdate, ExecucaoPassoLoteResponse, ExecucaoStatusResumo
+)
 from app.schemas.defeito import DefeitoCreate
+from app.schemas.evidencia import UploadEvidenciaCreate, UploadDiretoCreate
 from app.models.testing import StatusExecucaoEnum, StatusPassoEnum
 
+# --- MAPPER DE STATUS PARA CORRIGIR O ERRO DE ENUM ---
+# Frontend envia: "passou", "falhou"
+# Banco espera: "aprovado", "reprovado" (Conforme seu models/testing.py)
+STATUS_PASSO_MAP = {
+    "passou": "aprovado",
+    "sucesso": "aprovado",
+    "passed": "aprovado",
+
+    "falhou": "reprovado",
+    "falha": "reprovado",
+    "failed": "reprovado"
+}
+
+def converter_status_passo(status: Optional[str]) -> Optional[str]:
+    # Tenta traduzir, se não conseguir, mantém o original (pode ser que já esteja certo)
+    return STATUS_PASSO_MAP.get(status, status)
+
 class ExecucaoTesteService:
     def __init__(self, db: AsyncSession):
         self.repo = ExecucaoTesteRepository(db)
         self.caso_repo = CasoTesteRepository(db)
+        self.ciclo_repo = CicloTesteRepository(db)
         self.defeito_repo = DefeitoRepository(db)
+        self.usuario_repo = UsuarioRepository(db)
+        self.evidencias = EvidenciaService(db)
 
     async def alocar_teste(self, ciclo_id: int, caso_id: int, responsavel_id: int) -> ExecucaoTesteResponse:
-        nova_exec = await self.repo.create(ciclo_id, caso_id, responsavel_id)
+        nova_exec = await self.repo.criar_planejamento(ciclo_id, caso_id, responsavel_id)
         return ExecucaoTesteResponse.model_validate(nova_exec)
 
-    async def listar_tarefas_usuario(self, usuario_id: int, status: Optional[str] = None, skip: int = 0, limit: int = 20) -> List[ExecucaoTesteResponse]:
+    async def alocar_em_lote(self, dados: AlocacaoLoteCreate) -> AlocacaoLoteResponse:
+        ciclo = await self.ciclo_repo.get_by_id(dados.ciclo_teste_id)
+        if not ciclo:
+            raise HTTPException(status_code=404, detail="Ciclo de teste não encontrado")
+
+        if dados.caso_ids is None and dados.projeto_id is None:
+            raise HTTPException(status_code=400, detail="Informe caso_ids ou projeto_id para selecionar os casos.")
+
+        if dados.projeto_id is not None and dados.projeto_id != ciclo.projeto_id:
+            raise HTTPException(status_code=400, detail="O projeto informado não é o projeto do ciclo.")
+
+        if dados.regra == RegraAlocacaoEnum.fixo and not dados.responsavel_id:
+            raise HTTPException(status_code=400, detail="A regra 'fixo' exige responsavel_id.")
+
+        if dados.regra == RegraAlocacaoEnum.rodizio and not dados.responsaveis_ids:
+            raise HTTPException(status_code=400, detail="A regra 'rodizio' exige responsaveis_ids.")
+
+        responsaveis = {
+            RegraAlocacaoEnum.fixo: [dados.responsavel_id],
+            RegraAlocacaoEnum.rodizio: dados.responsaveis_ids,
+        }.get(dados.regra, [])
+        if responsaveis:
+            inexistentes = sorted(set(responsaveis) - await self.usuario_repo.ids_existentes(responsaveis))
+            if inexistentes:
+                raise HTTPException(status_code=400, detail=f"Responsáveis não encontrados: {inexistentes}")
+
+        resumo = await self.repo.alocar_em_lote(
+            ciclo_id=dados.ciclo_teste_id,
+            caso_ids=dados.caso_ids,
+            # casos de outros projetos nunca entram no ciclo, mesmo listados em caso_ids
+            projeto_id=ciclo.projeto_id,
+            status_caso=dados.status_caso,
+            prioridade=dados.prioridade,
+            responsavel_fixo_id=dados.responsavel_id if dados.regra == RegraAlocacaoEnum.fixo else None,
+            rodizio_ids=dados.responsaveis_ids if dados.regra == RegraAlocacaoEnum.rodizio else None,
+        )
+        return AlocacaoLoteResponse(ciclo_teste_id=dados.ciclo_teste_id, **resumo)
+
+    async def listar_tarefas_usuario(self, usuario_id: int, params: PageParams, status: Optional[str] = None, ciclo_id: Optional[int] = None) -> Page[ExecucaoTesteResponse]:
         status_enum = None
         if status:
             try:
                 status_enum = StatusExecucaoEnum(status)
             except ValueError:
                 pass 
-        execucoes = await self.repo.get_minhas_execucoes(usuario_id, status_enum, skip, limit)
+        execucoes = await self.repo.get_minhas_execucoes(usuario_id, params, status_enum, ciclo_id)
         
-        return [ExecucaoTesteResponse.model_validate(e) for e in execucoes]
+        return execucoes.map(ExecucaoTesteResponse.model_validate)
 
     async def obter_execucao(self, execucao_id: int) -> Optional[ExecucaoTesteResponse]:
         execucao = await self.repo.get_by_id(execucao_id)
@@ -37,25 +104,9 @@ class ExecucaoTesteService:
         return None
 
     async def registrar_resultado_passo(self, passo_id: int, dados: ExecucaoPassoUpdate) -> ExecucaoPassoResponse:
-        # --- MAPPER DE STATUS PARA CORRIGIR O ERRO DE ENUM ---
-        # Frontend envia: "passou", "falhou"
-        # Banco espera: "aprovado", "reprovado" (Conforme seu models/testing.py)
-        
-        status_map = {
-            "passou": "aprovado",
-            "sucesso": "aprovado",
-            "passed": "aprovado",
-            
-            "falhou": "reprovado",
-            "falha": "reprovado",
-            "failed": "reprovado"
-        }
-        
-        # Tenta traduzir, se não conseguir, mantém o original (pode ser que já esteja certo)
-        status_convertido = status_map.get(dados.status, dados.status)
-
-        # Atualiza o DTO com o valor correto
-        dados.status = status_convertido
+        # Atualiza o DTO com o valor correto (sem marcar status como enviado quando não veio)
+        if 'status' in dados.model_fields_set:
+            dados.status = converter_status_passo(dados.status)
 
         # Validação extra antes de enviar pro banco
         try:
@@ -64,33 +115,37 @@ class ExecucaoTesteService:
             # Se ainda assim falhar, loga ou lança erro mais claro, mas vamos tentar prosseguir
             pass
         
-        passo_atual = await self.repo.get_execucao_passo(passo_id)
-        if not passo_atual:
+        # A consolidação do status geral da execução acontece no próprio update
+        atualizado = await self.repo.update_passo(passo_id, dados)
+        if not atualizado:
             raise HTTPException(status_code=404, detail="Passo de execução não encontrado")
 
-        atualizado = await self.repo.update_passo(passo_id, dados)
-        
-        # Atualiza status geral da execução
-        await self._atualizar_status_execucao(passo_atual.execucao_teste_id)
-        
         return ExecucaoPassoResponse.model_validate(atualizado)
 
-    async def _atualizar_status_execucao(self, execucao_id: int):
-        execucao = await self.repo.get_by_id(execucao_id)
-        if not execucao:
-            return
+    async def registrar_resultados_em_lote(self, dados: ExecucaoPassoLoteUpdate) -> ExecucaoPassoLoteResponse:
+        if not dados.passos:
+            raise HTTPException(status_code=400, detail="Informe ao menos um passo.")
 
-        passos = execucao.passos_executados # Corrigido nome do relacionamento
-        todos_status = [p.status for p in passos]
-        
-        # Lógica de consolidação baseada no seu Enum (aprovado/reprovado)
-        if all(s == StatusPassoEnum.aprovado for s in todos_status):
-             await self.repo.update_status_geral(execucao_id, StatusExecucaoEnum.fechado) 
-        elif any(s == StatusPassoEnum.reprovado for s in todos_status): 
-             await self.repo.update_status_geral(execucao_id, StatusExecucaoEnum.em_progresso) # Ou outro status de falha geral
-        else:
-             if execucao.status_geral == StatusExecucaoEnum.pendente:
-                 await self.repo.update_status_geral(execucao_id, StatusExecucaoEnum.em_progresso)
+        linhas = []
+        for item in dados.passos:
+            linha = item.model_dump(exclude_unset=True)
+            if 'status' in linha:
+                try:
+                    linha['status'] = StatusPassoEnum(converter_status_passo(linha['status']))
+                except ValueError:
+                    raise HTTPException(status_code=400, detail=f"Status inválido para o passo {item.id}: {item.status}")
+            linhas.append(linha)
+
+        execucoes_por_passo = await self.repo.get_execucoes_dos_passos([l['id'] for l in linhas])
+        faltando = sorted({l['id'] for l in linhas} - execucoes_por_passo.keys())
+        if faltando:
+            raise HTTPException(status_code=404, detail=f"Passos de execução não encontrados: {faltando}")
+
+        passos, alteradas = await self.repo.update_passos_em_lote(linhas, set(execucoes_por_passo.values()))
+        return ExecucaoPassoLoteResponse(
+            passos=[ExecucaoPassoResponse.model_validate(p) for p in passos],
+            execucoes_alteradas=[ExecucaoStatusResumo(id=i, status_geral=s) for i, s in alteradas]
+        )
 
     async def finalizar_execucao(self, execucao_id: int, status_final: StatusExecucaoEnum) -> Optional[ExecucaoTesteResponse]:
         execucao = await self.repo.update_status_geral(execucao_id, status_final)
@@ -99,28 +154,20 @@ class ExecucaoTesteService:
         return None
 
     async def upload_evidencia(self, passo_id: int, file: UploadFile) -> dict:
-        import shutil
-        import os
-        import uuid
-        
-        os.makedirs("evidencias", exist_ok=True)
-        
-        # 1. Gerar nome seguro (UUID) para evitar caracteres inválidos na URL
-        extension = os.path.splitext(file.filename)[1]
-        if not extension:
-            extension = ".jpg"
-            
-        safe_filename = f"{passo_id}_{uuid.uuid4()}{extension}"
-        file_path = f"evidencias/{safe_filename}"
-        
-        # 2. Resetar o ponteiro do arquivo antes de ler
-        await file.seek(0)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # 3. Retornar Dicionário compatível com o Frontend
-        # O Frontend espera: response.data.url
-        full_url = f"http://localhost:8000/evidencias/{safe_filename}"
-        
-        return {"url": full_url}
\ No newline at end of file
+        if not await self.repo.get_execucao_passo(passo_id):
+            raise HTTPException(status_code=404, detail="Passo de execução não encontrado")
+        return await self.evidencias.salvar_upload(file)
+
+    async def iniciar_upload_evidencia(self, passo_id: int, usuario_id: int, dados: UploadEvidenciaCreate):
+        if not await self.repo.get_execucao_passo(passo_id):
+            raise HTTPException(status_code=404, detail="Passo de execução não encontrado")
+        return await self.evidencias.iniciar_upload(
+            passo_id, usuario_id, dados.tamanho, dados.nome_arquivo, dados.content_type
+        )
+
+    async def preparar_upload_direto(self, passo_id: int, usuario_id: int, dados: UploadDiretoCreate) -> dict:
+        if not await self.repo.get_execucao_passo(passo_id):
+            raise HTTPException(status_code=404, detail="Passo de execução não encontrado")
+        return await self.evidencias.preparar_upload_direto(
+            passo_id, usuario_id, dados.sha256, dados.tamanho, dados.content_type, dados.nome_arquivo
+        )
@@ -1,11 +1,20 @@
+from datetime import datetime
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.auditoria import auditoria
+from app.core.config import settings
+from app.core.pagination import Page, PageParams
 from app.repositories.log_repository import LogRepository
 from app.schemas.log import LogCreate, LogResponse
 
 class LogService:
     def __init__(self, db: AsyncSession):
         self.repo = LogRepository(db)
-    async def registrar_acao(self, usuario_id: int, acao: str, entidade: str, entidade_id: int = None, sistema_id: int = None, detalhes: str = ""):
+    async def registrar_acao(self, usuario_id: int, acao: str, entidade: str, entidade_id: int = None, sistema_id: int = None, detalhes: str = "", projeto_id: int = None):
+        """
+        Enfileira o log para gravação em lote (não usa a sessão da requisição).
+        Se só o projeto for conhecido, o sistema é resolvido na gravação.
+        """
         dados = LogCreate(
             usuario_id=usuario_id,
             sistema_id=sistema_id,
@@ -14,22 +23,17 @@ class LogService:
             entidade_id=entidade_id,
             detalhes=detalhes
         )
-        await self.repo.create(dados)
+        await auditoria.registrar({**dados.model_dump(), "projeto_id": projeto_id, "created_at": datetime.now()})
 
-    async def listar_todos(self):
-        logs = await self.repo.get_all(limit=200)
-        return [
-            LogResponse(
-                id=l.id,
-                usuario_nome=l.usuario.nome if l.usuario else "Sistema",
-                sistema_nome=l.sistema.nome if l.sistema else None,
-                sistema_id=l.sistema_id,
-                acao=l.acao,
-                entidade=l.entidade,
-                detalhes=l.detalhes,
-                created_at=l.created_at
-            ) for l in logs
-        ]
+    async def listar(self, params: PageParams, **filtros) -> Page[LogResponse]:
+        page = await self.repo.get_page(params, **filtros)
+        return page.map(lambda l: LogResponse(**{**l, "usuario_nome": l["usuario_nome"] or "Sistema"}))
+
+    async def manter_particoes(self) -> List[str]:
+        return await self.repo.garantir_particoes(settings.LOG_PARTICOES_FUTURAS)
+
+    async def aplicar_retencao(self) -> List[str]:
+        return await self.repo.aplicar_retencao(settings.LOG_RETENCAO_MESES)
 
     async def excluir_log(self, id: int):
         return await self.repo.delete(id)
\ No newline at end of file
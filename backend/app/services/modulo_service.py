@@ -1,7 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from typing import Sequence, Optional
+from typing import Optional
 
+from app.core.pagination import Page, PageParams
 from app.repositories.modulo_repository import ModuloRepository
 from app.schemas.modulo import ModuloCreate, ModuloUpdate, ModuloResponse
 from app.core.errors import tratar_erro_integridade
@@ -20,9 +21,9 @@ class ModuloService:
                 "sistema_id": "O sistema informado não existe."
             })
 
-    async def get_all_modulos(self) -> Sequence[ModuloResponse]:
-        items = await self.repo.get_all()
-        return [ModuloResponse.model_validate(i) for i in items]
+    async def get_all_modulos(self, params: PageParams, **filtros) -> Page[ModuloResponse]:
+        items = await self.repo.get_all(params, **filtros)
+        return items.map(ModuloResponse.model_validate)
 
     async def get_modulo_by_id(self, id: int) -> Optional[ModuloResponse]:
         item = await self.repo.get_by_id(id)
@@ -0,0 +1,201 @@
+import asyncio
+import csv
+import io
+import os
+import re
+import zipfile
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Set
+
+from fastapi import HTTPException
+
+from app.core.armazenamento import ArmazenamentoEvidencias, ArmazenamentoLocal, armazenamento as armazenamento_padrao
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.repositories.evidencia_repository import EvidenciaRepository
+from app.schemas.defeito import DefeitoBase
+
+ESCOPOS = ("ciclo", "execucao", "defeito")
+TAMANHO_PAGINA = 500
+TAMANHO_BLOCO = 1024 * 1024
+
+# Já comprimidos: deflate só gastaria CPU
+EXTENSOES_ARMAZENADAS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp4", ".webm", ".mov", ".pdf", ".zip", ".gz", ".7z",
+}
+
+_URL_EVIDENCIA = re.compile(r"/evidencias/(?:download/)?([^?#]+)")
+
+COLUNAS_MANIFESTO = [
+    "origem", "caso_id", "caso", "execucao_id", "status_execucao", "passo_ordem", "status_passo",
+    "defeito_id", "defeito", "status_defeito", "data", "arquivo",
+]
+
+
+def _nome_blob(url: str) -> Optional[str]:
+    """Caminho do blob a partir da URL gravada; None para nomes que não são arquivos nossos."""
+    m = _URL_EVIDENCIA.search(url)
+    if not m:
+        return None
+    nome = m.group(1)
+    partes = nome.split("/")
+    if any(not p or p.startswith(".") for p in partes):
+        return None
+    return nome
+
+
+def _urls(valor: Optional[str]) -> List[str]:
+    # mesmo formato flexível aceito nos schemas de defeito
+    return [u for u in DefeitoBase.parse_evidencias_flex(valor) if isinstance(u, str)]
+
+
+def _valor(enum_ou_texto) -> str:
+    return getattr(enum_ou_texto, "value", enum_ou_texto) or ""
+
+
+class _Saida:
+    """Destino do zipfile sem seek: acumula o que foi escrito até o próximo yield."""
+
+    def __init__(self):
+        self.partes: List[bytes] = []
+
+    def write(self, dados) -> int:
+        self.partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self) -> None:
+        pass
+
+    def drenar(self) -> bytes:
+        dados = b"".join(self.partes)
+        self.partes.clear()
+        return dados
+
+
+class PacoteEvidenciasService:
+    """
+    ZIP com todas as evidências de um ciclo, uma execução ou um defeito,
+    montado enquanto é enviado: sem arquivo temporário, e a memória não
+    depende do tamanho dos arquivos (só o conjunto de nomes já incluídos
+    cresce com a quantidade de anexos).
+
+    O zipfile escreve num destino sem seek (cabeçalhos com data descriptor)
+    e cada bloco sai para o cliente logo depois de escrito. As linhas vêm do
+    banco em páginas por id, cada uma numa sessão curta, para não segurar
+    uma conexão durante todo o download. O manifesto (manifesto.csv) é
+    gerado numa primeira passada; os arquivos, numa segunda. Um blob citado
+    várias vezes entra no ZIP uma vez só.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, armazenamento: ArmazenamentoEvidencias = None,
+                 diretorio: str = None):
+        self.session_factory = session_factory
+        self.armazenamento = armazenamento or armazenamento_padrao
+        # arquivos antigos que ficaram no disco continuam valendo com outros backends
+        self.disco = ArmazenamentoLocal(diretorio or settings.EVIDENCIAS_DIR, settings.EVIDENCIA_URL_BASE)
+
+    async def verificar(self, escopo: str, id: int) -> None:
+        async with self.session_factory() as session:
+            if not await EvidenciaRepository(session).escopo_existe(escopo, id):
+                raise HTTPException(status_code=404, detail=f"{escopo.capitalize()} não encontrado")
+
+    def nome_arquivo(self, escopo: str, id: int) -> str:
+        return f"evidencias-{escopo}-{id}.zip"
+
+    async def _linhas(self, escopo: str, id: int) -> AsyncIterator[dict]:
+        """Uma linha por evidência citada, em passos e depois em defeitos."""
+        fontes = [("defeito", "pagina_defeitos")]
+        if escopo != "defeito":
+            fontes.insert(0, ("passo", "pagina_passos"))
+
+        for origem, metodo in fontes:
+            ultimo = 0
+            while True:
+                async with self.session_factory() as session:
+                    pagina = await getattr(EvidenciaRepository(session), metodo)(escopo, id, ultimo, TAMANHO_PAGINA)
+                if not pagina:
+                    break
+                for linha in pagina:
+                    for url in _urls(linha.evidencias):
+                        base = {
+                            "origem": origem,
+                            "caso_id": linha.caso_id,
+                            "caso": linha.caso_nome,
+                            "execucao_id": linha.execucao_id,
+                            "status_execucao": _valor(linha.status_geral),
+                            "url": url,
+                            "blob": _nome_blob(url),
+                        }
+                        if origem == "passo":
+                            base.update(passo_ordem=linha.ordem, status_passo=_valor(linha.status), data=linha.updated_at)
+                        else:
+                            base.update(defeito_id=linha.id, defeito=linha.titulo,
+                                        status_defeito=_valor(linha.status), data=linha.created_at)
+                        yield base
+                ultimo = pagina[-1].id
+
+    def _entrada(self, nome: str, data: Optional[datetime]) -> zipfile.ZipInfo:
+        info = zipfile.ZipInfo(nome, date_time=(data or datetime.now()).timetuple()[:6])
+        armazenado = os.path.splitext(nome)[1].lower() in EXTENSOES_ARMAZENADAS
+        info.compress_type = zipfile.ZIP_STORED if armazenado else zipfile.ZIP_DEFLATED
+        return info
+
+    async def _fonte(self, blob: str) -> ArmazenamentoEvidencias:
+        if self.armazenamento.local or await self.disco.existe(blob):
+            return self.disco
+        return self.armazenamento
+
+    async def gerar(self, escopo: str, id: int) -> AsyncIterator[bytes]:
+        async for dados in self._gerar(escopo, id):
+            if dados:
+                yield dados
+
+    async def _gerar(self, escopo: str, id: int) -> AsyncIterator[bytes]:
+        saida = _Saida()
+        with zipfile.ZipFile(saida, mode="w", allowZip64=True) as pacote:
+            # 1ª passada: manifesto
+            with pacote.open(self._entrada("manifesto.csv", None), mode="w") as manifesto:
+                texto = io.StringIO()
+                escritor = csv.DictWriter(texto, fieldnames=COLUNAS_MANIFESTO, extrasaction="ignore")
+                escritor.writeheader()
+                async for linha in self._linhas(escopo, id):
+                    linha["arquivo"] = f"arquivos/{os.path.basename(linha['blob'])}" if linha["blob"] else linha["url"]
+                    linha["data"] = linha.get("data").isoformat() if linha.get("data") else ""
+                    escritor.writerow(linha)
+                    if texto.tell() >= TAMANHO_BLOCO:
+                        manifesto.write(texto.getvalue().encode("utf-8"))
+                        texto.seek(0)
+                        texto.truncate()
+                        yield saida.drenar()
+                manifesto.write(texto.getvalue().encode("utf-8"))
+            yield saida.drenar()
+
+            # 2ª passada: arquivos
+            incluidos: Set[str] = set()
+            ausentes: List[str] = []
+            async for linha in self._linhas(escopo, id):
+                blob = linha["blob"]
+                if not blob or blob in incluidos:
+                    continue
+                incluidos.add(blob)
+                fonte = await self._fonte(blob)
+                blocos = fonte.ler(blob, TAMANHO_BLOCO)
+                try:
+                    primeiro = await blocos.__anext__()
+                except (FileNotFoundError, StopAsyncIteration):
+                    ausentes.append(linha["url"])
+                    continue
+                # o tamanho só é conhecido no fim: zip64 sempre, para vídeos acima de 4 GB
+                entrada = self._entrada(f"arquivos/{os.path.basename(blob)}", linha.get("data"))
+                with pacote.open(entrada, mode="w", force_zip64=True) as destino:
+                    await asyncio.to_thread(destino.write, primeiro)
+                    yield saida.drenar()
+                    async for bloco in blocos:
+                        # CRC e deflate fora do event loop
+                        await asyncio.to_thread(destino.write, bloco)
+                        yield saida.drenar()
+                yield saida.drenar()
+
+            if ausentes:
+                pacote.writestr(self._entrada("ausentes.txt", None), "\n".join(ausentes) + "\n")
+        yield saida.drenar()
@@ -1,7 +1,8 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from typing import Sequence, Optional
+from typing import Optional
 
+from app.core.pagination import Page, PageParams
 from app.repositories.projeto_repository import ProjetoRepository
 from app.schemas.projeto import ProjetoCreate, ProjetoUpdate, ProjetoResponse
 from app.core.errors import tratar_erro_integridade
@@ -21,9 +22,9 @@ class ProjetoService:
                 "responsavel_id": "Responsável inválido."
             })
 
-    async def get_all_projetos(self) -> Sequence[ProjetoResponse]:
-        items = await self.repo.get_all()
-        return [ProjetoResponse.model_validate(i) for i in items]
+    async def get_all_projetos(self, params: PageParams, **filtros) -> Page[ProjetoResponse]:
+        items = await self.repo.get_all(params, **filtros)
+        return items.map(ProjetoResponse.model_validate)
 
     async def get_projeto_by_id(self, id: int) -> Optional[ProjetoResponse]:
         item = await self.repo.get_by_id(id)
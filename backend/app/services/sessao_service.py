@@ -0,0 +1,84 @@
+import hashlib
+import hmac
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.usuario import Usuario
+from app.repositories.sessao_repository import SessaoRepository
+from app.repositories.usuario_repository import UsuarioRepository
+
+class SessaoService:
+    """
+    Refresh tokens rotativos. Renovar não passa pelo bcrypt: o segredo é
+    aleatório (256 bits), então basta comparar o SHA-256 guardado. A cada
+    renovação o segredo muda; um segredo antigo reapresentado encerra a sessão.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.repo = SessaoRepository(db)
+        self.usuarios = UsuarioRepository(db)
+
+    @staticmethod
+    def _hash(segredo: str) -> str:
+        return hashlib.sha256(segredo.encode()).hexdigest()
+
+    @staticmethod
+    def _expira_em() -> datetime:
+        return datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+    @staticmethod
+    def _negar(detalhe: str = "Sessão expirada. Faça login novamente.") -> HTTPException:
+        return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detalhe)
+
+    async def abrir(self, usuario: Usuario) -> str:
+        segredo = secrets.token_urlsafe(32)
+        sessao = await self.repo.create({
+            "id": str(uuid.uuid4()),
+            "usuario_id": usuario.id,
+            "token_hash": self._hash(segredo),
+            "token_versao": usuario.token_versao,
+            "expira_em": self._expira_em(),
+        })
+        return f"{sessao.id}.{segredo}"
+
+    async def renovar(self, refresh_token: str) -> Tuple[Usuario, str]:
+        """Valida o refresh token e devolve o usuário e o próximo refresh token."""
+        sessao_id, _, segredo = refresh_token.partition(".")
+        sessao = await self.repo.get_ativa(sessao_id, datetime.now(timezone.utc)) if segredo else None
+        if not sessao:
+            raise self._negar()
+
+        hash_atual = self._hash(segredo)
+        if not hmac.compare_digest(hash_atual, sessao.token_hash):
+            # segredo já trocado: alguém ficou com uma cópia do token; encerra para os dois
+            await self.repo.remover(sessao.id)
+            raise self._negar()
+
+        usuario = await self.usuarios.get_by_id(sessao.usuario_id)
+        if not usuario or not usuario.ativo or usuario.token_versao != sessao.token_versao:
+            await self.repo.remover(sessao.id)
+            raise self._negar()
+
+        novo = secrets.token_urlsafe(32)
+        if not await self.repo.rotacionar(sessao.id, hash_atual, self._hash(novo), self._expira_em()):
+            raise self._negar()
+        return usuario, f"{sessao.id}.{novo}"
+
+    async def encerrar(self, refresh_token: str) -> None:
+        """Logout: só quem tem o segredo atual encerra a sessão."""
+        sessao_id, _, segredo = refresh_token.partition(".")
+        sessao = await self.repo.get_ativa(sessao_id, datetime.now(timezone.utc)) if segredo else None
+        if sessao and hmac.compare_digest(self._hash(segredo), sessao.token_hash):
+            await self.repo.remover(sessao.id)
+
+    async def encerrar_do_usuario(self, usuario_id: int) -> int:
+        return await self.repo.remover_do_usuario(usuario_id)
+
+    async def remover_expiradas(self) -> int:
+        return await self.repo.remover_expiradas(datetime.now(timezone.utc))
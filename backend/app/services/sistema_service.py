@@ -1,9 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from typing import Sequence, Optional
+from typing import Optional
 
 from app.models import Sistema
+from app.core.pagination import Page, PageParams
 from app.repositories.sistema_repository import SistemaRepository
 from app.schemas import SistemaCreate, SistemaUpdate
 from app.core.errors import tratar_erro_integridade
@@ -23,8 +24,8 @@ class SistemaService:
             await self.repo.db.rollback()
             tratar_erro_integridade(e)
 
-    async def get_all_sistemas(self) -> Sequence[Sistema]:
-        return await self.repo.get_all_sistemas()
+    async def get_all_sistemas(self, params: PageParams, ativo: Optional[bool] = None) -> Page[Sistema]:
+        return await self.repo.get_all_sistemas(params, ativo)
 
     async def get_sistema_by_id(self, sistema_id: int) -> Sistema | None:
         return await self.repo.get_sistema_by_id(sistema_id)
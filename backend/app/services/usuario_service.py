@@ -1,21 +1,27 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from typing import Sequence, Optional
+from typing import Optional
 from fastapi import HTTPException, status
 
 from app.models.usuario import Usuario
+from app.core.pagination import Page, PageParams
 from app.repositories.usuario_repository import UsuarioRepository
+from app.services.sessao_service import SessaoService
 from app.schemas.usuario import UsuarioCreate, UsuarioUpdate, UsuarioResponse
-from app.core.security import get_password_hash
+from app.core.cache import principal_cache
+from app.core.security import gerar_hash_senha
 from app.core.errors import tratar_erro_integridade
 
+# Mudanças que invalidam os tokens já emitidos (o JWT carrega o nível e só vale com o usuário ativo)
+CAMPOS_REVOGAM_TOKENS = ("senha_hash", "nivel_acesso_id", "ativo")
+
 class UsuarioService:
     def __init__(self, db: AsyncSession):
         self.repo = UsuarioRepository(db)
 
-    async def get_all_usuarios(self, ativo: Optional[bool] = None) -> Sequence[UsuarioResponse]:
-        db_usuarios = await self.repo.get_all_usuarios(ativo) 
-        return [UsuarioResponse.model_validate(u) for u in db_usuarios]
+    async def get_all_usuarios(self, params: PageParams, ativo: Optional[bool] = None, nivel_acesso_id: Optional[int] = None) -> Page[UsuarioResponse]:
+        db_usuarios = await self.repo.get_all_usuarios(params, ativo, nivel_acesso_id) 
+        return db_usuarios.map(UsuarioResponse.model_validate)
     
     async def get_usuario_by_id(self, usuario_id: int) -> Optional[UsuarioResponse]:
         db_usuario = await self.repo.get_by_id(usuario_id)
@@ -40,7 +46,7 @@ class UsuarioService:
             nome=usuario_data.nome,
             username=usuario_data.username,
             email=usuario_data.email,
-            senha_hash=get_password_hash(usuario_data.senha), 
+            senha_hash=await gerar_hash_senha(usuario_data.senha), 
             nivel_acesso_id=usuario_data.nivel_acesso_id,
             ativo=usuario_data.ativo
         )
@@ -62,12 +68,16 @@ class UsuarioService:
              raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização.")
 
         if 'senha' in update_dict:
-            update_dict['senha_hash'] = get_password_hash(update_dict.pop('senha'))
+            update_dict['senha_hash'] = await gerar_hash_senha(update_dict.pop('senha'))
 
         try:
-            usuario_atualizado_db = await self.repo.update(usuario_id, update_dict)
+            usuario_atualizado_db = await self.repo.update(usuario_id, update_dict, revogam_tokens=CAMPOS_REVOGAM_TOKENS)
             
             if usuario_atualizado_db:
+                if not usuario_atualizado_db.ativo:
+                    # desativado: as sessões renováveis acabam junto
+                    await SessaoService(self.repo.db).encerrar_do_usuario(usuario_id)
+                await self._invalidar_principal(usuario_id)
                 return UsuarioResponse.model_validate(usuario_atualizado_db)
             return None
         except IntegrityError as e:
@@ -93,10 +103,15 @@ class UsuarioService:
             )
 
         try:
-            return await self.repo.delete(usuario_id)
+            removido = await self.repo.delete(usuario_id)
+            await self._invalidar_principal(usuario_id)
+            return removido
         except IntegrityError as e:
             await self.repo.db.rollback()
             raise HTTPException(
                 status_code=400, 
                 detail="Não é possível excluir este utilizador pois ele possui registros vinculados (projetos, testes, etc)."
-            )
\ No newline at end of file
+            )
+
+    async def _invalidar_principal(self, usuario_id: int) -> None:
+        await principal_cache.invalidar(f"principal:{usuario_id}")
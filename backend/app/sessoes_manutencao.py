@@ -0,0 +1,47 @@
+"""
+Manutenção das sessões de login (refresh tokens).
+
+    python -m app.sessoes_manutencao limpar   # apaga de uma vez as sessões expiradas
+
+A aplicação já roda a limpeza no startup e depois a cada hora.
+"""
+import asyncio
+import logging
+import sys
+from typing import Optional
+from app.core.database import AsyncSessionLocal
+from app.core.manutencao import aguardar, trava_exclusiva
+from app.services.sessao_service import SessaoService
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_SEGUNDOS = 60 * 60
+
+async def limpar():
+    async with AsyncSessionLocal() as session:
+        removidas = await SessaoService(session).remover_expiradas()
+    print(f"--- {removidas} sessão(ões) expirada(s) removida(s) ---")
+
+async def manter_periodicamente(intervalo: int = INTERVALO_SEGUNDOS, parar: Optional[asyncio.Event] = None):
+    """Tarefa de fundo do lifespan: apaga as sessões expiradas (um worker por vez)."""
+    while not (parar and parar.is_set()):
+        try:
+            async with trava_exclusiva("manutencao:sessoes") as obtida:
+                if obtida:
+                    async with AsyncSessionLocal() as session:
+                        await SessaoService(session).remover_expiradas()
+        except Exception as e:
+            logger.error(f"Falha na limpeza de sessões: {e}")
+        await aguardar(parar, intervalo)
+
+if __name__ == "__main__":
+    comandos = {"limpar": limpar}
+    comando = sys.argv[1] if len(sys.argv) > 1 else None
+    if comando not in comandos:
+        print(__doc__)
+        sys.exit(2)
+    try:
+        asyncio.run(comandos[comando]())
+    except Exception as e:
+        print(f"Execution Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,79 @@
+"""
+Latência do event loop durante logins simultâneos: bcrypt direto no loop
+(como era) contra a pool de senhas de app.core.security.
+
+    cd backend && SECRET_KEY=x python scripts/benchmark_senhas.py [logins]
+
+Um "ticker" acorda a cada 5 ms e mede o atraso com que o loop o atende; é o
+atraso que qualquer outra requisição sofreria no mesmo momento.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import get_password_hash, pwd_context, verificar_senha  # noqa: E402
+
+INTERVALO = 0.005
+
+
+async def medir(logins: int, login) -> dict:
+    atrasos = []
+    recusados = 0
+    fim = asyncio.Event()
+
+    async def um_login():
+        nonlocal recusados
+        try:
+            await login()
+        except HTTPException:
+            # fila cheia além de SENHA_HASH_FILA_TIMEOUT_SEGUNDOS
+            recusados += 1
+
+    async def ticker():
+        while not fim.is_set():
+            antes = time.perf_counter()
+            await asyncio.sleep(INTERVALO)
+            atrasos.append(time.perf_counter() - antes - INTERVALO)
+
+    tarefa = asyncio.create_task(ticker())
+    await asyncio.sleep(INTERVALO * 4)
+    inicio = time.perf_counter()
+    await asyncio.gather(*(um_login() for _ in range(logins)))
+    total = time.perf_counter() - inicio
+    fim.set()
+    await tarefa
+    atrasos.sort()
+    return {
+        "total_s": round(total, 2),
+        "recusados_503": recusados,
+        "atraso_p50_ms": round(statistics.median(atrasos) * 1000, 1),
+        "atraso_p99_ms": round(atrasos[int(len(atrasos) * 0.99) - 1] * 1000, 1),
+        "atraso_max_ms": round(atrasos[-1] * 1000, 1),
+    }
+
+
+async def main(logins: int) -> None:
+    senha = "senha-de-teste"
+    hash_senha = get_password_hash(senha)
+
+    async def no_loop():
+        pwd_context.verify_and_update(senha, hash_senha)
+
+    async def na_pool():
+        await verificar_senha(senha, hash_senha)
+
+    print(f"{logins} logins simultâneos, bcrypt custo {settings.BCRYPT_ROUNDS}, "
+          f"pool de {settings.SENHA_HASH_CONCORRENCIA} threads")
+    for nome, login in (("no event loop", no_loop), ("pool de senhas", na_pool)):
+        print(f"{nome:>15}: {await medir(logins, login)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
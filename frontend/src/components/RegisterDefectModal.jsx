@@ -123,7 +123,7 @@ export function RegisterDefectModal({ isOpen, onClose, onConfirm, initialData })
             {(files.length + existingImages.length) < 3 && (
                 <div className="file-input-wrapper" onClick={() => document.getElementById('modal-file-upload').click()}>
                     <input 
-                        id="modal-file-upload" type="file" hidden multiple accept="image/*"
+                        id="modal-file-upload" type="file" hidden multiple accept="image/png,image/jpeg,image/gif,image/webp"
                         onChange={handleFileChange}
                     />
                     <span className="file-input-text">Clique para anexar</span>
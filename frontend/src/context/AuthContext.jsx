@@ -1,5 +1,5 @@
 import { createContext, useContext, useState } from 'react';
-import { getSession, clearSession } from '../services/api';
+import { getSession, clearSession, encerrarSessao } from '../services/api';
 
 const AuthContext = createContext(null);
 
@@ -20,6 +20,7 @@ export function AuthProvider({ children }) {
 
 
     sessionStorage.setItem("token", sessionData.token);
+    if (apiResponse.refresh_token) sessionStorage.setItem("refresh_token", apiResponse.refresh_token);
     sessionStorage.setItem("role", sessionData.role);
     sessionStorage.setItem("username", sessionData.username);
     sessionStorage.setItem("nome", sessionData.nome);
@@ -28,6 +29,7 @@ export function AuthProvider({ children }) {
   };
 
   const logout = () => {
+    encerrarSessao();
     sessionStorage.removeItem("token");
     sessionStorage.removeItem("role");
     sessionStorage.removeItem("username");
@@ -179,7 +179,7 @@ export function AdminCasosTeste() {
   useEffect(() => {
     const loadBasics = async () => {
       try {
-        const [projData, userData] = await Promise.all([api.get("/projetos"), api.get("/usuarios/")]);
+        const [projData, userData] = await Promise.all([api.getTodos("/projetos"), api.getTodos("/usuarios/")]);
         setProjetos(Array.isArray(projData) ? projData : []); 
         setUsuarios(Array.isArray(userData) ? userData : []);
         // REMOVIDO: setSelectedProjeto(ativos[0].id) -> Agora começa vazio para carregar tudo
@@ -202,7 +202,7 @@ export function AdminCasosTeste() {
         if (projId) {
             url = `/testes/projetos/${projId}/ciclos`;
         }
-        const response = await api.get(url);
+        const response = await api.getTodos(url);
         setCiclos(Array.isArray(response) ? response : []);
     } catch (err) {
         console.error("Erro ao buscar ciclos", err);
@@ -218,7 +218,7 @@ export function AdminCasosTeste() {
           url = `/testes/projetos/${projId}/casos`;
       }
       
-      const casosData = await api.get(url);
+      const casosData = await api.getTodos(url);
       
       // Carrega também os ciclos correspondentes (todos ou do projeto)
       await fetchCiclos(projId);
@@ -256,6 +256,7 @@ export function AdminCasosTeste() {
   
   const getCicloName = (caso) => {
       if (!caso) return '-';
+      if (caso.ciclo_nome) return caso.ciclo_nome;
       if (caso.ciclo && caso.ciclo.nome) return caso.ciclo.nome;
       const idBusca = caso.ciclo_id || caso.cicloId;
       if (!idBusca) return '-'; 
@@ -306,7 +307,10 @@ export function AdminCasosTeste() {
     await fetchCiclos(newProjectId);
   };
 
-  const handleEdit = async (caso) => {
+  const handleEdit = async (resumo) => {
+    // A listagem traz só o resumo; os passos vêm do detalhe do caso
+    const caso = await api.get(`/testes/casos/${resumo.id}`);
+
     let cicloIdValue = '';
     if (caso.ciclo_id !== null && caso.ciclo_id !== undefined) {
         cicloIdValue = caso.ciclo_id;
@@ -378,8 +382,8 @@ export function AdminCasosTeste() {
 
   const handleDelete = async () => { if (!casoToDelete) return; try { await api.delete(`/testes/casos/${casoToDelete.id}`); success("Excluído."); loadDadosProjeto(selectedProjeto); } catch (e) { error("Erro ao excluir."); } finally { setIsDeleteModalOpen(false); setCasoToDelete(null); } };
   
-  const handleImportarModelo = (casoId) => { 
-      const casoOrigem = casos.find(c => c.id === casoId); 
+  const handleImportarModelo = async (casoId) => { 
+      const casoOrigem = casos.find(c => c.id === casoId) ? await api.get(`/testes/casos/${casoId}`) : null; 
       if (casoOrigem) { 
           setForm(prev => ({ 
               ...prev, 
@@ -615,7 +619,7 @@ export function AdminCasosTeste() {
                                 <td className="cell-priority" style={{textAlign: 'center'}}><span className={`badge priority-badge ${c.prioridade}`}>{c.prioridade?.toUpperCase()}</span></td>
                                 <td className="cell-ciclo">{truncate(getCicloName(c), 20)}</td>
                                 <td><span className="cell-resp">{c.responsavel_id ? truncate(getRespName(c.responsavel_id), 20) : '-'}</span></td>
-                                <td className="cell-steps" style={{textAlign: 'center'}}>{c.passos?.length || 0}</td>
+                                <td className="cell-steps" style={{textAlign: 'center'}}>{c.total_passos ?? (c.passos?.length || 0)}</td>
                                 <td className="cell-actions"><button onClick={(e) => { e.stopPropagation(); setCasoToDelete(c); setIsDeleteModalOpen(true); }} className="btn danger small btn-action-icon"><Trash /></button></td>
                             </tr>
                            ))
@@ -132,7 +132,7 @@ export function AdminCiclos() {
   useEffect(() => {
     const loadProjetos = async () => {
       try {
-        const data = await api.get("/projetos/selection");
+        const data = await api.getTodos("/projetos/selection");
         setProjetos(data || []);
       } catch (err) { error("Erro ao carregar projetos."); }
     };
@@ -154,7 +154,7 @@ export function AdminCiclos() {
           url = `/testes/projetos/${projId}/ciclos`;
       }
       
-      const data = await api.get(url);
+      const data = await api.getTodos(url);
       setCiclos(Array.isArray(data) ? data : []);
     } catch (err) { 
         console.error(err);
@@ -95,15 +95,22 @@ const SearchableSelect = ({ options = [], value, onChange, placeholder, disabled
   );
 };
 
+// Linhas por requisição; as seguintes vêm pelo cursor (X-Next-Cursor) em "Carregar mais"
+const LOGS_POR_PAGINA = 100;
+
 export function AdminLogs() {
   const [logs, setLogs] = useState([]);
   const [sistemas, setSistemas] = useState([]); // Para o filtro
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const ultimaConsulta = useRef(0); // respostas de filtros antigos são descartadas
   const { error, success } = useSnackbar();
   const { user } = useAuth();
   
   // --- ESTADOS DE FILTRO ---
   const [searchTerm, setSearchTerm] = useState('');
+  const [busca, setBusca] = useState(''); // searchTerm depois de uma pausa na digitação
   const [selectedSistema, setSelectedSistema] = useState('');
   
   // Filtro de Ação (Dropdown no Header)
@@ -135,9 +142,21 @@ export function AdminLogs() {
 
   // --- EFEITOS ---
   useEffect(() => {
-    loadData();
+    api.getTodos('/sistemas/')
+      .then(sisRes => setSistemas(Array.isArray(sisRes) ? sisRes : []))
+      .catch(() => error("Erro ao carregar sistemas."));
   }, []);
 
+  useEffect(() => {
+    const t = setTimeout(() => setBusca(searchTerm.trim()), 400);
+    return () => clearTimeout(t);
+  }, [searchTerm]);
+
+  // Os filtros vão para o servidor: cada mudança recomeça da primeira página
+  useEffect(() => {
+    loadData();
+  }, [selectedSistema, selectedAcao, busca]);
+
   // Fecha dropdown do header ao clicar fora
   useEffect(() => {
     function handleClickOutside(event) {
@@ -150,29 +169,49 @@ export function AdminLogs() {
   }, [selectedAcao]);
 
   // Reset paginação ao filtrar
-  useEffect(() => { setCurrentPage(1); }, [searchTerm, selectedSistema, selectedAcao]);
+  useEffect(() => { setCurrentPage(1); }, [busca, selectedSistema, selectedAcao]);
 
   // --- CARREGAMENTO ---
+  const buscarLogs = (cursor) => {
+    const params = new URLSearchParams({ limit: LOGS_POR_PAGINA });
+    if (selectedSistema) params.set('sistema_id', selectedSistema);
+    if (selectedAcao) params.set('acao', selectedAcao);
+    if (busca) params.set('busca', busca);
+    if (cursor) params.set('cursor', cursor);
+    // o backend já devolve do mais recente para o mais antigo
+    return api.get(`/logs/?${params}`, { comCabecalhos: true });
+  };
+
   const loadData = async () => {
+    const consulta = ++ultimaConsulta.current;
     setLoading(true);
     try {
-      // Carrega Logs e Sistemas para o filtro
-      const [logsRes, sisRes] = await Promise.all([
-          api.get('/logs/'),
-          api.get('/sistemas/')
-      ]);
-      
-      const logsData = Array.isArray(logsRes.data || logsRes) ? (logsRes.data || logsRes) : [];
-      // Ordena logs por data decrescente (caso o backend não garanta)
-      logsData.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
-      
-      setLogs(logsData);
-      setSistemas(Array.isArray(sisRes.data || sisRes) ? (sisRes.data || sisRes) : []);
+      const { data, headers } = await buscarLogs(null);
+      if (consulta !== ultimaConsulta.current) return;
+      setLogs(Array.isArray(data) ? data : []);
+      setNextCursor(headers.get('X-Next-Cursor'));
     } catch (err) {
       console.error(err);
       error("Erro ao carregar dados.");
     } finally {
-      setLoading(false);
+      if (consulta === ultimaConsulta.current) setLoading(false);
+    }
+  };
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    const consulta = ultimaConsulta.current;
+    setLoadingMore(true);
+    try {
+      const { data, headers } = await buscarLogs(nextCursor);
+      if (consulta !== ultimaConsulta.current) return;
+      setLogs(prev => [...prev, ...(Array.isArray(data) ? data : [])]);
+      setNextCursor(headers.get('X-Next-Cursor'));
+    } catch (err) {
+      console.error(err);
+      error("Erro ao carregar mais registros.");
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -196,26 +235,8 @@ export function AdminLogs() {
   };
 
   // --- FILTRAGEM DOS DADOS ---
-  const filteredLogs = logs.filter(log => {
-      // Filtro de Sistema
-      if (selectedSistema && String(log.sistema_id) !== String(selectedSistema)) return false;
-      
-      // Filtro de Ação (Coluna)
-      if (selectedAcao && log.acao !== selectedAcao) return false;
-
-      // Filtro de Texto (Global)
-      if (searchTerm) {
-          const s = searchTerm.toLowerCase();
-          const match = 
-            (log.usuario_nome || '').toLowerCase().includes(s) ||
-            (log.sistema_nome || '').toLowerCase().includes(s) ||
-            (log.entidade || '').toLowerCase().includes(s) ||
-            (log.detalhes || '').toLowerCase().includes(s) ||
-            String(log.id).includes(s);
-          if (!match) return false;
-      }
-      return true;
-  });
+  // sistema, ação e busca já foram aplicados no servidor
+  const filteredLogs = logs;
 
   // Opções para o filtro de Ação no Header
   const acaoOptions = [
@@ -388,6 +409,14 @@ export function AdminLogs() {
                         <button onClick={() => paginate(currentPage + 1)} disabled={currentPage === totalPages} className="pagination-btn nav-btn">›</button>
                     </div>
                 )}
+
+                {nextCursor && (
+                    <div className="pagination-container">
+                        <button onClick={loadMore} disabled={loadingMore} className="pagination-btn">
+                            {loadingMore ? 'Carregando...' : `Carregar mais (${logs.length} carregados)`}
+                        </button>
+                    </div>
+                )}
             </div>
         )}
       </section>
@@ -140,9 +140,9 @@ export function AdminModulos() {
   const loadData = async () => {
     try {
         const [modsResponse, sisResponse, projResponse] = await Promise.all([
-            api.get("/modulos/"),
-            api.get("/sistemas/"),
-            api.get("/projetos/")
+            api.getTodos("/modulos/"),
+            api.getTodos("/sistemas/"),
+            api.getTodos("/projetos/")
         ]);
         setModulos(modsResponse.data || modsResponse || []);
         setSistemas(sisResponse.data || sisResponse || []);
@@ -53,7 +53,7 @@ export function AdminSistemas() {
   const loadSistemas = async () => {
     setLoading(true);
     try {
-      const data = await api.get("/sistemas/");
+      const data = await api.getTodos("/sistemas/");
       setSistemas(Array.isArray(data) ? data : []);
     } catch (err) { 
       error("Erro ao carregar sistemas."); 
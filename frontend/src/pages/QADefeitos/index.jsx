@@ -76,8 +76,8 @@ export function QADefeitos() {
     setLoading(true);
     try {
       const [defResponse, userResponse] = await Promise.all([
-          api.get('/defeitos/'),
-          api.get('/usuarios/')
+          api.getTodos('/defeitos/'),
+          api.getTodos('/usuarios/')
       ]);
       
       const rawDefects = Array.isArray(defResponse) ? defResponse : [];
@@ -1,7 +1,7 @@
 import React from 'react';
 import styles from './styles.module.css';
 
-export function TaskSidebar({ tasks, loading, activeExecId, onSelect }) {
+export function TaskSidebar({ tasks, loading, activeExecId, onSelect, hasMore, loadingMore, onLoadMore }) {
   if (loading) return <div className={styles.sidebar}>Carregando tarefas...</div>;
 
   return (
@@ -32,6 +32,13 @@ export function TaskSidebar({ tasks, loading, activeExecId, onSelect }) {
           ))}
         </ul>
       )}
+      {hasMore && (
+        <div className={styles.loadMore}>
+          <button onClick={onLoadMore} disabled={loadingMore} className="pagination-btn">
+            {loadingMore ? 'Carregando...' : `Carregar mais (${tasks.length} carregadas)`}
+          </button>
+        </div>
+      )}
     </aside>
   );
 }
\ No newline at end of file
@@ -1,5 +1,5 @@
 import { useState, useEffect } from 'react';
-import { api } from '../../services/api';
+import { api, uploadEvidencia } from '../../services/api';
 import { useSnackbar } from '../../context/SnackbarContext';
 
 import { ConfirmationModal } from '../../components/ConfirmationModal';
@@ -9,9 +9,14 @@ import { ExecutionPlayer } from './ExecutionPlayer';
 import { EvidenceGallery } from './EvidenceGallery';
 import styles from './styles.module.css';
 
+// Tarefas por requisição; as seguintes vêm pelo cursor (X-Next-Cursor) em "Carregar mais"
+const TAREFAS_POR_PAGINA = 20;
+
 export function QARunner() {
   const [tarefas, setTarefas] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [activeExecucao, setActiveExecucao] = useState(null);
   
   // --- ESTADOS ---
@@ -51,15 +56,35 @@ export function QARunner() {
     }
   }, [defectsQueue, stepStatuses, activeExecucao]);
 
+  const buscarTarefas = (cursor) => {
+    const params = new URLSearchParams({ limit: TAREFAS_POR_PAGINA });
+    if (cursor) params.set('cursor', cursor);
+    return api.get(`/testes/minhas-tarefas?${params}`, { comCabecalhos: true });
+  };
+
   const loadMinhasTarefas = async () => {
     setLoading(true);
     try {
-        const data = await api.get("/testes/minhas-tarefas");
+        const { data, headers } = await buscarTarefas(null);
         setTarefas(Array.isArray(data) ? data : []);
+        setNextCursor(headers.get('X-Next-Cursor'));
     } catch { error("Erro ao carregar tarefas."); } 
     finally { setLoading(false); }
   };
 
+  const loadMaisTarefas = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+        const { data, headers } = await buscarTarefas(nextCursor);
+        const novas = Array.isArray(data) ? data : [];
+        // o status_geral muda ao abrir a tarefa e pode repetir uma já listada
+        setTarefas(prev => [...prev, ...novas.filter(n => !prev.some(t => t.id === n.id))]);
+        setNextCursor(headers.get('X-Next-Cursor'));
+    } catch { error("Erro ao carregar mais tarefas."); }
+    finally { setLoadingMore(false); }
+  };
+
   const selectTask = async (t) => {
       if (activeExecucao?.id === t.id) return;
       try {
@@ -145,11 +170,7 @@ export function QARunner() {
       if (files && files.length > 0) {
           try {
               info(`Enviando ${files.length} imagem(ns)...`);
-              const uploadPromises = files.map(file => {
-                  const formData = new FormData();
-                  formData.append('file', file);
-                  return api.post(`/testes/passos/${currentStepId}/evidencia`, formData);
-              });
+              const uploadPromises = files.map(file => uploadEvidencia(currentStepId, file));
               const responses = await Promise.all(uploadPromises);
               novasEvidenciasUrls = responses.map(res => (res.data?.url || res.url)).filter(Boolean); 
           } catch { error("Erro ao enviar imagens."); }
@@ -309,7 +330,15 @@ export function QARunner() {
       <h2 className="section-title" style={{marginBottom: '15px' }}>Minhas Tarefas</h2>
       
       <div className={styles.container}>
-          <TaskSidebar tasks={tarefas} loading={loading} activeExecId={activeExecucao?.id} onSelect={selectTask} />
+          <TaskSidebar 
+              tasks={tarefas} 
+              loading={loading} 
+              activeExecId={activeExecucao?.id} 
+              onSelect={selectTask} 
+              hasMore={!!nextCursor} 
+              loadingMore={loadingMore} 
+              onLoadMore={loadMaisTarefas} 
+          />
           
           <ExecutionPlayer 
               key={activeExecucao?.id} 
@@ -33,7 +33,7 @@ export function RunnerDashboard() {
 
   // Busca Usuários
   useEffect(() => {
-    api.get('/usuarios/')
+    api.getTodos('/usuarios/')
       .then(resp => setUsers(resp || []))
       .catch(() => error("Erro ao carregar lista de usuários."));
   }, [error]);
@@ -12,21 +12,67 @@ export const clearSession = () => {
   window.location.href = "/"; 
 };
 
-async function request(endpoint, options = {}) {
+// Troca o refresh token por um novo access token sem pedir a senha de novo.
+// Requisições que recebem 401 ao mesmo tempo compartilham a mesma renovação:
+// o refresh token muda a cada uso e só a primeira troca vale.
+let renovacaoEmAndamento = null;
+
+function renovarSessao() {
+  const refreshToken = sessionStorage.getItem("refresh_token");
+  if (!refreshToken) return Promise.resolve(false);
+  if (!renovacaoEmAndamento) {
+    renovacaoEmAndamento = fetch(`${BASE_URL}/login/refresh`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    })
+      .then(async (response) => {
+        if (!response.ok) return false;
+        const data = await response.json();
+        sessionStorage.setItem("token", data.access_token);
+        sessionStorage.setItem("refresh_token", data.refresh_token);
+        return true;
+      })
+      .catch(() => false)
+      .finally(() => { renovacaoEmAndamento = null; });
+  }
+  return renovacaoEmAndamento;
+}
+
+export const encerrarSessao = () => {
+  const refreshToken = sessionStorage.getItem("refresh_token");
+  if (!refreshToken) return Promise.resolve();
+  // keepalive: o logout redireciona a página logo em seguida
+  return fetch(`${BASE_URL}/login/logout`, {
+    keepalive: true,
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  }).catch(() => {});
+};
+
+// Miniatura ("thumb") ou versão web ("web") de uma evidência servida pelo backend
+export const evidenciaVariante = (url, variante) => {
+  if (typeof url !== "string" || !url.includes("/evidencias/") || url.includes("?")) return url;
+  return `${url}?variante=${variante}`;
+};
+
+async function request(endpoint, options = {}, renovado = false) {
   const { token } = getSession();
+  const { comCabecalhos, ...opcoesFetch } = options;
   
-  const headers = new Headers(options.headers || {});
+  const headers = new Headers(opcoesFetch.headers || {});
   
   if (token) headers.append("Authorization", `Bearer ${token}`);
   
-  const isFormData = options.body instanceof FormData || options.body instanceof URLSearchParams;
+  const isFormData = opcoesFetch.body instanceof FormData || opcoesFetch.body instanceof URLSearchParams;
   
   if (!headers.has("Content-Type") && !isFormData) {
     headers.append("Content-Type", "application/json");
   }
 
   const config = {
-    ...options,
+    ...opcoesFetch,
     headers,
   };
 
@@ -37,6 +83,7 @@ async function request(endpoint, options = {}) {
     
     const isLoginRequest = url.includes("/login");
     if (response.status === 401 && !isLoginRequest) {
+      if (!renovado && await renovarSessao()) return request(endpoint, options, true);
       clearSession();
       throw new Error("Sessão expirada.");
     }
@@ -62,15 +109,34 @@ async function request(endpoint, options = {}) {
         throw new Error(errorMessage);
     }
 
-    return data;
+    return comCabecalhos ? { data, headers: response.headers } : data;
   } catch (error) {
     console.error("API Error:", error);
     throw error;
   }
 }
 
+// Listas paginadas por cursor (header X-Next-Cursor): busca as páginas seguintes até o fim.
+// Para selects e tabelas que filtram no navegador e precisam de todos os registros.
+const LIMITE_PAGINA = 500;
+
+async function getTodos(endpoint, options = {}) {
+  const separador = endpoint.includes("?") ? "&" : "?";
+  const itens = [];
+  let cursor = null;
+  do {
+    const pagina = `${endpoint}${separador}limit=${LIMITE_PAGINA}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`;
+    const { data, headers } = await request(pagina, { method: "GET", ...options, comCabecalhos: true });
+    itens.push(...(Array.isArray(data) ? data : []));
+    cursor = headers.get("X-Next-Cursor");
+  } while (cursor);
+  return itens;
+}
+
 export const api = {
   get: (endpoint, options = {}) => request(endpoint, { method: "GET", ...options }),
+
+  getTodos,
   
   post: (endpoint, body, options = {}) => {
     const isBinary = body instanceof FormData || body instanceof URLSearchParams;
@@ -98,4 +164,66 @@ export const api = {
           ...options 
       });
   },
-};
\ No newline at end of file
+};
+
+// Arquivos grandes (vídeos) vão em trechos: se a conexão cair, retoma do que o servidor já recebeu
+const LIMITE_UPLOAD_SIMPLES = 8 * 1024 * 1024;
+const TAMANHO_TRECHO = 8 * 1024 * 1024;
+const MAX_TENTATIVAS = 5;
+
+async function sha256Hex(file) {
+  const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return [...new Uint8Array(digest)].map(b => b.toString(16).padStart(2, "0")).join("");
+}
+
+// Envio direto ao armazenamento (bucket ou disco): a API só assina a URL e confere o resultado
+async function uploadEvidenciaDireto(passoId, file) {
+  const envio = await api.post(`/testes/passos/${passoId}/evidencia/direto`, {
+    sha256: await sha256Hex(file),
+    tamanho: file.size,
+    content_type: file.type,
+    nome_arquivo: file.name,
+  });
+  if (envio.upload_url) {
+    const resposta = await fetch(envio.upload_url, { method: envio.metodo, body: file, headers: envio.headers });
+    if (!resposta.ok) throw new Error("Falha ao enviar a evidência ao armazenamento.");
+  }
+  return api.post(`/testes/evidencias/direto/concluir`, { token: envio.token });
+}
+
+export async function uploadEvidencia(passoId, file) {
+  if (file.size <= LIMITE_UPLOAD_SIMPLES) {
+    // crypto.subtle só existe em contexto seguro (https ou localhost)
+    if (window.crypto?.subtle && file.type) return uploadEvidenciaDireto(passoId, file);
+    const formData = new FormData();
+    formData.append('file', file);
+    return api.post(`/testes/passos/${passoId}/evidencia`, formData);
+  }
+
+  const sessao = await api.post(`/testes/passos/${passoId}/evidencia/uploads`, {
+    tamanho: file.size,
+    nome_arquivo: file.name,
+    content_type: file.type || null,
+  });
+
+  let offset = sessao.recebido;
+  let tentativas = 0;
+  while (offset < file.size) {
+    try {
+      const progresso = await request(`/testes/evidencias/uploads/${sessao.id}?offset=${offset}`, {
+        method: "PUT",
+        body: file.slice(offset, offset + TAMANHO_TRECHO),
+        headers: { "Content-Type": "application/octet-stream" },
+      });
+      offset = progresso.recebido;
+      tentativas = 0;
+    } catch (e) {
+      if (++tentativas > MAX_TENTATIVAS) throw e;
+      await new Promise(resolve => setTimeout(resolve, 1000 * tentativas));
+      const progresso = await api.get(`/testes/evidencias/uploads/${sessao.id}`);
+      offset = progresso.recebido;
+    }
+  }
+
+  return api.post(`/testes/evidencias/uploads/${sessao.id}/concluir`, {});
+}